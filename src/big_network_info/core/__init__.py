@@ -1,5 +1,5 @@
 """Core network scanning functionality."""
-from .scanner import NetworkScanner, ScanResult
+from .scanner import NetworkScanner, ScanResult, ScanEvent
 from .services import ServiceInfo, COMMON_SERVICES
 from .config import ConfigManager
 from .network_diagnostics import (
@@ -12,6 +12,7 @@ from .wol import WakeOnLan, wake_device
 __all__ = [
     "NetworkScanner",
     "ScanResult",
+    "ScanEvent",
     "ServiceInfo",
     "COMMON_SERVICES",
     "ConfigManager",
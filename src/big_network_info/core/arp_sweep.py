@@ -0,0 +1,301 @@
+"""
+ARP sweep discovery for privileged scans.
+Broadcasts one ARP request per address from an AF_PACKET socket and reads
+the replies in the same loop, finding every device on the local link
+(including ones that drop ICMP) together with its MAC and reply latency.
+Requires CAP_NET_RAW.
+"""
+
+import collections
+import errno
+import logging
+import select
+import socket
+import struct
+import time
+from typing import Callable, Dict, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+from ..utils.network import IPRange, ip_to_int
+from .rate_control import RateController
+
+logger = logging.getLogger(__name__)
+
+ETH_P_ARP = 0x0806
+ETH_P_IP = 0x0800
+ARP_REQUEST = 1
+ARP_REPLY = 2
+BROADCAST_MAC = b"\xff" * 6
+
+# linux/if.h
+_IFF_LOOPBACK = 0x8
+_IFF_NOARP = 0x80
+
+# Ethernet header, then the ARP packet for IPv4 over Ethernet
+_ETHERNET = struct.Struct("!6s6sH")
+_ARP = struct.Struct("!HHBBH6s4s6s4s")
+# Shortest Ethernet frame without the FCS
+_MIN_FRAME = 60
+
+SYS_CLASS_NET = "/sys/class/net"
+
+
+class ArpInterface(NamedTuple):
+    """Local interface an ARP sweep is sent from."""
+
+    name: str
+    ip: str
+    mac: str  # aa:bb:cc:dd:ee:ff
+
+
+def _read_sys(interface: str, attribute: str) -> str:
+    try:
+        with open(f"{SYS_CLASS_NET}/{interface}/{attribute}", "r") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def find_arp_interface(
+    ip_range: IPRange, route_file: str = "/proc/net/route"
+) -> Optional[ArpInterface]:
+    """
+    Find the interface whose connected subnet holds a whole IPv4 range.
+
+    Args:
+        ip_range: Addresses to sweep
+        route_file: Path of the kernel IPv4 routing table
+
+    Returns:
+        ArpInterface, or None if the range is not entirely on one
+        ARP-capable link
+    """
+    if ip_range.version != 4 or not ip_range:
+        return None
+    first = ip_to_int(ip_range[0])
+    last = ip_to_int(ip_range[len(ip_range) - 1])
+
+    name = None
+    try:
+        with open(route_file, "r") as f:
+            next(f, None)  # Header line
+            for line in f:
+                parts = line.split()
+                if len(parts) < 8:
+                    continue
+                try:
+                    destination, gateway, mask = (
+                        struct.unpack("!I", struct.pack("=I", int(field, 16)))[0]
+                        for field in (parts[1], parts[2], parts[7])
+                    )
+                except (ValueError, struct.error):
+                    continue
+                if gateway or not mask:
+                    continue
+                if first & mask == destination & mask == last & mask:
+                    name = parts[0]
+                    break
+    except OSError:
+        return None
+    if name is None:
+        return None
+
+    try:
+        flags = int(_read_sys(name, "flags") or "0", 16)
+    except ValueError:
+        flags = 0
+    mac = _read_sys(name, "address").lower()
+    if flags & (_IFF_LOOPBACK | _IFF_NOARP) or len(mac) != 17:
+        return None
+
+    # Connecting a UDP socket only runs the route lookup for the source
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.connect((ip_range[0], 9))
+        ip = sock.getsockname()[0]
+    except OSError:
+        return None
+    finally:
+        sock.close()
+    return ArpInterface(name, ip, mac)
+
+
+class ArpSweeper:
+    """Broadcast ARP requests and collect the replies."""
+
+    # Requests sent between reads, keeping the receive queue short
+    SEND_BATCH = 64
+    # Seconds to back off when the send queue is full and no rate
+    # controller paces the requests
+    BUSY_BACKOFF = 0.01
+
+    def __init__(
+        self,
+        interface: ArpInterface,
+        timeout: float = 0.5,
+        retries: int = 1,
+        stop_check: Optional[Callable[[], bool]] = None,
+        rate: Optional[RateController] = None,
+    ):
+        """
+        Initialize the sweeper.
+
+        Args:
+            interface: Interface to send from
+            timeout: Seconds to wait for each reply
+            retries: Requests resent to a silent address
+            stop_check: Optional callable returning True when sweeping should abort
+            rate: Optional rate controller pacing the requests
+        """
+        self.interface = interface
+        self.timeout = max(0.05, timeout)
+        self.retries = max(0, retries)
+        self.stop_check = stop_check
+        self.rate = rate
+        self._mac = bytes.fromhex(interface.mac.replace(":", ""))
+        self._ip = socket.inet_aton(interface.ip)
+
+    def _request(self, ip: str) -> bytes:
+        """Build a broadcast who-has frame for ip."""
+        frame = _ETHERNET.pack(BROADCAST_MAC, self._mac, ETH_P_ARP) + _ARP.pack(
+            1,  # Ethernet
+            ETH_P_IP,
+            6,
+            4,
+            ARP_REQUEST,
+            self._mac,
+            self._ip,
+            bytes(6),
+            socket.inet_aton(ip),
+        )
+        return frame.ljust(_MIN_FRAME, b"\x00")
+
+    def sweep(self, ips: Iterable[str]) -> Iterator[Tuple[str, str, float]]:
+        """
+        ARP for every address and yield the ones that answer.
+
+        Addresses are consumed lazily; requests are paced by the rate
+        controller and replies are read between sends.
+
+        Args:
+            ips: IPv4 addresses on the interface's link
+
+        Yields:
+            (ip, mac, latency in milliseconds) per answering address, in
+            reply order
+
+        Raises:
+            OSError: If the packet socket cannot be opened (no CAP_NET_RAW)
+        """
+        sock = socket.socket(
+            socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ARP)
+        )
+        try:
+            sock.bind((self.interface.name, ETH_P_ARP))
+            sock.setblocking(False)
+            yield from self._run(sock, iter(ips))
+        finally:
+            sock.close()
+
+    def _run(
+        self, sock: socket.socket, source: Iterator[str]
+    ) -> Iterator[Tuple[str, str, float]]:
+        # ip -> [last send time, requests sent]
+        pending: Dict[str, list] = {}
+        # (deadline, ip) in send order; every request has the same timeout
+        deadlines: collections.deque = collections.deque()
+        resend: collections.deque = collections.deque()
+        exhausted = False
+        rate = self.rate
+
+        while True:
+            if self.stop_check and self.stop_check():
+                return
+
+            # Send until paced, resends first
+            paced = False
+            sent = 0
+            while resend or not exhausted:
+                if resend:
+                    ip = resend.popleft()
+                    if ip not in pending:
+                        # Answered while waiting to be resent
+                        continue
+                else:
+                    ip = next(source, None)
+                    if ip is None:
+                        exhausted = True
+                        break
+                    if ip == self.interface.ip or ip in pending:
+                        continue
+                    pending[ip] = [0.0, 0]
+                # A token is only taken for a request that is really sent
+                if rate and not rate.try_take():
+                    resend.appendleft(ip)
+                    paced = True
+                    break
+                try:
+                    sock.send(self._request(ip))
+                except OSError as e:
+                    if e.errno in (errno.ENOBUFS, errno.EAGAIN):
+                        if rate:
+                            rate.on_loss()
+                        resend.appendleft(ip)
+                        paced = True
+                        break
+                    logger.debug("ARP request for %s failed: %s", ip, e)
+                entry = pending[ip]
+                entry[0] = time.monotonic()
+                entry[1] += 1
+                deadlines.append((entry[0] + self.timeout, ip))
+                sent += 1
+                if sent >= self.SEND_BATCH:
+                    break
+
+            if exhausted and not resend and not pending:
+                return
+
+            wait = 0.0
+            if paced:
+                wait = rate.wait_time() if rate else self.BUSY_BACKOFF
+            elif exhausted and not resend:
+                wait = self.timeout
+                if deadlines:
+                    wait = max(0.0, deadlines[0][0] - time.monotonic())
+            readable, _w, _x = select.select([sock], [], [], wait)
+            if readable:
+                for ip, mac in self._receive(sock):
+                    entry = pending.pop(ip, None)
+                    if entry is None:
+                        continue
+                    if rate:
+                        rate.on_answer()
+                    # Measured from the latest request for the address
+                    yield ip, mac, (time.monotonic() - entry[0]) * 1000.0
+
+            now = time.monotonic()
+            while deadlines and deadlines[0][0] <= now:
+                _deadline, ip = deadlines.popleft()
+                entry = pending.get(ip)
+                if entry is None or entry[0] + self.timeout > now:
+                    continue
+                if entry[1] <= self.retries:
+                    resend.append(ip)
+                else:
+                    del pending[ip]
+
+    @staticmethod
+    def _receive(sock: socket.socket) -> Iterator[Tuple[str, str]]:
+        """Read every queued frame, yielding (ip, mac) for ARP replies."""
+        while True:
+            try:
+                frame = sock.recv(128)
+            except OSError:
+                # Nothing left to read (EAGAIN)
+                return
+            if len(frame) < _ETHERNET.size + _ARP.size:
+                continue
+            fields = _ARP.unpack_from(frame, _ETHERNET.size)
+            if fields[4] != ARP_REPLY:
+                continue
+            mac = ":".join(f"{b:02x}" for b in fields[5])
+            yield socket.inet_ntoa(fields[6]), mac
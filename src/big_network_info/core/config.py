@@ -20,14 +20,16 @@ class AppConfig:
 
     custom_services: List[Dict[str, Any]]
     scan_timeout: float  # Port scanning timeout
-    scan_threads: int  # Number of parallel scanning threads
+    scan_threads: int  # Worker threads for blocking probes (lookups, UDP checks)
+    scan_window: int  # Probes in flight at once across all scan stages
+    scan_profile: str  # Probe politeness: "gentle", "normal" or "aggressive"
     use_privileged_scan: bool
     auto_detect_network: bool
     # New detection settings
     ping_timeout: float  # Ping timeout in seconds
     ping_attempts: int  # Number of ping attempts per host
     hostname_timeout: float  # Hostname resolution timeout
-    discovery_threads: int  # Parallel threads for host discovery
+    offline_mode: bool  # Never contact online services (vendor lookups)
     additional_settings: Dict[
         str, Any
     ]  # Additional settings like welcome screen preferences
@@ -39,12 +41,14 @@ class AppConfig:
             custom_services=[],
             scan_timeout=1.0,
             scan_threads=130,
+            scan_window=2048,
+            scan_profile="normal",
             use_privileged_scan=False,
             auto_detect_network=True,
             ping_timeout=1.0,
             ping_attempts=2,
             hostname_timeout=0.5,  # 500ms hostname resolution
-            discovery_threads=130,  # 50 parallel discovery threads
+            offline_mode=False,
             additional_settings={"show_welcome_on_startup": False},
         )
 
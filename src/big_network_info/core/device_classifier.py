@@ -0,0 +1,293 @@
+"""
+Rule-based device classification.
+Compiles vendor patterns and open-port rules once, from the built-in rule
+file and an optional user file, so classifying a host is a regex search
+over its vendor name and a few integer operations over its ports.
+"""
+
+import json
+import logging
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BUILTIN_RULES_FILE = Path(__file__).with_name("device_rules.json")
+USER_RULES_FILE = Path.home() / ".config" / "big-network-info" / "device_rules.json"
+
+# Last octets of addresses routers usually take
+_GATEWAY_OCTETS = ("1", "254", "255")
+
+
+class _PortCondition:
+    """
+    One compiled rule or server indicator.
+
+    Port lists become bitsets over the ports any rule mentions; every
+    condition present in the rule must hold.
+    """
+
+    __slots__ = (
+        "type",
+        "any_mask",
+        "all_mask",
+        "count_mask",
+        "count_min",
+        "others_mask",
+        "others_max",
+        "min_ports",
+        "max_ports",
+        "gateway_address",
+        "hostname_terms",
+        "min_score",
+    )
+
+    def __init__(self, rule: dict, bit: Dict[int, int]):
+        def mask(ports: Iterable[int]) -> int:
+            value = 0
+            for port in ports:
+                value |= bit[int(port)]
+            return value
+
+        self.type = rule.get("type", "")
+        self.any_mask = mask(rule.get("any", []))
+        self.all_mask = mask(rule.get("all", []))
+        count = rule.get("count", {})
+        self.count_mask = mask(count.get("ports", []))
+        self.count_min = int(count.get("min", 0))
+        others = rule.get("others")
+        self.others_mask = mask(others["ports"]) if others else None
+        self.others_max = int(others.get("max", 0)) if others else 0
+        self.min_ports = int(rule.get("min_ports", 0))
+        self.max_ports = rule.get("max_ports")
+        self.gateway_address = bool(rule.get("gateway_address", False))
+        self.hostname_terms = tuple(term.lower() for term in rule.get("hostname", []))
+        self.min_score = int(rule.get("min_score", 0))
+
+    def matches(
+        self,
+        ports: int,
+        port_count: int,
+        unmapped: int,
+        gateway: bool,
+        hostname: str,
+        score: int,
+    ) -> bool:
+        """
+        Check the condition against a host.
+
+        Args:
+            ports: Bitset of the host's open ports that rules mention
+            port_count: Number of distinct open ports
+            unmapped: Open ports no rule mentions
+            gateway: Whether the address looks like a gateway address
+            hostname: Lowercase hostname, empty if unknown
+            score: Number of server indicators the host meets
+        """
+        if self.any_mask and not ports & self.any_mask:
+            return False
+        if ports & self.all_mask != self.all_mask:
+            return False
+        if self.count_min and bin(ports & self.count_mask).count("1") < self.count_min:
+            return False
+        if self.others_mask is not None:
+            others = bin(ports & ~self.others_mask).count("1") + unmapped
+            if others > self.others_max:
+                return False
+        if port_count < self.min_ports:
+            return False
+        if self.max_ports is not None and port_count > self.max_ports:
+            return False
+        if self.gateway_address and not gateway:
+            return False
+        if self.hostname_terms and not any(
+            term in hostname for term in self.hostname_terms
+        ):
+            return False
+        return score >= self.min_score
+
+
+class DeviceClassifier:
+    """
+    Guesses device types from vendor names and open ports.
+
+    Rules come from a JSON document with three lists, evaluated in order:
+    "vendor_types" ({"pattern", "type"}; the first pattern found in the
+    vendor name wins), "port_rules" ({"type"} plus conditions; the first
+    matching rule wins) and "server_indicators" (conditions; the number a
+    host meets is what a rule's "min_score" compares against).
+    """
+
+    def __init__(self, rules: dict):
+        """
+        Compile a rule document.
+
+        Args:
+            rules: Parsed rule document
+        """
+        self._vendor_types: List[str] = []
+        patterns: List[str] = []
+        for entry in rules.get("vendor_types", []):
+            patterns.append(re.escape(entry["pattern"].lower()))
+            self._vendor_types.append(entry["type"])
+        # One group per pattern, in priority order. The lookahead finds a
+        # match starting at every position, so the earliest-listed pattern
+        # present anywhere in the name can be picked, not just the leftmost.
+        self._vendor_regex = (
+            re.compile("(?=" + "|".join(f"({p})" for p in patterns) + ")")
+            if patterns
+            else None
+        )
+        self._vendor_cache: Dict[str, str] = {}
+
+        port_rules = rules.get("port_rules", [])
+        indicators = rules.get("server_indicators", [])
+        mentioned = set()
+        for rule in port_rules + indicators:
+            for key in ("any", "all"):
+                mentioned.update(int(port) for port in rule.get(key, []))
+            for key in ("count", "others"):
+                mentioned.update(int(port) for port in rule.get(key, {}).get("ports", []))
+        self._bit = {port: 1 << index for index, port in enumerate(sorted(mentioned))}
+        self._rules = [_PortCondition(rule, self._bit) for rule in port_rules]
+        self._indicators = [_PortCondition(rule, self._bit) for rule in indicators]
+
+    @classmethod
+    def from_files(cls, paths: Iterable[Path]) -> "DeviceClassifier":
+        """
+        Build a classifier from rule files; earlier files take precedence.
+
+        Missing files are skipped and invalid ones are logged and skipped.
+
+        Args:
+            paths: Rule files, most specific first
+
+        Returns:
+            DeviceClassifier with the rules of all files combined
+        """
+        combined: Dict[str, list] = {
+            "vendor_types": [],
+            "port_rules": [],
+            "server_indicators": [],
+        }
+        for path in paths:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    rules = json.load(f)
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError) as e:
+                logger.warning("Ignoring device rules %s: %s", path, e)
+                continue
+            for key in combined:
+                combined[key].extend(rules.get(key, []))
+        try:
+            return cls(combined)
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            logger.warning("Invalid device rules, using the built-in ones: %s", e)
+            with open(BUILTIN_RULES_FILE, "r", encoding="utf-8") as f:
+                return cls(json.load(f))
+
+    def vendor_type(self, vendor: str) -> str:
+        """
+        Return the device type implied by a vendor name (cached per vendor).
+
+        Args:
+            vendor: Vendor name from the MAC lookup
+
+        Returns:
+            Device type or empty string if unknown
+        """
+        if not vendor or vendor == "Unknown" or self._vendor_regex is None:
+            return ""
+        cached = self._vendor_cache.get(vendor)
+        if cached is not None:
+            return cached
+
+        best: Optional[int] = None
+        for match in self._vendor_regex.finditer(vendor.lower()):
+            # Pattern i is group i + 1
+            index = match.lastindex - 1
+            if best is None or index < best:
+                best = index
+                if best == 0:
+                    break
+        device_type = self._vendor_types[best] if best is not None else ""
+        self._vendor_cache[vendor] = device_type
+        return device_type
+
+    def classify(
+        self, ip: str, ports: Iterable[int], vendor: str = "", hostname: str = ""
+    ) -> str:
+        """
+        Guess the device type of a host.
+
+        Args:
+            ip: IP address
+            ports: Open ports of the host
+            vendor: Vendor name from the MAC lookup (optional)
+            hostname: Known hostname (optional)
+
+        Returns:
+            Device type or empty string for regular clients
+        """
+        # Don't classify localhost/loopback addresses
+        if ip.startswith("127.") or ip == "::1":
+            return ""
+
+        # The vendor is the most reliable hint for IoT devices and phones
+        device_type = self.vendor_type(vendor)
+        if device_type:
+            return device_type
+
+        bitset, unmapped, distinct = self._port_bitset(ports)
+        gateway = ip.rsplit(".", 1)[-1] in _GATEWAY_OCTETS
+        hostname = hostname.lower() if hostname and hostname != ip else ""
+
+        score = sum(
+            1
+            for indicator in self._indicators
+            if indicator.matches(bitset, distinct, unmapped, gateway, hostname, 0)
+        )
+        for rule in self._rules:
+            if rule.matches(bitset, distinct, unmapped, gateway, hostname, score):
+                return rule.type
+        return ""
+
+    def _port_bitset(self, ports: Iterable[int]) -> Tuple[int, int, int]:
+        """Return (bitset of mentioned ports, unmentioned count, distinct count)."""
+        bitset = 0
+        unmapped = 0
+        seen = set()
+        for port in ports:
+            if port in seen:
+                continue
+            seen.add(port)
+            bit = self._bit.get(port)
+            if bit is None:
+                unmapped += 1
+            else:
+                bitset |= bit
+        return bitset, unmapped, len(seen)
+
+
+_shared_lock = threading.Lock()
+_shared_classifier: Optional[DeviceClassifier] = None
+
+
+def get_device_classifier() -> DeviceClassifier:
+    """
+    Return the process-wide classifier, compiling the rules on first use.
+
+    User rules in ~/.config/big-network-info/device_rules.json are
+    evaluated before the built-in ones.
+    """
+    global _shared_classifier
+    with _shared_lock:
+        if _shared_classifier is None:
+            _shared_classifier = DeviceClassifier.from_files(
+                [USER_RULES_FILE, BUILTIN_RULES_FILE]
+            )
+        return _shared_classifier
@@ -0,0 +1,207 @@
+"""
+Minimal DNS wire format encoder/decoder.
+Covers the record types needed for host and service name lookups.
+"""
+
+import socket
+import struct
+from typing import List, NamedTuple, Optional, Tuple, Union
+
+TYPE_A = 1
+TYPE_PTR = 12
+TYPE_TXT = 16
+TYPE_AAAA = 28
+TYPE_SRV = 33
+TYPE_ANY = 255
+
+CLASS_IN = 1
+# Top bit of the class: cache-flush in mDNS answers, unicast-response in questions
+CLASS_FLAG = 0x8000
+
+FLAG_RESPONSE = 0x8000
+FLAG_RECURSION_DESIRED = 0x0100
+
+_HEADER = struct.Struct("!HHHHHH")
+_QUESTION = struct.Struct("!HH")
+_RECORD = struct.Struct("!HHIH")
+_SRV = struct.Struct("!HHH")
+
+# Deepest chain of compression pointers followed before giving up
+_MAX_POINTERS = 32
+
+
+class DnsRecord(NamedTuple):
+    """A resource record from the answer, authority or additional section."""
+
+    name: str  # Without the trailing dot, case as received
+    rtype: int
+    ttl: int
+    # Address for A/AAAA, name for PTR, (target, port) for SRV,
+    # list of strings for TXT, raw bytes otherwise
+    data: Union[str, Tuple[str, int], List[str], bytes]
+
+
+class DnsMessage(NamedTuple):
+    """A decoded DNS message."""
+
+    txid: int
+    flags: int
+    questions: List[Tuple[str, int]]
+    records: List[DnsRecord]
+
+    @property
+    def is_response(self) -> bool:
+        return bool(self.flags & FLAG_RESPONSE)
+
+    @property
+    def rcode(self) -> int:
+        return self.flags & 0x000F
+
+
+def encode_name(name: str) -> bytes:
+    """
+    Encode a domain name as a sequence of length-prefixed labels.
+
+    Raises:
+        ValueError: If a label is empty or longer than 63 bytes
+    """
+    encoded = bytearray()
+    for label in name.rstrip(".").split("."):
+        raw = label.encode("utf-8")
+        if not raw or len(raw) > 63:
+            raise ValueError(f"Invalid DNS label in {name!r}")
+        encoded.append(len(raw))
+        encoded += raw
+    encoded.append(0)
+    return bytes(encoded)
+
+
+def encode_query(
+    questions: List[Tuple[str, int]],
+    txid: int = 0,
+    flags: int = 0,
+    unicast_response: bool = False,
+) -> bytes:
+    """
+    Build a query message.
+
+    Args:
+        questions: (name, record type) pairs
+        txid: Transaction id (zero for multicast DNS)
+        flags: Header flags, e.g. FLAG_RECURSION_DESIRED
+        unicast_response: Set the mDNS unicast-response bit on every question
+
+    Returns:
+        Encoded message
+    """
+    qclass = CLASS_IN | (CLASS_FLAG if unicast_response else 0)
+    parts = [_HEADER.pack(txid, flags, len(questions), 0, 0, 0)]
+    for name, rtype in questions:
+        parts.append(encode_name(name))
+        parts.append(_QUESTION.pack(rtype, qclass))
+    return b"".join(parts)
+
+
+def reverse_name(ip: str) -> str:
+    """Return the in-addr.arpa / ip6.arpa name of an address."""
+    if ":" in ip:
+        nibbles = socket.inet_pton(socket.AF_INET6, ip).hex()
+        return ".".join(reversed(nibbles)) + ".ip6.arpa"
+    return ".".join(reversed(ip.split("."))) + ".in-addr.arpa"
+
+
+def _decode_name(data: bytes, offset: int) -> Tuple[str, int]:
+    """Decode a possibly compressed name, returning (name, offset after it)."""
+    labels = []
+    end = None
+    jumps = 0
+    while True:
+        if offset >= len(data):
+            raise ValueError("Truncated name")
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            if offset + 1 >= len(data):
+                raise ValueError("Truncated pointer")
+            if end is None:
+                end = offset + 2
+            jumps += 1
+            if jumps > _MAX_POINTERS:
+                raise ValueError("Compression loop")
+            offset = ((length & 0x3F) << 8) | data[offset + 1]
+            continue
+        if length & 0xC0:
+            raise ValueError("Unsupported label type")
+        offset += 1
+        if length == 0:
+            break
+        labels.append(data[offset : offset + length].decode("utf-8", "replace"))
+        offset += length
+    return ".".join(labels), end if end is not None else offset
+
+
+def _decode_rdata(data: bytes, offset: int, rtype: int, length: int):
+    """Decode the data of a record whose rdata starts at offset."""
+    rdata = data[offset : offset + length]
+    if rtype == TYPE_A and length == 4:
+        return socket.inet_ntop(socket.AF_INET, rdata)
+    if rtype == TYPE_AAAA and length == 16:
+        return socket.inet_ntop(socket.AF_INET6, rdata)
+    if rtype == TYPE_PTR:
+        return _decode_name(data, offset)[0]
+    if rtype == TYPE_SRV and length > _SRV.size:
+        _priority, _weight, port = _SRV.unpack_from(data, offset)
+        return _decode_name(data, offset + _SRV.size)[0], port
+    if rtype == TYPE_TXT:
+        strings = []
+        position = 0
+        while position < len(rdata):
+            size = rdata[position]
+            strings.append(
+                rdata[position + 1 : position + 1 + size].decode("utf-8", "replace")
+            )
+            position += 1 + size
+        return strings
+    return rdata
+
+
+def decode_message(data: bytes) -> Optional[DnsMessage]:
+    """
+    Decode a DNS message.
+
+    Records that cannot be parsed end the decoding; everything read up to
+    that point is kept.
+
+    Returns:
+        Decoded message, or None if the header or questions are malformed
+    """
+    if len(data) < _HEADER.size:
+        return None
+    txid, flags, qdcount, ancount, nscount, arcount = _HEADER.unpack_from(data)
+    offset = _HEADER.size
+
+    questions = []
+    try:
+        for _ in range(qdcount):
+            name, offset = _decode_name(data, offset)
+            rtype, _qclass = _QUESTION.unpack_from(data, offset)
+            offset += _QUESTION.size
+            questions.append((name, rtype))
+    except (ValueError, struct.error):
+        return None
+
+    records = []
+    try:
+        for _ in range(ancount + nscount + arcount):
+            name, offset = _decode_name(data, offset)
+            rtype, _rclass, ttl, length = _RECORD.unpack_from(data, offset)
+            offset += _RECORD.size
+            if offset + length > len(data):
+                break
+            records.append(
+                DnsRecord(name, rtype, ttl, _decode_rdata(data, offset, rtype, length))
+            )
+            offset += length
+    except (ValueError, struct.error, OSError):
+        pass
+
+    return DnsMessage(txid, flags, questions, records)
@@ -0,0 +1,337 @@
+"""
+Batched asynchronous reverse DNS resolver.
+Sends PTR queries for many addresses over one UDP socket, without the
+libc resolver or any process-wide socket timeout.
+"""
+
+import logging
+import secrets
+import select
+import socket
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .dns_message import (
+    FLAG_RECURSION_DESIRED,
+    TYPE_PTR,
+    decode_message,
+    encode_query,
+    reverse_name,
+)
+
+logger = logging.getLogger(__name__)
+
+RESOLV_CONF = "/etc/resolv.conf"
+DNS_PORT = 53
+
+RCODE_NOERROR = 0
+RCODE_NXDOMAIN = 3
+
+# Seconds between checks for newly queued queries
+_POLL_INTERVAL = 0.05
+
+
+def read_nameservers(path: str = RESOLV_CONF) -> List[str]:
+    """
+    Read the nameserver addresses from a resolv.conf file.
+
+    Args:
+        path: Path of the resolver configuration
+
+    Returns:
+        Nameserver addresses in file order (possibly empty)
+    """
+    servers: List[str] = []
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) < 2 or parts[0] != "nameserver":
+                    continue
+                # Drop IPv6 zone ids (fe80::1%eth0)
+                address = parts[1].split("%", 1)[0]
+                try:
+                    socket.inet_pton(
+                        socket.AF_INET6 if ":" in address else socket.AF_INET, address
+                    )
+                except OSError:
+                    continue
+                if address not in servers:
+                    servers.append(address)
+    except OSError as e:
+        logger.debug("Cannot read %s: %s", path, e)
+    return servers
+
+
+class _PendingQuery:
+    """State of one outstanding PTR query."""
+
+    __slots__ = ("ip", "name", "txid", "deadline", "next_send", "retry", "sent")
+
+    def __init__(self, ip: str, name: str, txid: int, deadline: float, retry: float):
+        self.ip = ip
+        self.name = name
+        self.txid = txid
+        self.deadline = deadline
+        self.next_send = 0.0
+        self.retry = retry
+        self.sent = 0
+
+
+class ReverseDnsResolver:
+    """
+    PTR lookups for many addresses multiplexed over one UDP socket.
+
+    Every queued address gets its own deadline. Queries are matched to
+    answers by transaction id, source address and question name, and
+    retransmitted with exponential backoff, rotating through the
+    configured nameservers.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 0.5,
+        nameservers: Optional[List[str]] = None,
+        port: int = DNS_PORT,
+        on_update: Optional[Callable[[], None]] = None,
+    ):
+        """
+        Initialize the resolver.
+
+        Args:
+            timeout: Seconds each address may take to resolve
+            nameservers: Servers to ask (default: read from /etc/resolv.conf)
+            port: Destination port of the nameservers
+            on_update: Optional callable invoked (without locks held) whenever
+                new answers arrive or lookups time out
+        """
+        self.timeout = max(0.05, timeout)
+        self.nameservers = (
+            nameservers if nameservers is not None else read_nameservers()
+        )
+        self.port = port
+        self.on_update = on_update
+        # First retransmission; doubles on every further attempt
+        self.initial_retry = min(0.25, self.timeout / 3)
+
+        self._socks: Dict[int, socket.socket] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._condition = threading.Condition()
+        self._pending: Dict[int, _PendingQuery] = {}  # txid -> query
+        self._queried: Dict[str, _PendingQuery] = {}  # ip -> query
+        self._results: Dict[str, Optional[str]] = {}  # ip -> name (None: no name)
+
+    def __enter__(self) -> "ReverseDnsResolver":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def start(self) -> bool:
+        """
+        Open the sockets and start the query loop.
+
+        Returns:
+            True if the resolver is running, False if there is no usable
+            nameserver
+        """
+        if self._thread is not None:
+            return True
+        for server in self.nameservers:
+            family = socket.AF_INET6 if ":" in server else socket.AF_INET
+            if family in self._socks:
+                continue
+            try:
+                sock = socket.socket(family, socket.SOCK_DGRAM)
+                sock.setblocking(False)
+                self._socks[family] = sock
+            except OSError as e:
+                logger.debug("Cannot open DNS socket: %s", e)
+
+        self.nameservers = [
+            server
+            for server in self.nameservers
+            if (socket.AF_INET6 if ":" in server else socket.AF_INET) in self._socks
+        ]
+        if not self.nameservers:
+            self._closed = True
+            return False
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return True
+
+    def close(self) -> None:
+        """Stop the resolver; unanswered lookups return None."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        for sock in self._socks.values():
+            sock.close()
+        self._socks.clear()
+
+    def query(self, ips: Iterable[str]) -> None:
+        """Queue PTR queries; they go out in the next batch."""
+        with self._condition:
+            now = time.monotonic()
+            for ip in ips:
+                if ip in self._queried or ip in self._results:
+                    continue
+                try:
+                    name = reverse_name(ip)
+                except (OSError, ValueError):
+                    self._results[ip] = None
+                    continue
+                if len(self._pending) >= 0xFFFF:
+                    self._results[ip] = None
+                    continue
+                txid = secrets.randbelow(0x10000)
+                while txid in self._pending:
+                    txid = secrets.randbelow(0x10000)
+                query = _PendingQuery(
+                    ip, name, txid, now + self.timeout, self.initial_retry
+                )
+                self._pending[txid] = query
+                self._queried[ip] = query
+
+    def lookup(self, ip: str, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Return the PTR name of an address, waiting for the answer if needed.
+
+        Args:
+            ip: Address to look up (queried if it has not been yet)
+            timeout: Maximum seconds to wait (default: the query's deadline)
+
+        Returns:
+            Hostname without the trailing dot, or None
+        """
+        self.query([ip])
+        with self._condition:
+            query = self._queried.get(ip)
+            deadline = query.deadline if query else 0.0
+            if timeout is not None:
+                deadline = min(deadline, time.monotonic() + timeout)
+            while ip not in self._results and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            return self._results.get(ip)
+
+    def resolve(self, ips: Iterable[str]) -> Dict[str, Optional[str]]:
+        """
+        Resolve a batch of addresses.
+
+        Args:
+            ips: Addresses to resolve
+
+        Returns:
+            Dictionary mapping every address to its name or None
+        """
+        ips = list(ips)
+        self.query(ips)
+        return {ip: self.lookup(ip) for ip in ips}
+
+    def _run(self) -> None:
+        """Send due queries, expire late ones and read answers until closed."""
+        while True:
+            with self._condition:
+                if self._closed:
+                    return
+                now = time.monotonic()
+                wake = now + _POLL_INTERVAL
+                expired = False
+                for txid, query in list(self._pending.items()):
+                    if now >= query.deadline:
+                        del self._pending[txid]
+                        self._results.setdefault(query.ip, None)
+                        expired = True
+                        continue
+                    if now >= query.next_send:
+                        self._send(query, now)
+                    wake = min(wake, query.next_send, query.deadline)
+                if expired:
+                    self._condition.notify_all()
+
+            wait = max(0.0, wake - time.monotonic())
+            try:
+                readable, _w, _x = select.select(list(self._socks.values()), [], [], wait)
+            except (OSError, ValueError):
+                return
+            updated = expired
+            for sock in readable:
+                updated = self._drain(sock) or updated
+            if updated and self.on_update:
+                self.on_update()
+
+    def _send(self, query: _PendingQuery, now: float) -> None:
+        """Transmit a query to the next nameserver; caller holds the lock."""
+        server = self.nameservers[query.sent % len(self.nameservers)]
+        sock = self._socks[socket.AF_INET6 if ":" in server else socket.AF_INET]
+        packet = encode_query(
+            [(query.name, TYPE_PTR)], txid=query.txid, flags=FLAG_RECURSION_DESIRED
+        )
+        try:
+            sock.sendto(packet, (server, self.port))
+        except (BlockingIOError, InterruptedError):
+            query.next_send = now + _POLL_INTERVAL
+            return
+        except OSError as e:
+            logger.debug("PTR query for %s to %s failed: %s", query.ip, server, e)
+        query.sent += 1
+        query.next_send = now + query.retry
+        query.retry *= 2
+
+    def _drain(self, sock: socket.socket) -> bool:
+        """
+        Read every queued answer and record the ones matching a query.
+
+        Returns:
+            True if any query was answered
+        """
+        updated = False
+        while True:
+            try:
+                data, addr = sock.recvfrom(4096)
+            except (BlockingIOError, InterruptedError):
+                return updated
+            except OSError:
+                return updated
+
+            message = decode_message(data)
+            if message is None or not message.is_response:
+                continue
+            with self._condition:
+                query = self._pending.get(message.txid)
+                if (
+                    query is None
+                    or addr[0] not in self.nameservers
+                    or not message.questions
+                    or message.questions[0][0].lower() != query.name.lower()
+                ):
+                    continue
+
+                if message.rcode == RCODE_NOERROR:
+                    names = [
+                        record.data
+                        for record in message.records
+                        if record.rtype == TYPE_PTR
+                        and record.name.lower() == query.name.lower()
+                    ]
+                    self._results[query.ip] = names[0] if names else None
+                elif message.rcode == RCODE_NXDOMAIN:
+                    self._results[query.ip] = None
+                else:
+                    # SERVFAIL, REFUSED, ...: move on to the next server now
+                    query.next_send = 0.0
+                    continue
+
+                del self._pending[message.txid]
+                self._condition.notify_all()
+            updated = True
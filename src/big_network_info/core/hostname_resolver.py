@@ -0,0 +1,488 @@
+"""
+Hostname resolver orchestrator.
+Races every hostname source for the whole host set under one deadline,
+ranks the answers by confidence and keeps per-source statistics.
+"""
+
+import functools
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from .dns_resolver import ReverseDnsResolver
+from .local_names import LocalNameIndex
+from .mdns import MdnsSession
+from .netbios import NetbiosName, NetbiosResolver
+
+logger = logging.getLogger(__name__)
+
+# Confidence of each source's answers; higher wins when several are available
+CONFIDENCE_LOCAL = 100
+CONFIDENCE_MDNS = 80
+CONFIDENCE_DNS = 70
+CONFIDENCE_NETBIOS = 60
+# Names that merely spell out the address ("192-168-1-5.isp.example")
+CONFIDENCE_GENERIC = 10
+
+# Answers at or above this confidence are taken as soon as they arrive;
+# weaker ones are only used if nothing better shows up before the deadline
+GOOD_CONFIDENCE = 50
+
+
+class NameAnswer(NamedTuple):
+    """The name chosen for a host and where it came from."""
+
+    name: str
+    source: str
+    confidence: int
+
+
+@dataclass
+class SourceStats:
+    """How useful a hostname source has been during a resolver's lifetime."""
+
+    queries: int = 0  # Hosts the source was asked about
+    hits: int = 0  # Hosts it answered before their deadline
+    wins: int = 0  # Hosts whose chosen name came from it
+    total_latency: float = 0.0  # Seconds from query to answer, summed over hits
+    disabled: bool = False
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.queries if self.queries else 0.0
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.queries if self.queries else 0.0
+
+    @property
+    def mean_latency(self) -> float:
+        return self.total_latency / self.hits if self.hits else 0.0
+
+
+class NameSource:
+    """A hostname source raced against the others by HostnameResolver."""
+
+    name = ""
+    confidence = 0
+    # Local sources cost nothing and are never turned off
+    is_network = True
+
+    def start(self, on_update: Callable[[], None]) -> bool:
+        """Prepare the source; on_update must be called when answers arrive."""
+        return True
+
+    def query(self, ips: List[str]) -> None:
+        """Start looking up the given addresses."""
+
+    def peek(self, ip: str) -> Optional[str]:
+        """Return the name found for an address so far, without waiting."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release the source's sockets and threads."""
+
+
+class MdnsNameSource(NameSource):
+    """Multicast DNS names of local devices."""
+
+    name = "mdns"
+    confidence = CONFIDENCE_MDNS
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.session: Optional[MdnsSession] = None
+
+    def start(self, on_update: Callable[[], None]) -> bool:
+        self.session = MdnsSession(window=self.timeout, on_update=on_update)
+        return self.session.start()
+
+    def query(self, ips: List[str]) -> None:
+        self.session.query(ips)
+
+    def peek(self, ip: str) -> Optional[str]:
+        hostname = self.session.lookup(ip, timeout=0)
+        if hostname and hostname.endswith(".local"):
+            clean_hostname = hostname[:-6]
+            # Prefer the clean name if it's descriptive
+            if (
+                len(clean_hostname) > 4
+                and not clean_hostname.replace("-", "").replace("_", "").isdigit()
+            ):
+                return clean_hostname
+        return hostname
+
+    def close(self) -> None:
+        if self.session:
+            self.session.close()
+
+
+class DnsNameSource(NameSource):
+    """PTR records from the system's nameservers."""
+
+    name = "dns"
+    confidence = CONFIDENCE_DNS
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.resolver: Optional[ReverseDnsResolver] = None
+
+    def start(self, on_update: Callable[[], None]) -> bool:
+        self.resolver = ReverseDnsResolver(timeout=self.timeout, on_update=on_update)
+        return self.resolver.start()
+
+    def query(self, ips: List[str]) -> None:
+        self.resolver.query(ips)
+
+    def peek(self, ip: str) -> Optional[str]:
+        return self.resolver.lookup(ip, timeout=0)
+
+    def close(self) -> None:
+        if self.resolver:
+            self.resolver.close()
+
+
+class NetbiosNameSource(NameSource):
+    """Names Windows and Samba hosts report over NetBIOS and LLMNR."""
+
+    name = "netbios"
+    confidence = CONFIDENCE_NETBIOS
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.resolver: Optional[NetbiosResolver] = None
+
+    def start(self, on_update: Callable[[], None]) -> bool:
+        self.resolver = NetbiosResolver(timeout=self.timeout, on_update=on_update)
+        return self.resolver.start()
+
+    def query(self, ips: List[str]) -> None:
+        self.resolver.query(ips)
+
+    def info(self, ip: str) -> Optional[NetbiosName]:
+        """Return the full NetBIOS reply (name, workgroup, MAC) seen so far."""
+        return self.resolver.lookup(ip, timeout=0)
+
+    def peek(self, ip: str) -> Optional[str]:
+        info = self.info(ip)
+        return info.name if info and info.name else None
+
+    def close(self) -> None:
+        if self.resolver:
+            self.resolver.close()
+
+
+def is_generic_name(ip: str, name: str) -> bool:
+    """Check whether a name just spells out the address (e.g. 10-0-0-5.isp.net)."""
+    octets = ip.split(".")
+    if len(octets) != 4:
+        return False
+    numbers = re.findall(r"\d+", name)
+    for sequence in (octets, octets[::-1]):
+        for start in range(len(numbers) - 3):
+            if numbers[start : start + 4] == sequence:
+                return True
+    return False
+
+
+class HostnameResolver:
+    """
+    Races all hostname sources for a set of hosts.
+
+    Hosts named by local files (hosts, ethers, DHCP leases) are answered
+    from the local index without any network traffic. Every other host
+    is sent to all sources at once; its lookup ends with the first good
+    answer (the highest-confidence one if several are available) or at
+    its deadline, measured from when it was queued. Network sources
+    that (almost) never answer, or answer so slowly that lookups keep
+    waiting for them, leave the race after enough samples, so they stop
+    costing packets; they keep running for direct queries (see
+    get_source).
+    """
+
+    def __init__(
+        self,
+        timeout: float,
+        sources: List[NameSource],
+        local_names: Optional[LocalNameIndex] = None,
+        min_samples: int = 32,
+        min_hit_rate: float = 0.02,
+        max_latency: Optional[float] = None,
+    ):
+        """
+        Initialize the resolver.
+
+        Args:
+            timeout: Seconds each host's lookup may take across all sources
+            sources: Network hostname sources to race
+            local_names: Index of locally known names, consulted first
+            min_samples: Hosts a network source is asked about before it
+                may be turned off
+            min_hit_rate: Share of hosts a network source must answer to
+                stay on
+            max_latency: Mean seconds a network source may take to answer
+                and stay on (default: three quarters of the timeout)
+        """
+        self.timeout = max(0.05, timeout)
+        self.local_names = local_names
+        self.min_samples = min_samples
+        self.min_hit_rate = min_hit_rate
+        self.max_latency = (
+            max_latency if max_latency is not None else 0.75 * self.timeout
+        )
+        self._sources: List[NameSource] = list(sources)
+        # Sources that started, including those turned off for the race
+        self._running: Dict[str, NameSource] = {}
+        self._stats: Dict[str, SourceStats] = {
+            source.name: SourceStats() for source in sources
+        }
+        self._stats["local"] = SourceStats()
+        self._condition = threading.Condition()
+        self._closed = False
+        # ip -> (time queued, sources asked)
+        self._queried: Dict[str, Tuple[float, Tuple[NameSource, ...]]] = {}
+        # ip -> {source name: (name, seconds until it arrived)}
+        self._seen: Dict[str, Dict[str, Tuple[str, float]]] = {}
+        # source name -> unfinished hosts it has not answered yet
+        self._waiting: Dict[str, Set[str]] = {
+            source.name: set() for source in sources
+        }
+        self._finished: Dict[str, Optional[NameAnswer]] = {}
+
+    def __enter__(self) -> "HostnameResolver":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def start(self) -> None:
+        """Start every source; those that cannot start are left out."""
+        for source in self._sources:
+            try:
+                started = source.start(functools.partial(self._on_answers, source))
+            except Exception as e:
+                logger.debug("Hostname source %s failed to start: %s", source.name, e)
+                started = False
+            if started:
+                self._running[source.name] = source
+            else:
+                self._stats[source.name].disabled = True
+
+    def close(self) -> None:
+        """Stop every source; pending lookups return what is known."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        for source in self._sources:
+            try:
+                source.close()
+            except Exception as e:
+                logger.debug("Hostname source %s failed to close: %s", source.name, e)
+        for name, stats in self._stats.items():
+            if stats.queries:
+                logger.debug(
+                    "Hostname source %s: %d/%d hits, %d wins, %.0f ms mean latency%s",
+                    name,
+                    stats.hits,
+                    stats.queries,
+                    stats.wins,
+                    stats.mean_latency * 1000,
+                    " (disabled)" if stats.disabled else "",
+                )
+
+    def get_source(self, name: str) -> Optional[NameSource]:
+        """
+        Return the running source with the given name.
+
+        A source turned off for the race is still returned: it no longer
+        receives every host, but answers the ones it is asked about
+        directly (e.g. NetBIOS node status for a host's workgroup).
+        """
+        return self._running.get(name)
+
+    def stats(self) -> Dict[str, SourceStats]:
+        """Return a snapshot of the per-source statistics."""
+        with self._condition:
+            return {
+                name: SourceStats(**vars(stats)) for name, stats in self._stats.items()
+            }
+
+    def query(self, ips: Iterable[str], macs: Optional[Dict[str, str]] = None) -> None:
+        """
+        Ask every enabled source about the given hosts.
+
+        Args:
+            ips: Host addresses
+            macs: Known MACs of the hosts, used to look them up locally
+        """
+        macs = macs or {}
+        with self._condition:
+            now = time.monotonic()
+            sources = tuple(
+                source
+                for source in self._sources
+                if not self._stats[source.name].disabled
+            )
+            new_ips = []
+            for ip in ips:
+                if ip in self._queried or ip in self._finished:
+                    continue
+                local = (
+                    self.local_names.lookup(ip, macs.get(ip, ""))
+                    if self.local_names
+                    else None
+                )
+                stats = self._stats["local"]
+                stats.queries += 1
+                if local:
+                    stats.hits += 1
+                    stats.wins += 1
+                    self._finished[ip] = NameAnswer(
+                        local.name, local.origin, CONFIDENCE_LOCAL
+                    )
+                    continue
+                self._queried[ip] = (now, sources)
+                for source in sources:
+                    self._waiting[source.name].add(ip)
+                new_ips.append(ip)
+        if not new_ips:
+            return
+        for source in sources:
+            try:
+                source.query(new_ips)
+            except Exception as e:
+                logger.debug("Hostname source %s query failed: %s", source.name, e)
+
+    def lookup(self, ip: str, mac: str = "") -> Optional[NameAnswer]:
+        """
+        Return the best name for a host, waiting at most until its deadline.
+
+        Args:
+            ip: Host address (queried if it has not been yet)
+            mac: Host MAC, if known
+
+        Returns:
+            NameAnswer, or None if no source knows the host
+        """
+        self.query([ip], {ip: mac} if mac else None)
+        with self._condition:
+            if ip in self._finished:
+                return self._finished[ip]
+            queued_at, sources = self._queried[ip]
+            deadline = queued_at + self.timeout
+            while True:
+                best = self._best_answer_locked(ip, queued_at, sources)
+                remaining = deadline - time.monotonic()
+                if (
+                    (best and best.confidence >= GOOD_CONFIDENCE)
+                    or not sources
+                    or remaining <= 0
+                    or self._closed
+                ):
+                    self._finish_locked(ip, best, queued_at, sources)
+                    return best
+                self._condition.wait(remaining)
+
+    def resolve(self, ips: Iterable[str]) -> Dict[str, Optional[NameAnswer]]:
+        """Resolve a batch of hosts under one deadline."""
+        ips = list(ips)
+        self.query(ips)
+        return {ip: self.lookup(ip) for ip in ips}
+
+    def _on_answers(self, source: NameSource) -> None:
+        """
+        Note the answers a source just received and wake waiting lookups.
+
+        Called by the source when answers arrive, so its latency is measured
+        to the arrival, not to when a (possibly late) lookup asks for them.
+        """
+        with self._condition:
+            now = time.monotonic()
+            waiting = self._waiting[source.name]
+            for ip in list(waiting):
+                self._collect_locked(ip, source, self._queried[ip][0], now)
+            self._condition.notify_all()
+
+    def _collect_locked(
+        self, ip: str, source: NameSource, queued_at: float, now: float
+    ) -> None:
+        """Record a source's answer for a host if it has one; caller holds the lock."""
+        try:
+            name = source.peek(ip)
+        except Exception as e:
+            logger.debug("Hostname source %s failed for %s: %s", source.name, ip, e)
+            return
+        if name and name != ip and not name.startswith(ip):
+            self._seen.setdefault(ip, {})[source.name] = (name, now - queued_at)
+            self._waiting[source.name].discard(ip)
+
+    def _best_answer_locked(
+        self, ip: str, queued_at: float, sources: Tuple[NameSource, ...]
+    ) -> Optional[NameAnswer]:
+        """Collect new answers for a host and rank them; caller holds the lock."""
+        now = time.monotonic()
+        for source in sources:
+            if ip in self._waiting[source.name]:
+                self._collect_locked(ip, source, queued_at, now)
+        seen = self._seen.get(ip, {})
+
+        best = None
+        for source in sources:
+            if source.name not in seen:
+                continue
+            name = seen[source.name][0]
+            confidence = source.confidence
+            if is_generic_name(ip, name):
+                confidence = CONFIDENCE_GENERIC
+            if best is None or confidence > best.confidence:
+                best = NameAnswer(name, source.name, confidence)
+        return best
+
+    def _finish_locked(
+        self,
+        ip: str,
+        answer: Optional[NameAnswer],
+        queued_at: float,
+        sources: Tuple[NameSource, ...],
+    ) -> None:
+        """Record a host's outcome in the statistics; caller holds the lock."""
+        self._finished[ip] = answer
+        seen = self._seen.pop(ip, {})
+        # A lookup that ended early on a good answer says nothing about the
+        # sources that had not answered yet; they only miss a host whose
+        # whole deadline passed
+        expired = time.monotonic() >= queued_at + self.timeout
+        for source in sources:
+            self._waiting[source.name].discard(ip)
+            stats = self._stats[source.name]
+            if source.name not in seen and not expired:
+                continue
+            stats.queries += 1
+            if source.name in seen:
+                stats.hits += 1
+                stats.total_latency += seen[source.name][1]
+            if answer and answer.source == source.name:
+                stats.wins += 1
+
+            if (
+                source.is_network
+                and not stats.disabled
+                and stats.queries >= self.min_samples
+                and (
+                    stats.hit_rate < self.min_hit_rate
+                    or stats.mean_latency > self.max_latency
+                )
+            ):
+                stats.disabled = True
+                logger.info(
+                    "Hostname source %s turned off: answered %d of %d hosts "
+                    "(%.0f ms mean latency)",
+                    source.name,
+                    stats.hits,
+                    stats.queries,
+                    stats.mean_latency * 1000,
+                )
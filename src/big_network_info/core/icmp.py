@@ -0,0 +1,259 @@
+"""
+In-process ICMP echo engine.
+Sweeps many hosts from a single socket instead of forking one ping process per address.
+"""
+
+import logging
+import select
+import socket
+import struct
+import time
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from .rate_control import RateController
+
+logger = logging.getLogger(__name__)
+
+ICMP_ECHO_REPLY = 0
+ICMP_ECHO_REQUEST = 8
+
+# Payload carried by every echo request: target address + sequence marker
+_PAYLOAD = struct.Struct("!4sH")
+_HEADER = struct.Struct("!BBHHH")
+
+
+def _checksum(data: bytes) -> int:
+    """Compute the RFC 1071 internet checksum."""
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def _open_icmp_socket() -> tuple[Optional[socket.socket], bool]:
+    """
+    Open an ICMP socket, preferring the unprivileged datagram flavour.
+
+    Returns:
+        Tuple of (socket or None, True if the socket is raw)
+    """
+    try:
+        # Allowed for unprivileged users via net.ipv4.ping_group_range
+        return socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP), False
+    except OSError:
+        pass
+    try:
+        # Only possible with CAP_NET_RAW
+        return socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP), True
+    except OSError:
+        return None, False
+
+
+class IcmpPinger:
+    """ICMP echo sweeper that paces requests and matches replies by id/sequence."""
+
+    def __init__(
+        self,
+        timeout: float = 1.0,
+        attempts: int = 1,
+        rate: int = 2000,
+        stop_check: Optional[Callable[[], bool]] = None,
+        rate_control: Optional[RateController] = None,
+    ):
+        """
+        Initialize the pinger.
+
+        Args:
+            timeout: Seconds to wait for a reply before retrying or giving up
+            attempts: Echo requests sent per host before it is considered down
+            rate: Maximum echo requests per second
+            stop_check: Optional callable returning True when the sweep should abort
+            rate_control: Optional rate controller shared with other scan
+                stages; when given, it paces the requests instead of rate
+        """
+        self.timeout = max(0.05, timeout)
+        self.attempts = max(1, attempts)
+        self.rate = max(1, rate)
+        self.stop_check = stop_check
+        self.rate_control = rate_control
+
+    @staticmethod
+    def is_supported() -> bool:
+        """Check whether the kernel lets this process open an ICMP socket."""
+        sock, _raw = _open_icmp_socket()
+        if sock is None:
+            return False
+        sock.close()
+        return True
+
+    def iter_sweep(self, ips: Iterable[str]) -> Iterator[Tuple[str, float]]:
+        """
+        Send echo requests to every address and yield replies as they arrive.
+
+        Only the in-flight requests are held in memory, so arbitrarily large
+        address iterators can be swept.
+
+        Args:
+            ips: Addresses to probe (consumed lazily)
+
+        Yields:
+            Tuples of (ip, rtt_ms) for every responding host
+
+        Raises:
+            OSError: If no ICMP socket can be opened
+        """
+        sock, is_raw = _open_icmp_socket()
+        if sock is None:
+            raise OSError("ICMP sockets are not permitted for this process")
+
+        # sequence -> [ip, packed ip, send time, attempts used]
+        pending: Dict[int, list] = {}
+        retry_queue: list = []
+        ident = 0
+        sequence = 0
+        interval = 1.0 / self.rate
+        next_send = time.monotonic()
+        rate_control = self.rate_control
+        source = iter(ips)
+        exhausted = False
+
+        try:
+            sock.setblocking(False)
+            if is_raw:
+                ident = (id(self) ^ int(time.time())) & 0xFFFF
+            else:
+                # The kernel rewrites the identifier to the socket's local port
+                sock.bind(("", 0))
+                ident = sock.getsockname()[1]
+
+            while True:
+                if self.stop_check and self.stop_check():
+                    break
+
+                now = time.monotonic()
+                # Do not let an idle period turn into a burst
+                next_send = max(next_send, now - interval)
+
+                # Expire unanswered requests, queueing retries when attempts remain.
+                # Pending entries are kept in send order, so the scan stops early.
+                expired = []
+                for seq, entry in pending.items():
+                    if now - entry[2] < self.timeout:
+                        break
+                    expired.append(seq)
+                for seq in expired:
+                    entry = pending.pop(seq)
+                    if entry[3] < self.attempts:
+                        retry_queue.append(entry)
+
+                # Send as many requests as the pacing budget allows; a send
+                # slot is only taken once there is a valid target
+                while len(pending) < 0xFFFF:
+                    if retry_queue:
+                        entry = retry_queue.pop()
+                    elif not exhausted:
+                        try:
+                            ip = next(source)
+                        except StopIteration:
+                            exhausted = True
+                            continue
+                        try:
+                            entry = [ip, socket.inet_aton(ip), 0.0, 0]
+                        except OSError:
+                            continue
+                    else:
+                        break
+                    if not (
+                        rate_control.try_take() if rate_control else now >= next_send
+                    ):
+                        retry_queue.append(entry)
+                        break
+
+                    sequence = (sequence + 1) & 0xFFFF
+                    payload = _PAYLOAD.pack(entry[1], sequence)
+                    header = _HEADER.pack(ICMP_ECHO_REQUEST, 0, 0, ident, sequence)
+                    checksum = _checksum(header + payload)
+                    packet = (
+                        _HEADER.pack(ICMP_ECHO_REQUEST, 0, checksum, ident, sequence)
+                        + payload
+                    )
+                    try:
+                        sock.sendto(packet, (entry[0], 0))
+                    except BlockingIOError:
+                        retry_queue.append(entry)
+                        if rate_control:
+                            rate_control.on_loss()
+                        break
+                    except OSError as e:
+                        # Unreachable networks or invalid targets
+                        logger.debug("ICMP send to %s failed: %s", entry[0], e)
+                        next_send += interval
+                        continue
+                    entry[2] = time.monotonic()
+                    entry[3] += 1
+                    pending[sequence] = entry
+                    next_send += interval
+
+                if exhausted and not pending and not retry_queue:
+                    break
+
+                # Wait for replies until the next send slot or the oldest expiry
+                if pending:
+                    oldest = next(iter(pending.values()))[2]
+                    wait = oldest + self.timeout - time.monotonic()
+                else:
+                    wait = self.timeout
+                if not exhausted or retry_queue:
+                    if rate_control:
+                        wait = min(wait, rate_control.wait_time())
+                    else:
+                        wait = min(wait, next_send - time.monotonic())
+                wait = max(0.0, min(wait, 0.1))
+
+                readable, _w, _x = select.select([sock], [], [], wait)
+                if readable:
+                    yield from self._drain(sock, is_raw, ident, pending)
+
+        finally:
+            sock.close()
+
+    def _drain(
+        self,
+        sock: socket.socket,
+        is_raw: bool,
+        ident: int,
+        pending: Dict[int, list],
+    ) -> Iterator[Tuple[str, float]]:
+        """Read every queued reply and match it against outstanding requests."""
+        while True:
+            try:
+                data, addr = sock.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+
+            received = time.monotonic()
+            if is_raw:
+                # Raw sockets deliver the IP header as well
+                data = data[(data[0] & 0x0F) * 4 :]
+            if len(data) < _HEADER.size + _PAYLOAD.size:
+                continue
+
+            icmp_type, _code, _csum, reply_id, seq = _HEADER.unpack_from(data)
+            if icmp_type != ICMP_ECHO_REPLY:
+                continue
+            if is_raw and reply_id != ident:
+                continue
+
+            entry = pending.get(seq)
+            packed_ip, _seq = _PAYLOAD.unpack_from(data, _HEADER.size)
+            if entry is None or entry[1] != packed_ip or addr[0] != entry[0]:
+                continue
+
+            # Late replies to an expired sequence are ignored above, so every
+            # host is reported at most once
+            del pending[seq]
+            yield entry[0], (received - entry[2]) * 1000.0
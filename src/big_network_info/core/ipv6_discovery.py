@@ -0,0 +1,154 @@
+"""
+IPv6 neighbor discovery on the local link.
+One ICMPv6 echo request to the all-nodes group ff02::1 is answered by
+nearly every IPv6 host on the segment at once; the kernel learns their
+MACs while they answer, and the neighbor table (read over netlink)
+supplies them together with any other IPv6 neighbors already known.
+"""
+
+import ipaddress
+import logging
+import os
+import select
+import socket
+import struct
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from ..utils.network import scoped_address
+from .neighbors import read_neighbor_table
+
+logger = logging.getLogger(__name__)
+
+ALL_NODES = "ff02::1"
+ICMPV6_ECHO_REQUEST = 128
+ICMPV6_ECHO_REPLY = 129
+
+_ECHO_HEADER = struct.Struct("!BBHHH")
+
+
+class Ipv6Neighbor(NamedTuple):
+    """An IPv6 address seen on the local link."""
+
+    ip: str  # Link-local addresses carry their zone, e.g. fe80::1%eth0
+    mac: str  # Lowercase, colon-separated; empty if not resolved
+    rtt: float  # Echo reply time in milliseconds, 0.0 if it did not answer
+
+
+def _open_icmpv6_socket() -> tuple[Optional[socket.socket], bool]:
+    """
+    Open an ICMPv6 socket, preferring the unprivileged datagram flavour.
+
+    Returns:
+        Tuple of (socket or None, True if the socket is raw)
+    """
+    try:
+        # Allowed for unprivileged users via net.ipv4.ping_group_range
+        return (
+            socket.socket(socket.AF_INET6, socket.SOCK_DGRAM, socket.IPPROTO_ICMPV6),
+            False,
+        )
+    except OSError:
+        pass
+    try:
+        # Only possible with CAP_NET_RAW
+        return (
+            socket.socket(socket.AF_INET6, socket.SOCK_RAW, socket.IPPROTO_ICMPV6),
+            True,
+        )
+    except OSError:
+        return None, False
+
+
+def _echo_all_nodes(
+    interface: str, timeout: float, stop_check: Optional[Callable[[], bool]]
+) -> Dict[str, float]:
+    """Ping ff02::1 on an interface; return address -> reply time (ms)."""
+    sock, is_raw = _open_icmpv6_socket()
+    if sock is None:
+        logger.debug("No ICMPv6 socket available; skipping multicast echo")
+        return {}
+
+    replies: Dict[str, float] = {}
+    try:
+        index = socket.if_nametoindex(interface)
+        sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_MULTICAST_IF, index)
+        # This machine's own answer is not wanted
+        sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_MULTICAST_LOOP, 0)
+        sock.setblocking(False)
+        # Datagram sockets replace the identifier with their own
+        identifier = os.getpid() & 0xFFFF
+        request = _ECHO_HEADER.pack(ICMPV6_ECHO_REQUEST, 0, 0, identifier, 1)
+        started = time.monotonic()
+        # The kernel fills in the ICMPv6 checksum on both socket types
+        sock.sendto(request, (ALL_NODES, 0, 0, index))
+
+        deadline = started + timeout
+        while not (stop_check and stop_check()):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            readable, _w, _x = select.select([sock], [], [], min(remaining, 0.1))
+            if not readable:
+                continue
+            while True:
+                try:
+                    packet, address = sock.recvfrom(1500)
+                except OSError:
+                    break
+                if len(packet) < _ECHO_HEADER.size:
+                    continue
+                kind, _code, _checksum, reply_id, _seq = _ECHO_HEADER.unpack_from(
+                    packet
+                )
+                if kind != ICMPV6_ECHO_REPLY:
+                    continue
+                if is_raw and reply_id != identifier:
+                    continue
+                ip = scoped_address(address[0], interface)
+                replies.setdefault(ip, (time.monotonic() - started) * 1000.0)
+    except OSError as e:
+        logger.debug("ICMPv6 multicast echo on %s failed: %s", interface, e)
+    finally:
+        sock.close()
+    return replies
+
+
+def discover_ipv6_neighbors(
+    interface: str,
+    timeout: float = 0.5,
+    stop_check: Optional[Callable[[], bool]] = None,
+) -> List[Ipv6Neighbor]:
+    """
+    Find the IPv6 hosts on a link with one multicast echo.
+
+    Args:
+        interface: Interface name of the link
+        timeout: Seconds to collect echo replies
+        stop_check: Optional callable returning True to stop waiting
+
+    Returns:
+        Every address that answered the echo or has a resolved entry in
+        the IPv6 neighbor table of the interface
+    """
+    replies = _echo_all_nodes(interface, timeout, stop_check)
+
+    macs: Dict[str, str] = {}
+    for entry in read_neighbor_table(socket.AF_INET6):
+        if entry.interface != interface or not entry.is_resolved:
+            continue
+        address = entry.ip.split("%", 1)[0]
+        try:
+            if ipaddress.IPv6Address(address).is_multicast:
+                continue
+        except ValueError:
+            continue
+        macs[scoped_address(address, interface)] = entry.mac
+
+    neighbors = [
+        Ipv6Neighbor(ip, macs.get(ip, ""), rtt) for ip, rtt in replies.items()
+    ]
+    neighbors.extend(
+        Ipv6Neighbor(ip, mac, 0.0) for ip, mac in macs.items() if ip not in replies
+    )
+    return neighbors
@@ -0,0 +1,287 @@
+"""
+Host names the local machine already knows.
+Indexes /etc/hosts, /etc/ethers and the lease files of DHCP servers
+running here by IP and MAC, so those hosts are named without any
+network traffic.
+"""
+
+import glob
+import logging
+import os
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+HOSTS_FILE = "/etc/hosts"
+ETHERS_FILE = "/etc/ethers"
+
+# dnsmasq lease files: standalone dnsmasq and NetworkManager's shared connections
+DNSMASQ_LEASE_PATTERNS = [
+    "/var/lib/misc/dnsmasq.leases",
+    "/var/lib/dnsmasq/dnsmasq.leases",
+    "/var/lib/NetworkManager/dnsmasq-*.leases",
+]
+
+# systemd-networkd lease files (KEY=value lines)
+NETWORKD_LEASE_PATTERNS = ["/run/systemd/netif/leases/*"]
+
+# Where an entry came from, most trusted first
+ORIGIN_HOSTS = "hosts"
+ORIGIN_ETHERS = "ethers"
+ORIGIN_DHCP = "dhcp"
+
+
+class LocalName(NamedTuple):
+    """A host name found in a local file."""
+
+    name: str
+    origin: str  # ORIGIN_HOSTS, ORIGIN_ETHERS or ORIGIN_DHCP
+    mac: str = ""  # MAC the entry was recorded for, if any
+
+
+def normalize_mac(mac: str) -> str:
+    """Return a MAC as lowercase colon-separated hex, or "" if malformed."""
+    digits = "".join(c for c in mac.lower() if c in "0123456789abcdef")
+    if len(digits) != 12 or len(mac) > 17:
+        return ""
+    return ":".join(digits[i : i + 2] for i in range(0, 12, 2))
+
+
+def read_hosts_file(path: str = HOSTS_FILE) -> Dict[str, str]:
+    """
+    Read address to name mappings from a hosts file.
+
+    Args:
+        path: Path of the hosts file
+
+    Returns:
+        Dictionary mapping each address to its first (canonical) name
+    """
+    names: Dict[str, str] = {}
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                parts = line.split("#", 1)[0].split()
+                if len(parts) >= 2:
+                    names.setdefault(parts[0], parts[1])
+    except OSError as e:
+        logger.debug("Cannot read %s: %s", path, e)
+    return names
+
+
+def read_ethers_file(path: str = ETHERS_FILE) -> Dict[str, str]:
+    """
+    Read MAC to name mappings from an ethers file.
+
+    Entries whose second field is an address rather than a name are skipped.
+
+    Args:
+        path: Path of the ethers file
+
+    Returns:
+        Dictionary mapping normalized MACs to host names
+    """
+    names: Dict[str, str] = {}
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                parts = line.split("#", 1)[0].split()
+                if len(parts) < 2:
+                    continue
+                mac = normalize_mac(parts[0])
+                if mac and not parts[1].replace(".", "").isdigit():
+                    names[mac] = parts[1]
+    except OSError as e:
+        logger.debug("Cannot read %s: %s", path, e)
+    return names
+
+
+def find_lease_files(patterns: Iterable[str] = DNSMASQ_LEASE_PATTERNS) -> List[str]:
+    """Return the existing lease files matching the given glob patterns."""
+    paths: List[str] = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            if path not in paths and os.path.isfile(path):
+                paths.append(path)
+    return paths
+
+
+def read_dnsmasq_leases(path: str) -> List[Tuple[str, str, str]]:
+    """
+    Read the leases of a dnsmasq lease file.
+
+    Each line is "<expiry> <mac> <ip> <hostname|*> <client-id|*>".
+
+    Args:
+        path: Lease file to read
+
+    Returns:
+        List of (ip, mac, hostname) for leases carrying a host name
+    """
+    leases = []
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 4 and parts[3] != "*":
+                    leases.append((parts[2], normalize_mac(parts[1]), parts[3]))
+    except OSError as e:
+        logger.debug("Cannot read %s: %s", path, e)
+    return leases
+
+
+def read_networkd_lease(path: str) -> List[Tuple[str, str, str]]:
+    """
+    Read a systemd-networkd lease file.
+
+    Args:
+        path: Lease file to read
+
+    Returns:
+        List with one (ip, mac, hostname) entry if the lease names its
+        address, else an empty list; the MAC is not recorded by networkd
+    """
+    values: Dict[str, str] = {}
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                key, sep, value = line.strip().partition("=")
+                if sep and not key.startswith("#"):
+                    values[key] = value
+    except OSError as e:
+        logger.debug("Cannot read %s: %s", path, e)
+    if values.get("ADDRESS") and values.get("HOSTNAME"):
+        return [(values["ADDRESS"], "", values["HOSTNAME"])]
+    return []
+
+
+class LocalNameIndex:
+    """
+    Local host names keyed by IP and by MAC.
+
+    The index is rebuilt by refresh() only when one of its files was
+    added, removed or modified since the last build, so calling it at
+    the start of every scan costs a few stat() calls.
+    """
+
+    def __init__(
+        self,
+        hosts_file: str = HOSTS_FILE,
+        ethers_file: str = ETHERS_FILE,
+        dnsmasq_patterns: Iterable[str] = DNSMASQ_LEASE_PATTERNS,
+        networkd_patterns: Iterable[str] = NETWORKD_LEASE_PATTERNS,
+    ):
+        """
+        Initialize an empty index.
+
+        Args:
+            hosts_file: Path of the hosts file
+            ethers_file: Path of the ethers file
+            dnsmasq_patterns: Glob patterns of dnsmasq lease files
+            networkd_patterns: Glob patterns of systemd-networkd lease files
+        """
+        self.hosts_file = hosts_file
+        self.ethers_file = ethers_file
+        self.dnsmasq_patterns = list(dnsmasq_patterns)
+        self.networkd_patterns = list(networkd_patterns)
+
+        self._lock = threading.Lock()
+        self._signature: Optional[Tuple] = None
+        self._by_ip: Dict[str, LocalName] = {}
+        self._by_mac: Dict[str, LocalName] = {}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._by_ip) + len(self._by_mac)
+
+    def refresh(self) -> bool:
+        """
+        Rebuild the index if any of its files changed.
+
+        Returns:
+            True if the index was rebuilt
+        """
+        dnsmasq_files = find_lease_files(self.dnsmasq_patterns)
+        networkd_files = find_lease_files(self.networkd_patterns)
+        signature = tuple(
+            (path, self._mtime(path))
+            for path in [self.hosts_file, self.ethers_file]
+            + dnsmasq_files
+            + networkd_files
+        )
+        with self._lock:
+            if signature == self._signature:
+                return False
+
+        by_ip: Dict[str, LocalName] = {}
+        by_mac: Dict[str, LocalName] = {}
+        for path in dnsmasq_files:
+            self._add_leases(read_dnsmasq_leases(path), by_ip, by_mac)
+        for path in networkd_files:
+            self._add_leases(read_networkd_lease(path), by_ip, by_mac)
+        # Hand-maintained files override whatever DHCP handed out
+        for mac, name in read_ethers_file(self.ethers_file).items():
+            by_mac[mac] = LocalName(name, ORIGIN_ETHERS, mac)
+        for ip, name in read_hosts_file(self.hosts_file).items():
+            by_ip[ip] = LocalName(name, ORIGIN_HOSTS)
+
+        with self._lock:
+            self._signature = signature
+            self._by_ip = by_ip
+            self._by_mac = by_mac
+        logger.debug(
+            "Local name index rebuilt: %d addresses, %d MACs", len(by_ip), len(by_mac)
+        )
+        return True
+
+    def lookup(self, ip: str, mac: str = "") -> Optional[LocalName]:
+        """
+        Return the local name of a host.
+
+        A hosts file entry for the address wins. Otherwise a name recorded
+        for the MAC is preferred over a lease for the address, since the
+        address may have been handed to another device since; for the
+        same reason a lease for the address recorded with a different MAC
+        is ignored.
+
+        Args:
+            ip: Host address
+            mac: Host MAC, if known
+
+        Returns:
+            LocalName, or None if no local file names the host
+        """
+        with self._lock:
+            entry = self._by_ip.get(ip)
+            if entry and entry.origin == ORIGIN_HOSTS:
+                return entry
+            mac = normalize_mac(mac) if mac else ""
+            if mac:
+                by_mac = self._by_mac.get(mac)
+                if by_mac:
+                    return by_mac
+                if entry and entry.mac and entry.mac != mac:
+                    return None
+            return entry
+
+    @staticmethod
+    def _mtime(path: str) -> Optional[int]:
+        """Modification time of a file in nanoseconds, None if missing."""
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    @staticmethod
+    def _add_leases(
+        leases: List[Tuple[str, str, str]],
+        by_ip: Dict[str, LocalName],
+        by_mac: Dict[str, LocalName],
+    ) -> None:
+        """Merge lease entries into the index maps."""
+        for ip, mac, name in leases:
+            entry = LocalName(name, ORIGIN_DHCP, mac)
+            by_ip[ip] = entry
+            if mac:
+                by_mac[mac] = entry
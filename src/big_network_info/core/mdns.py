@@ -0,0 +1,269 @@
+"""
+In-process multicast DNS client.
+Resolves host names for many addresses from one socket
+instead of running avahi-resolve / avahi-browse per host.
+"""
+
+import logging
+import select
+import socket
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .dns_message import (
+    TYPE_A,
+    TYPE_AAAA,
+    TYPE_PTR,
+    TYPE_SRV,
+    decode_message,
+    encode_query,
+    reverse_name,
+)
+
+logger = logging.getLogger(__name__)
+
+MDNS_GROUP = "224.0.0.251"
+MDNS_PORT = 5353
+
+# DNS-SD meta query listing every service type on the link (RFC 6763 §9)
+SERVICE_ENUMERATION = "_services._dns-sd._udp.local"
+
+# Questions per datagram; keeps queries well below a typical MTU
+_QUESTIONS_PER_PACKET = 24
+
+# Seconds between checks for newly queued questions
+_POLL_INTERVAL = 0.05
+
+
+class MdnsSession:
+    """
+    Batched mDNS lookups over a single socket.
+
+    Queries are sent as one-shot (legacy unicast) queries from an
+    ephemeral port, so responders answer directly and no multicast
+    group has to be joined. Reverse PTR questions for every queued
+    address are packed into as few datagrams as possible, alongside a
+    single DNS-SD service enumeration, whose SRV targets name hosts that
+    do not answer reverse questions; everything learnt goes into an
+    index keyed by IP that lookup() reads.
+    """
+
+    def __init__(
+        self,
+        window: float = 1.0,
+        address: Tuple[str, int] = (MDNS_GROUP, MDNS_PORT),
+        browse_services: bool = True,
+        on_update: Optional[Callable[[], None]] = None,
+    ):
+        """
+        Initialize the session.
+
+        Args:
+            window: Seconds to collect answers for an address after querying it
+            address: Destination of queries; a loopback responder can stand
+                in for the multicast group
+            browse_services: Also enumerate DNS-SD services on the link
+            on_update: Optional callable invoked (without locks held) whenever
+                new answers arrive
+        """
+        self.window = max(0.05, window)
+        self.address = address
+        self.browse_services = browse_services
+        self.on_update = on_update
+
+        self._sock: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._condition = threading.Condition()
+
+        # Questions waiting to be sent and everything ever asked
+        self._outgoing: List[Tuple[str, int]] = []
+        self._asked: Set[Tuple[str, int]] = set()
+        # ip -> monotonic time its answers are no longer waited for
+        self._deadlines: Dict[str, float] = {}
+        # reverse name (lowercase) -> ip
+        self._reverse: Dict[str, str] = {}
+
+        # Index built from answers
+        self._ptr_names: Dict[str, str] = {}  # ip -> name from reverse PTR
+        self._names_by_ip: Dict[str, List[str]] = {}  # ip -> names from A/AAAA
+        self._service_types: Set[str] = set()
+        self._srv: Dict[str, Tuple[str, int]] = {}  # instance -> (target, port)
+
+    def __enter__(self) -> "MdnsSession":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def start(self) -> bool:
+        """
+        Open the socket and start collecting answers.
+
+        Returns:
+            True if the session is running, False if no socket could be opened
+        """
+        if self._sock is not None:
+            return True
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 255)
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+            sock.bind(("", 0))
+            sock.setblocking(False)
+        except OSError as e:
+            logger.debug("Cannot open mDNS socket: %s", e)
+            self._closed = True
+            return False
+
+        self._sock = sock
+        if self.browse_services:
+            self._ask(SERVICE_ENUMERATION, TYPE_PTR)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return True
+
+    def close(self) -> None:
+        """Stop the session; lookups keep answering from the index."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def query(self, ips: Iterable[str]) -> None:
+        """Queue reverse lookups; they go out in the next batch."""
+        with self._condition:
+            for ip in ips:
+                if ip in self._deadlines:
+                    continue
+                try:
+                    name = reverse_name(ip)
+                except (OSError, ValueError):
+                    continue
+                self._reverse[name.lower()] = ip
+                self._deadlines[ip] = time.monotonic() + self.window
+                self._ask(name, TYPE_PTR)
+
+    def lookup(self, ip: str, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Return the mDNS hostname of an address, waiting for answers if needed.
+
+        The address is queried if it has not been yet. The wait ends when a
+        name is known, the address's answer window has passed, or the
+        timeout expires.
+
+        Args:
+            ip: Address to look up
+            timeout: Maximum seconds to wait (default: the answer window)
+
+        Returns:
+            Hostname (e.g. "printer.local") or None
+        """
+        self.query([ip])
+        with self._condition:
+            deadline = self._deadlines.get(ip, 0.0)
+            if timeout is not None:
+                deadline = min(deadline, time.monotonic() + timeout)
+            while True:
+                name = self._hostname_locked(ip)
+                remaining = deadline - time.monotonic()
+                if name or remaining <= 0 or self._closed:
+                    return name
+                self._condition.wait(remaining)
+
+    def _hostname_locked(self, ip: str) -> Optional[str]:
+        """Best known name for an address; caller holds the lock."""
+        if ip in self._ptr_names:
+            return self._ptr_names[ip]
+        names = self._names_by_ip.get(ip)
+        return names[0] if names else None
+
+    def _ask(self, name: str, rtype: int) -> None:
+        """Queue a question unless it was already asked; caller holds the lock."""
+        key = (name.lower(), rtype)
+        if key in self._asked:
+            return
+        self._asked.add(key)
+        self._outgoing.append((name, rtype))
+
+    def _run(self) -> None:
+        """Send queued questions and process answers until closed."""
+        sock = self._sock
+        while True:
+            with self._condition:
+                if self._closed:
+                    return
+                outgoing, self._outgoing = self._outgoing, []
+
+            for start in range(0, len(outgoing), _QUESTIONS_PER_PACKET):
+                batch = outgoing[start : start + _QUESTIONS_PER_PACKET]
+                try:
+                    sock.sendto(encode_query(batch), self.address)
+                except (OSError, ValueError) as e:
+                    logger.debug("mDNS query failed: %s", e)
+
+            try:
+                readable, _w, _x = select.select([sock], [], [], _POLL_INTERVAL)
+            except (OSError, ValueError):
+                return
+            if readable and self._drain(sock) and self.on_update:
+                self.on_update()
+
+    def _drain(self, sock: socket.socket) -> bool:
+        """
+        Read every queued response and add its records to the index.
+
+        Returns:
+            True if any response was added
+        """
+        updated = False
+        while True:
+            try:
+                data, _addr = sock.recvfrom(9000)
+            except (BlockingIOError, InterruptedError):
+                return updated
+            except OSError:
+                return updated
+            message = decode_message(data)
+            if message is None or not message.is_response:
+                continue
+            with self._condition:
+                for record in message.records:
+                    self._add_record(record)
+                self._condition.notify_all()
+            updated = True
+
+    def _add_record(self, record) -> None:
+        """Merge one answer into the index; caller holds the lock."""
+        key = record.name.lower()
+        if record.rtype == TYPE_PTR:
+            if key in self._reverse:
+                self._ptr_names.setdefault(self._reverse[key], record.data)
+            elif key == SERVICE_ENUMERATION:
+                service_type = record.data.lower()
+                if service_type not in self._service_types:
+                    self._service_types.add(service_type)
+                    self._ask(record.data, TYPE_PTR)
+            elif key in self._service_types:
+                if record.data.lower() not in self._srv:
+                    self._ask(record.data, TYPE_SRV)
+        elif record.rtype == TYPE_SRV:
+            target, port = record.data
+            self._srv[key] = (target, port)
+            if not any(
+                target.lower() == name.lower()
+                for names in self._names_by_ip.values()
+                for name in names
+            ):
+                self._ask(target, TYPE_A)
+        elif record.rtype in (TYPE_A, TYPE_AAAA):
+            names = self._names_by_ip.setdefault(record.data, [])
+            if record.name not in names:
+                names.append(record.name)
@@ -0,0 +1,310 @@
+"""
+Kernel neighbor table (ARP/NDP cache) reader.
+Dumps RTM_GETNEIGH over rtnetlink, falling back to /proc/net/arp.
+"""
+
+import errno
+import logging
+import os
+import select
+import socket
+import struct
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from .rate_control import RateController
+
+logger = logging.getLogger(__name__)
+
+# rtnetlink constants (linux/rtnetlink.h, linux/neighbour.h)
+NETLINK_ROUTE = 0
+RTM_NEWNEIGH = 28
+RTM_GETNEIGH = 30
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+NLM_F_REQUEST = 0x01
+NLM_F_DUMP = 0x300
+NDA_DST = 1
+NDA_LLADDR = 2
+
+_NLMSGHDR = struct.Struct("=IHHII")
+_NDMSG = struct.Struct("=BBHiHBB")
+_RTATTR = struct.Struct("=HH")
+
+# Neighbor Unreachability Detection states
+NUD_STATES = {
+    0x00: "NONE",
+    0x01: "INCOMPLETE",
+    0x02: "REACHABLE",
+    0x04: "STALE",
+    0x08: "DELAY",
+    0x10: "PROBE",
+    0x20: "FAILED",
+    0x40: "NOARP",
+    0x80: "PERMANENT",
+}
+
+# States that do not prove a host answered (NOARP covers loopback and multicast)
+UNRESOLVED_STATES = frozenset({"NONE", "INCOMPLETE", "FAILED", "NOARP"})
+
+PROC_NET_ARP = "/proc/net/arp"
+
+# UDP discard service; the target does not need to listen, the datagram
+# only exists to make the kernel resolve the neighbor
+DISCARD_PORT = 9
+
+# /proc/net/arp flag bits (linux/if_arp.h)
+_ATF_COM = 0x02
+_ATF_PERM = 0x04
+
+
+class NeighborEntry(NamedTuple):
+    """A single kernel neighbor table entry."""
+
+    ip: str
+    mac: str  # Lowercase, colon-separated; empty if not resolved
+    interface: str
+    state: str  # REACHABLE, STALE, DELAY, PROBE, FAILED, INCOMPLETE, ...
+
+    @property
+    def is_resolved(self) -> bool:
+        """True if the entry carries a MAC learned from a real reply."""
+        return bool(self.mac) and self.state not in UNRESOLVED_STATES
+
+
+def _align(length: int) -> int:
+    """Round up to the 4-byte netlink alignment."""
+    return (length + 3) & ~3
+
+
+def _format_mac(raw: bytes) -> str:
+    """Format a link-layer address as aa:bb:cc:dd:ee:ff."""
+    return ":".join(f"{b:02x}" for b in raw)
+
+
+def _interface_name(index: int, names: Dict[int, str]) -> str:
+    """Resolve an interface index to its name, caching lookups."""
+    if index not in names:
+        try:
+            names[index] = socket.if_indextoname(index)
+        except OSError:
+            names[index] = str(index)
+    return names[index]
+
+
+def _state_name(state: int) -> str:
+    """Return the name of the most significant NUD state bit."""
+    for bit in (0x80, 0x40, 0x20, 0x10, 0x08, 0x04, 0x02, 0x01):
+        if state & bit:
+            return NUD_STATES[bit]
+    return "NONE"
+
+
+def read_neighbors_netlink(family: int = socket.AF_INET) -> List[NeighborEntry]:
+    """
+    Dump the kernel neighbor table over rtnetlink.
+
+    Args:
+        family: Address family to dump (AF_INET or AF_INET6)
+
+    Returns:
+        List of neighbor entries
+
+    Raises:
+        OSError: If the netlink socket cannot be used
+    """
+    entries: List[NeighborEntry] = []
+    names: Dict[int, str] = {}
+    sequence = int.from_bytes(os.urandom(4), "little")
+
+    with socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_ROUTE) as sock:
+        sock.settimeout(2.0)
+        sock.bind((0, 0))
+        request = _NDMSG.pack(family, 0, 0, 0, 0, 0, 0)
+        header = _NLMSGHDR.pack(
+            _NLMSGHDR.size + len(request),
+            RTM_GETNEIGH,
+            NLM_F_REQUEST | NLM_F_DUMP,
+            sequence,
+            0,
+        )
+        sock.send(header + request)
+
+        while True:
+            data = sock.recv(65536)
+            offset = 0
+            while offset + _NLMSGHDR.size <= len(data):
+                length, msg_type, _flags, seq, _pid = _NLMSGHDR.unpack_from(
+                    data, offset
+                )
+                if length < _NLMSGHDR.size:
+                    return entries
+                if seq != sequence:
+                    offset += _align(length)
+                    continue
+                if msg_type == NLMSG_DONE:
+                    return entries
+                if msg_type == NLMSG_ERROR:
+                    (error,) = struct.unpack_from("=i", data, offset + _NLMSGHDR.size)
+                    if error:
+                        raise OSError(-error, os.strerror(-error))
+                    return entries
+                if msg_type == RTM_NEWNEIGH:
+                    entry = _parse_neighbor(
+                        data[offset + _NLMSGHDR.size : offset + length], names
+                    )
+                    if entry:
+                        entries.append(entry)
+                offset += _align(length)
+
+
+def _parse_neighbor(payload: bytes, names: Dict[int, str]) -> Optional[NeighborEntry]:
+    """Parse one RTM_NEWNEIGH payload (ndmsg followed by attributes)."""
+    if len(payload) < _NDMSG.size:
+        return None
+    family, _p1, _p2, ifindex, state, _flags, _type = _NDMSG.unpack_from(payload)
+
+    ip = ""
+    mac = ""
+    offset = _NDMSG.size
+    while offset + _RTATTR.size <= len(payload):
+        attr_len, attr_type = _RTATTR.unpack_from(payload, offset)
+        if attr_len < _RTATTR.size:
+            break
+        value = payload[offset + _RTATTR.size : offset + attr_len]
+        if attr_type == NDA_DST:
+            try:
+                ip = socket.inet_ntop(family, value)
+            except (OSError, ValueError):
+                return None
+        elif attr_type == NDA_LLADDR and len(value) == 6 and any(value):
+            mac = _format_mac(value)
+        offset += _align(attr_len)
+
+    if not ip:
+        return None
+    return NeighborEntry(ip, mac, _interface_name(ifindex, names), _state_name(state))
+
+
+def read_neighbors_proc(path: str = PROC_NET_ARP) -> List[NeighborEntry]:
+    """
+    Read the IPv4 neighbor table from /proc/net/arp.
+
+    The proc file does not distinguish REACHABLE from STALE, so complete
+    entries are reported as REACHABLE.
+
+    Args:
+        path: Path of the proc file
+
+    Returns:
+        List of neighbor entries
+    """
+    entries: List[NeighborEntry] = []
+    with open(path, "r") as f:
+        next(f, None)  # Header line
+        for line in f:
+            parts = line.split()
+            if len(parts) < 6:
+                continue
+            ip, _hw_type, flags, mac, _mask, device = parts[:6]
+            try:
+                flag_bits = int(flags, 16)
+            except ValueError:
+                continue
+            mac = mac.lower()
+            if mac == "00:00:00:00:00:00" or not flag_bits & _ATF_COM:
+                state = "INCOMPLETE"
+                mac = ""
+            elif flag_bits & _ATF_PERM:
+                state = "PERMANENT"
+            else:
+                state = "REACHABLE"
+            entries.append(NeighborEntry(ip, mac, device, state))
+    return entries
+
+
+def read_neighbor_table(family: int = socket.AF_INET) -> List[NeighborEntry]:
+    """
+    Read the kernel neighbor table without spawning any process.
+
+    Args:
+        family: Address family (AF_INET or AF_INET6)
+
+    Returns:
+        List of neighbor entries (possibly empty)
+    """
+    try:
+        return read_neighbors_netlink(family)
+    except (OSError, AttributeError) as e:
+        logger.debug("Netlink neighbor dump failed: %s", e)
+
+    if family == socket.AF_INET:
+        try:
+            return read_neighbors_proc()
+        except OSError as e:
+            logger.debug("Cannot read %s: %s", PROC_NET_ARP, e)
+    return []
+
+
+def prime_neighbors(
+    ips: Iterable[str],
+    port: int = DISCARD_PORT,
+    rate: int = 5000,
+    stop_check: Optional[Callable[[], bool]] = None,
+    rate_control: Optional[RateController] = None,
+) -> int:
+    """
+    Make the kernel ARP for every address by sending each one an empty UDP datagram.
+
+    No reply is expected; once the kernel has resolved the addresses,
+    read_neighbor_table() reveals which hosts exist, including devices
+    that drop ICMP and have no open TCP ports. Only meaningful for
+    addresses on a directly connected link.
+
+    Args:
+        ips: On-link addresses to prime
+        port: Destination UDP port
+        rate: Maximum datagrams per second
+        stop_check: Optional callable returning True when priming should abort
+        rate_control: Optional rate controller shared with other scan
+            stages; when given, it paces the datagrams instead of rate
+
+    Returns:
+        Number of datagrams sent
+    """
+    interval = 1.0 / max(1, rate)
+    sent = 0
+    next_send = time.monotonic()
+
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.setblocking(False)
+        for ip in ips:
+            if stop_check and stop_check():
+                break
+            if rate_control:
+                if not rate_control.take(stop_check):
+                    break
+            else:
+                delay = next_send - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                next_send = max(next_send + interval, time.monotonic() - interval)
+
+            for _attempt in range(3):
+                try:
+                    sock.sendto(b"", (ip, port))
+                    sent += 1
+                    break
+                except (BlockingIOError, InterruptedError):
+                    select.select([], [sock], [], 0.05)
+                except OSError as e:
+                    # ENOBUFS means the unresolved-neighbor queue is full
+                    if e.errno == errno.ENOBUFS:
+                        if rate_control:
+                            rate_control.on_loss()
+                        time.sleep(0.01)
+                        continue
+                    logger.debug("Priming datagram to %s failed: %s", ip, e)
+                    break
+
+    return sent
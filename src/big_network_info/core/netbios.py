@@ -0,0 +1,375 @@
+"""
+NetBIOS Node Status and LLMNR name resolution.
+Asks Windows and Samba hosts for their own names with one datagram per
+host and protocol, gathering all replies on two sockets.
+"""
+
+import logging
+import secrets
+import select
+import socket
+import struct
+import threading
+import time
+from typing import Callable, Dict, Iterable, NamedTuple, Optional
+
+from .dns_message import TYPE_PTR, decode_message, encode_query, reverse_name
+
+logger = logging.getLogger(__name__)
+
+NETBIOS_NS_PORT = 137
+LLMNR_PORT = 5355
+
+# NetBIOS Node Status (RFC 1002 §4.2.17)
+_NBSTAT_TYPE = 0x0021
+_NBSTAT_CLASS_IN = 0x0001
+_NAME_FLAG_GROUP = 0x8000
+# Name suffix of the computer name and of the workgroup/domain name
+_SUFFIX_WORKSTATION = 0x00
+
+_HEADER = struct.Struct("!HHHHHH")
+_RECORD = struct.Struct("!HHIH")
+_NAME_ENTRY = struct.Struct("!15sBH")
+
+# Seconds between checks for newly queued hosts
+_POLL_INTERVAL = 0.05
+
+
+class NetbiosName(NamedTuple):
+    """Names a Windows/Samba host reports about itself."""
+
+    name: str  # LLMNR hostname if known, else the NetBIOS computer name
+    workgroup: str  # NetBIOS workgroup or domain, empty if unknown
+    mac: str  # MAC from the NBSTAT unit id, empty if not reported
+
+
+def _encode_netbios_name(raw: bytes) -> bytes:
+    """First-level encode a 16-byte NetBIOS name (RFC 1001 §14.1)."""
+    encoded = bytearray([32])
+    for byte in raw:
+        encoded.append(ord("A") + (byte >> 4))
+        encoded.append(ord("A") + (byte & 0x0F))
+    encoded.append(0)
+    return bytes(encoded)
+
+
+def encode_nbstat_request(txid: int) -> bytes:
+    """Build a Node Status request for the wildcard name."""
+    return (
+        _HEADER.pack(txid, 0x0000, 1, 0, 0, 0)
+        + _encode_netbios_name(b"*".ljust(16, b"\x00"))
+        + struct.pack("!HH", _NBSTAT_TYPE, _NBSTAT_CLASS_IN)
+    )
+
+
+def _skip_name(data: bytes, offset: int) -> int:
+    """Return the offset just past an encoded (possibly compressed) name."""
+    while offset < len(data):
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            return offset + 2
+        offset += 1 + length
+        if length == 0:
+            return offset
+    raise ValueError("Truncated name")
+
+
+def parse_nbstat_response(data: bytes) -> Optional[tuple]:
+    """
+    Parse a Node Status response.
+
+    Returns:
+        Tuple of (txid, computer name, workgroup, mac), or None if malformed
+    """
+    try:
+        txid, flags, _qd, ancount, _ns, _ar = _HEADER.unpack_from(data)
+        if not flags & 0x8000 or ancount < 1:
+            return None
+        offset = _skip_name(data, _HEADER.size)
+        rtype, _rclass, _ttl, _length = _RECORD.unpack_from(data, offset)
+        if rtype != _NBSTAT_TYPE:
+            return None
+        offset += _RECORD.size
+        count = data[offset]
+        offset += 1
+
+        computer = ""
+        workgroup = ""
+        for _ in range(count):
+            raw, suffix, name_flags = _NAME_ENTRY.unpack_from(data, offset)
+            offset += _NAME_ENTRY.size
+            if suffix != _SUFFIX_WORKSTATION:
+                continue
+            name = raw.decode("ascii", "replace").rstrip(" \x00")
+            if name_flags & _NAME_FLAG_GROUP:
+                workgroup = workgroup or name
+            else:
+                computer = computer or name
+
+        mac = ""
+        unit_id = data[offset : offset + 6]
+        if len(unit_id) == 6 and any(unit_id):
+            mac = ":".join(f"{b:02x}" for b in unit_id)
+        return txid, computer, workgroup, mac
+    except (ValueError, IndexError, struct.error):
+        return None
+
+
+class _HostQuery:
+    """Per-host state of the NBSTAT and LLMNR queries."""
+
+    __slots__ = (
+        "ip",
+        "nbstat_txid",
+        "llmnr_txid",
+        "deadline",
+        "sent",
+        "nbstat",
+        "llmnr_name",
+        "done",
+    )
+
+    def __init__(self, ip: str, nbstat_txid: int, llmnr_txid: int, deadline: float):
+        self.ip = ip
+        self.nbstat_txid = nbstat_txid
+        self.llmnr_txid = llmnr_txid
+        self.deadline = deadline
+        self.sent = False
+        self.nbstat: Optional[tuple] = None  # (computer, workgroup, mac)
+        self.llmnr_name: Optional[str] = None
+        self.done = False
+
+
+class NetbiosResolver:
+    """
+    Batched NetBIOS Node Status and LLMNR reverse lookups.
+
+    Every queued host is sent one NBSTAT request (UDP 137) and one LLMNR
+    PTR query (UDP 5355, unicast to the host as RFC 4795 prescribes for
+    reverse mappings). Replies are matched by source address and
+    transaction id until the host's deadline.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 0.5,
+        nbstat_port: int = NETBIOS_NS_PORT,
+        llmnr_port: int = LLMNR_PORT,
+        on_update: Optional[Callable[[], None]] = None,
+    ):
+        """
+        Initialize the resolver.
+
+        Args:
+            timeout: Seconds to wait for each host's replies
+            nbstat_port: Destination port of Node Status requests
+            llmnr_port: Destination port of LLMNR queries
+            on_update: Optional callable invoked (without locks held) whenever
+                new answers arrive or lookups time out
+        """
+        self.timeout = max(0.05, timeout)
+        self.nbstat_port = nbstat_port
+        self.llmnr_port = llmnr_port
+        self.on_update = on_update
+
+        self._nbstat_sock: Optional[socket.socket] = None
+        self._llmnr_sock: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._condition = threading.Condition()
+        self._hosts: Dict[str, _HostQuery] = {}
+
+    def __enter__(self) -> "NetbiosResolver":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def start(self) -> bool:
+        """
+        Open the sockets and start the query loop.
+
+        Returns:
+            True if the resolver is running
+        """
+        if self._thread is not None:
+            return True
+        try:
+            self._nbstat_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._nbstat_sock.setblocking(False)
+            self._llmnr_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._llmnr_sock.setblocking(False)
+        except OSError as e:
+            logger.debug("Cannot open NetBIOS/LLMNR sockets: %s", e)
+            self._closed = True
+            self._close_sockets()
+            return False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return True
+
+    def close(self) -> None:
+        """Stop the resolver; unanswered lookups return what is known."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._close_sockets()
+
+    def _close_sockets(self) -> None:
+        """Close both sockets, if open."""
+        for sock in (self._nbstat_sock, self._llmnr_sock):
+            if sock is not None:
+                sock.close()
+        self._nbstat_sock = None
+        self._llmnr_sock = None
+
+    def query(self, ips: Iterable[str]) -> None:
+        """Queue hosts; their requests go out in the next batch."""
+        with self._condition:
+            now = time.monotonic()
+            for ip in ips:
+                if ip in self._hosts or ":" in ip:
+                    continue
+                self._hosts[ip] = _HostQuery(
+                    ip,
+                    secrets.randbelow(0x10000),
+                    secrets.randbelow(0x10000),
+                    now + self.timeout,
+                )
+
+    def lookup(self, ip: str, timeout: Optional[float] = None) -> Optional[NetbiosName]:
+        """
+        Return what a host reported about itself, waiting for replies if needed.
+
+        Args:
+            ip: Host address (queried if it has not been yet)
+            timeout: Maximum seconds to wait (default: the host's deadline)
+
+        Returns:
+            NetbiosName, or None if the host answered neither protocol
+        """
+        self.query([ip])
+        with self._condition:
+            host = self._hosts.get(ip)
+            if host is None:
+                return None
+            deadline = host.deadline
+            if timeout is not None:
+                deadline = min(deadline, time.monotonic() + timeout)
+            while not host.done and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            return self._result_locked(host)
+
+    def resolve(self, ips: Iterable[str]) -> Dict[str, Optional[NetbiosName]]:
+        """Look up a batch of hosts, returning a result (or None) per address."""
+        ips = list(ips)
+        self.query(ips)
+        return {ip: self.lookup(ip) for ip in ips}
+
+    @staticmethod
+    def _result_locked(host: _HostQuery) -> Optional[NetbiosName]:
+        """Combine both replies of a host; caller holds the lock."""
+        if host.nbstat is None and not host.llmnr_name:
+            return None
+        computer, workgroup, mac = host.nbstat or ("", "", "")
+        return NetbiosName(host.llmnr_name or computer, workgroup, mac)
+
+    def _run(self) -> None:
+        """Send queued requests, expire hosts and read replies until closed."""
+        socks = [self._nbstat_sock, self._llmnr_sock]
+        while True:
+            with self._condition:
+                if self._closed:
+                    return
+                now = time.monotonic()
+                expired = False
+                for host in self._hosts.values():
+                    if host.done:
+                        continue
+                    if now >= host.deadline:
+                        host.done = True
+                        expired = True
+                    elif not host.sent:
+                        host.sent = self._send(host)
+                if expired:
+                    self._condition.notify_all()
+
+            try:
+                readable, _w, _x = select.select(socks, [], [], _POLL_INTERVAL)
+            except (OSError, ValueError):
+                return
+            updated = expired
+            for sock in readable:
+                updated = self._drain(sock) or updated
+            if updated and self.on_update:
+                self.on_update()
+
+    def _send(self, host: _HostQuery) -> bool:
+        """Send both requests for a host; False if the socket buffer is full."""
+        try:
+            self._nbstat_sock.sendto(
+                encode_nbstat_request(host.nbstat_txid), (host.ip, self.nbstat_port)
+            )
+            self._llmnr_sock.sendto(
+                encode_query([(reverse_name(host.ip), TYPE_PTR)], txid=host.llmnr_txid),
+                (host.ip, self.llmnr_port),
+            )
+        except (BlockingIOError, InterruptedError):
+            return False
+        except OSError as e:
+            logger.debug("NetBIOS/LLMNR query to %s failed: %s", host.ip, e)
+        return True
+
+    def _drain(self, sock: socket.socket) -> bool:
+        """
+        Read every queued reply and attach it to its host.
+
+        Returns:
+            True if any reply was attached
+        """
+        is_nbstat = sock is self._nbstat_sock
+        updated = False
+        while True:
+            try:
+                data, addr = sock.recvfrom(4096)
+            except (BlockingIOError, InterruptedError):
+                return updated
+            except OSError:
+                return updated
+
+            with self._condition:
+                host = self._hosts.get(addr[0])
+                if host is None or host.done:
+                    continue
+                if is_nbstat:
+                    parsed = parse_nbstat_response(data)
+                    if parsed is None or parsed[0] != host.nbstat_txid:
+                        continue
+                    host.nbstat = parsed[1:]
+                else:
+                    message = decode_message(data)
+                    if (
+                        message is None
+                        or not message.is_response
+                        or message.txid != host.llmnr_txid
+                    ):
+                        continue
+                    names = [
+                        record.data
+                        for record in message.records
+                        if record.rtype == TYPE_PTR
+                    ]
+                    # An empty answer still proves the responder has no name
+                    host.llmnr_name = names[0] if names else ""
+
+                if host.nbstat is not None and host.llmnr_name is not None:
+                    host.done = True
+                self._condition.notify_all()
+            updated = True
@@ -0,0 +1,270 @@
+"""
+Compiled MAC vendor (OUI) index.
+Compiles the IEEE registry shipped with arp-scan into a binary file of
+sorted prefixes and a string table, which is memory-mapped and shared by
+every scanner in the process.
+"""
+
+import array
+import bisect
+import logging
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+IEEE_OUI_FILE = "/usr/share/arp-scan/ieee-oui.txt"
+INDEX_FILE = Path.home() / ".cache" / "big-network-info" / "oui.idx"
+
+# Prefix lengths in bits: MA-S (36), MA-M (28) and MA-L (24), longest first
+PREFIX_BITS = (36, 28, 24)
+
+# Bump when the layout changes; the byte order is part of the magic since
+# the tables are stored in native order
+_MAGIC = b"BNIOUI1" + (b"L" if sys.byteorder == "little" else b"B")
+# magic, source mtime_ns, source size, entries per prefix length
+_HEADER = struct.Struct("=8sQQ" + "I" * len(PREFIX_BITS))
+
+
+def _parse_source(path: str) -> Dict[int, Dict[int, str]]:
+    """
+    Parse an arp-scan style OUI file ("<hex prefix><whitespace><vendor>").
+
+    Returns:
+        Dictionary mapping prefix length (bits) to {prefix: vendor}
+    """
+    tables: Dict[int, Dict[int, str]] = {bits: {} for bits in PREFIX_BITS}
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            parts = line.strip().split(None, 1)
+            if len(parts) < 2 or parts[0].startswith("#"):
+                continue
+            bits = len(parts[0]) * 4
+            if bits not in tables:
+                continue
+            try:
+                prefix = int(parts[0], 16)
+            except ValueError:
+                continue
+            tables[bits][prefix] = parts[1].strip()
+    return tables
+
+
+def compile_index(source: str) -> bytes:
+    """
+    Compile an OUI file into the binary index layout.
+
+    Layout: header, then per prefix length a sorted array of uint64
+    prefixes followed by a parallel array of uint32 string offsets, then
+    the string table of length-prefixed (uint16) UTF-8 vendor names.
+
+    Args:
+        source: Path of the OUI file
+
+    Returns:
+        The index contents
+    """
+    stat = os.stat(source)
+    tables = _parse_source(source)
+
+    strings = bytearray()
+    string_offsets: Dict[str, int] = {}
+    sections: List[bytes] = []
+    for bits in PREFIX_BITS:
+        prefixes = array.array("Q")
+        offsets = array.array("I")
+        for prefix, vendor in sorted(tables[bits].items()):
+            offset = string_offsets.get(vendor)
+            if offset is None:
+                encoded = vendor.encode("utf-8")[:0xFFFF]
+                offset = len(strings)
+                string_offsets[vendor] = offset
+                strings += struct.pack("=H", len(encoded)) + encoded
+            prefixes.append(prefix)
+            offsets.append(offset)
+        sections.append(prefixes.tobytes() + offsets.tobytes())
+
+    header = _HEADER.pack(
+        _MAGIC,
+        stat.st_mtime_ns,
+        stat.st_size,
+        *(len(tables[bits]) for bits in PREFIX_BITS),
+    )
+    return header + b"".join(sections) + bytes(strings)
+
+
+class OuiIndex:
+    """
+    Longest-prefix vendor lookups over a compiled index.
+
+    The index is read through a memory map (or an in-memory buffer when
+    it could not be written to disk); lookups binary-search the sorted
+    prefix arrays without copying them.
+    """
+
+    def __init__(self, buffer, source_mtime_ns: int = 0, source_size: int = 0):
+        """
+        Open a compiled index.
+
+        Args:
+            buffer: mmap or bytes holding the index
+            source_mtime_ns: Expected modification time of the source file
+            source_size: Expected size of the source file
+
+        Raises:
+            ValueError: If the buffer is not a valid index
+        """
+        if len(buffer) < _HEADER.size:
+            raise ValueError("Truncated OUI index")
+        magic, mtime_ns, size, *counts = _HEADER.unpack_from(buffer)
+        if magic != _MAGIC:
+            raise ValueError("Not an OUI index")
+        self.source_mtime_ns = mtime_ns
+        self.source_size = size
+        self._buffer = buffer
+
+        view = memoryview(buffer)
+        offset = _HEADER.size
+        self._tables: List[Tuple[int, memoryview, memoryview]] = []
+        for bits, count in zip(PREFIX_BITS, counts):
+            prefixes = view[offset : offset + count * 8].cast("Q")
+            offset += count * 8
+            offsets = view[offset : offset + count * 4].cast("I")
+            offset += count * 4
+            self._tables.append((bits, prefixes, offsets))
+        if offset > len(buffer):
+            raise ValueError("Truncated OUI index")
+        self._strings = view[offset:]
+        self.entries = sum(counts)
+
+    def lookup(self, mac: str) -> Optional[str]:
+        """
+        Return the vendor of the longest registered prefix matching a MAC.
+
+        Args:
+            mac: MAC address in any common notation
+
+        Returns:
+            Vendor name, or None if no prefix matches
+        """
+        digits = mac.replace(":", "").replace("-", "").replace(".", "")
+        if len(digits) != 12:
+            return None
+        try:
+            value = int(digits, 16)
+        except ValueError:
+            return None
+
+        for bits, prefixes, offsets in self._tables:
+            key = value >> (48 - bits)
+            position = bisect.bisect_left(prefixes, key)
+            if position < len(prefixes) and prefixes[position] == key:
+                start = offsets[position]
+                (length,) = struct.unpack_from("=H", self._strings, start)
+                return bytes(self._strings[start + 2 : start + 2 + length]).decode(
+                    "utf-8", "replace"
+                )
+        return None
+
+    def is_current(self, source: str) -> bool:
+        """Check whether the index was compiled from the current source file."""
+        try:
+            stat = os.stat(source)
+        except OSError:
+            return False
+        return (
+            stat.st_mtime_ns == self.source_mtime_ns
+            and stat.st_size == self.source_size
+        )
+
+
+def _open_mapped(path: Path) -> Optional[OuiIndex]:
+    """Memory-map an index file; None if it is missing or invalid."""
+    try:
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    try:
+        return OuiIndex(mapped)
+    except ValueError:
+        mapped.close()
+        return None
+
+
+def _write_index(path: Path, data: bytes) -> bool:
+    """Atomically replace the index file; False if it cannot be written."""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".oui-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            os.unlink(tmp_path)
+            raise
+        return True
+    except OSError as e:
+        logger.debug("Cannot write OUI index %s: %s", path, e)
+        return False
+
+
+def load_index(
+    source: str = IEEE_OUI_FILE, index_path: Path = INDEX_FILE
+) -> Optional[OuiIndex]:
+    """
+    Open the compiled index, recompiling it if the source file changed.
+
+    Args:
+        source: Path of the OUI file
+        index_path: Where the compiled index is kept
+
+    Returns:
+        OuiIndex, or None if the source file is not available
+    """
+    index = _open_mapped(index_path)
+    if index is not None and index.is_current(source):
+        return index
+    if not os.path.isfile(source):
+        return None
+
+    try:
+        data = compile_index(source)
+    except OSError as e:
+        logger.error("Failed to load IEEE OUI file %s: %s", source, e)
+        return None
+    if _write_index(index_path, data):
+        index = _open_mapped(index_path)
+        if index is not None:
+            logger.info("Compiled %d OUI entries into %s", index.entries, index_path)
+            return index
+    # Cache directory not writable: keep the compiled index in memory
+    return OuiIndex(data)
+
+
+_shared_lock = threading.Lock()
+_shared_index: Optional[OuiIndex] = None
+
+
+def get_oui_index(source: str = IEEE_OUI_FILE) -> Optional[OuiIndex]:
+    """
+    Return the process-wide OUI index, recompiling it if the source changed.
+
+    Args:
+        source: Path of the OUI file
+
+    Returns:
+        OuiIndex, or None if no OUI file is installed
+    """
+    global _shared_index
+    with _shared_lock:
+        if _shared_index is None or not _shared_index.is_current(source):
+            _shared_index = load_index(source)
+        return _shared_index
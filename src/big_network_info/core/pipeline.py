@@ -0,0 +1,98 @@
+"""
+Building blocks for the streaming scan pipeline.
+A concurrency budget shared by every scan stage, so stages running at
+the same time never exceed one global limit of outstanding probes.
+"""
+
+import concurrent.futures
+import threading
+from typing import Any, Callable, Optional
+
+
+class ConcurrencyBudget:
+    """Global limit on outstanding probes shared by all scan stages."""
+
+    def __init__(self, limit: int):
+        """
+        Initialize the budget.
+
+        Args:
+            limit: Maximum number of probes (sockets, lookups, subprocesses)
+                in flight at once across all stages
+        """
+        self.limit = max(1, limit)
+        self._in_use = 0
+        self._condition = threading.Condition()
+
+    @property
+    def in_use(self) -> int:
+        """Number of slots currently held."""
+        return self._in_use
+
+    def try_acquire(self) -> bool:
+        """Take a slot without waiting; return False if none is free."""
+        with self._condition:
+            if self._in_use >= self.limit:
+                return False
+            self._in_use += 1
+            return True
+
+    def acquire(self, stop_check: Optional[Callable[[], bool]] = None) -> bool:
+        """
+        Wait for a free slot.
+
+        Args:
+            stop_check: Optional callable returning True to give up waiting
+
+        Returns:
+            True if a slot was taken, False if the wait was aborted
+        """
+        with self._condition:
+            while self._in_use >= self.limit:
+                if stop_check and stop_check():
+                    return False
+                self._condition.wait(0.1)
+            self._in_use += 1
+            return True
+
+    def release(self) -> None:
+        """Return a slot to the budget."""
+        with self._condition:
+            if self._in_use > 0:
+                self._in_use -= 1
+            self._condition.notify()
+
+    def submit(
+        self,
+        executor: concurrent.futures.Executor,
+        fn: Callable[..., Any],
+        *args: Any,
+        stop_check: Optional[Callable[[], bool]] = None,
+        default: Any = None,
+    ) -> concurrent.futures.Future:
+        """
+        Run a blocking call on an executor while holding one budget slot.
+
+        The slot is taken inside the worker thread, so submitting never
+        blocks the caller.
+
+        Args:
+            executor: Executor that runs the call
+            fn: Callable to run
+            *args: Arguments for the callable
+            stop_check: Optional callable returning True to skip the call
+            default: Result returned when the call is skipped
+
+        Returns:
+            Future for the call's result
+        """
+
+        def run() -> Any:
+            if not self.acquire(stop_check):
+                return default
+            try:
+                return fn(*args)
+            finally:
+                self.release()
+
+        return executor.submit(run)
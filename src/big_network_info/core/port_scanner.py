@@ -0,0 +1,372 @@
+"""
+Event-loop driven TCP connect scanner.
+Keeps thousands of non-blocking connects in flight from a single thread.
+"""
+
+import errno
+import heapq
+import itertools
+import logging
+import resource
+import selectors
+import socket
+import struct
+import time
+from collections import defaultdict, deque
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from ..utils.network import address_family, socket_address
+from .pipeline import ConcurrencyBudget
+from .probe_ledger import ProbeLedger
+from .rate_control import RateController
+from .rtt import RttTable
+
+logger = logging.getLogger(__name__)
+
+PORT_OPEN = "open"
+PORT_CLOSED = "closed"
+PORT_FILTERED = "filtered"
+# UDP probe without any answer: the service may be silent or dropped
+PORT_OPEN_FILTERED = "open|filtered"
+
+# Descriptors kept free for the GUI, log files and other sockets
+_RESERVED_FDS = 64
+
+# SO_LINGER with a zero timeout makes close() send RST instead of FIN,
+# so finished probes never sit in TIME_WAIT
+_LINGER_RESET = struct.pack("ii", 1, 0)
+
+# Connect errors that mean a probe or its answer was lost on the way
+# (ICMP unreachable for a host known to be up, full local queues)
+_LOSS_ERRORS = frozenset(
+    (
+        errno.EHOSTUNREACH,
+        errno.ENETUNREACH,
+        errno.EHOSTDOWN,
+        errno.ENOBUFS,
+        errno.EAGAIN,
+    )
+)
+
+
+class ProbeResult(NamedTuple):
+    """Outcome of a single port probe."""
+
+    ip: str
+    port: int
+    state: str  # PORT_OPEN, PORT_CLOSED or PORT_FILTERED
+    rtt: float  # Milliseconds until the answer (or the timeout)
+
+
+def available_descriptors(wanted: int) -> int:
+    """
+    Return how many sockets may be open at once, raising the soft
+    RLIMIT_NOFILE towards the hard limit when more are wanted.
+
+    Args:
+        wanted: Desired number of simultaneous sockets
+
+    Returns:
+        Number of sockets that can safely be opened
+    """
+    try:
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        needed = wanted + _RESERVED_FDS
+        if soft != resource.RLIM_INFINITY and soft < needed:
+            target = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+            try:
+                resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+                soft = target
+            except (ValueError, OSError):
+                pass
+        if soft == resource.RLIM_INFINITY:
+            return wanted
+        return max(1, min(wanted, soft - _RESERVED_FDS))
+    except (ValueError, OSError):
+        return max(1, min(wanted, 256))
+
+
+class TcpConnectScanner:
+    """Non-blocking TCP connect scanner multiplexed with selectors."""
+
+    # Seconds between polls for new targets while the work feed is empty
+    IDLE_POLL_INTERVAL = 0.02
+
+    def __init__(
+        self,
+        timeout: float = 1.0,
+        max_in_flight: int = 2048,
+        stop_check: Optional[Callable[[], bool]] = None,
+        budget: Optional[ConcurrencyBudget] = None,
+        rtt: Optional[RttTable] = None,
+        rate: Optional[RateController] = None,
+        ledger: Optional[ProbeLedger] = None,
+    ):
+        """
+        Initialize the scanner.
+
+        Args:
+            timeout: Seconds to wait for a connect to complete
+            max_in_flight: Maximum simultaneous connection attempts
+            stop_check: Optional callable returning True when scanning should abort
+            budget: Optional concurrency budget shared with other scan stages;
+                every connect in flight holds one slot
+            rtt: Optional per-host RTT table; when given, each connect gets
+                its host's timeout instead of the fixed one, and every
+                answer or timeout is recorded in it
+            rate: Optional rate controller pacing the connects, capping
+                the connects in flight per host and told about answers
+                and losses
+            ledger: Optional probe ledger; targets it already holds are
+                answered from it without probing, and every new outcome
+                is recorded in it
+        """
+        self.timeout = max(0.05, timeout)
+        self.max_in_flight = max(1, max_in_flight)
+        self.stop_check = stop_check
+        self.budget = budget
+        self.rtt = rtt
+        self.rate = rate
+        self.ledger = ledger
+
+    def scan(self, targets: Iterable[Tuple[str, int]]) -> Iterator[ProbeResult]:
+        """
+        Probe (ip, port) pairs and yield results as they complete.
+
+        Targets are consumed lazily, so memory stays bounded by the
+        in-flight window rather than by the number of targets. A target
+        of None means "nothing to do yet" (see probe_plan.ProbeFeed); the
+        engine keeps servicing open connects and asks again shortly.
+
+        Args:
+            targets: Iterable of (ip, port) pairs, possibly interleaved with None
+
+        Yields:
+            ProbeResult for every target, in completion order
+        """
+        window = available_descriptors(self.max_in_flight)
+        selector = selectors.DefaultSelector()
+        # Heap of (deadline, sequence, socket); timeouts differ per host
+        deadlines: list = []
+        sequence = itertools.count()
+        rtt_table = self.rtt
+        rate = self.rate
+        per_host = rate.per_host if rate else window
+        # Connects in flight per host, targets waiting for one of those to
+        # finish, and targets whose host has a free slot again
+        host_load: Dict[str, int] = defaultdict(int)
+        deferred: Dict[str, deque] = {}
+        deferred_count = 0
+        ready: deque = deque()
+        source = iter(targets)
+        exhausted = False
+        budget = self.budget
+        ledger = self.ledger
+
+        def report(result: ProbeResult) -> ProbeResult:
+            if ledger is not None:
+                ledger.record(result.ip, result.port, "tcp", result.state, result.rtt)
+            return result
+
+        def finish(ip: str) -> None:
+            nonlocal deferred_count
+            if budget:
+                budget.release()
+            host_load[ip] -= 1
+            waiting = deferred.get(ip)
+            if waiting:
+                ready.append(waiting.popleft())
+                deferred_count -= 1
+                if not waiting:
+                    del deferred[ip]
+            if host_load[ip] <= 0:
+                del host_load[ip]
+
+        try:
+            while True:
+                if self.stop_check and self.stop_check():
+                    break
+
+                # Fill the window
+                idle = False
+                paced = False
+                while len(selector.get_map()) < window:
+                    if ready:
+                        target = ready.popleft()
+                    elif exhausted or deferred_count >= window:
+                        idle = not exhausted
+                        break
+                    else:
+                        try:
+                            target = next(source)
+                        except StopIteration:
+                            exhausted = True
+                            break
+                        if target is None:
+                            idle = True
+                            break
+                        known = None
+                        if ledger is not None:
+                            known = ledger.get(*target, "tcp")
+                        if known:
+                            # Probed by an earlier stage of the scan
+                            yield ProbeResult(*target, known.state, known.rtt)
+                            continue
+                    ip, port = target
+                    if host_load[ip] >= per_host:
+                        deferred.setdefault(ip, deque()).append(target)
+                        deferred_count += 1
+                        continue
+                    if rate and not rate.try_take():
+                        ready.appendleft(target)
+                        paced = True
+                        break
+                    if budget and not budget.try_acquire():
+                        ready.appendleft(target)
+                        idle = True
+                        break
+
+                    timeout = rtt_table.timeout(ip) if rtt_table else self.timeout
+                    started = time.monotonic()
+                    sock = self._start_connect(ip, port)
+                    if isinstance(sock, ProbeResult):
+                        if budget:
+                            budget.release()
+                        if sock.state == PORT_FILTERED:
+                            # Local or ICMP error
+                            if rate:
+                                rate.on_loss()
+                        else:
+                            if rtt_table:
+                                rtt_table.answered(
+                                    ip, 0.0, refused=sock.state == PORT_CLOSED
+                                )
+                            if rate:
+                                rate.on_answer()
+                        yield report(sock)
+                        continue
+                    host_load[ip] += 1
+                    selector.register(
+                        sock, selectors.EVENT_WRITE, (ip, port, started, timeout)
+                    )
+                    heapq.heappush(
+                        deadlines, (started + timeout, next(sequence), sock)
+                    )
+
+                if exhausted and not ready and not selector.get_map():
+                    break
+
+                wait = rtt_table.ceiling if rtt_table else self.timeout
+                if deadlines:
+                    wait = max(0.0, deadlines[0][0] - time.monotonic())
+                if paced:
+                    wait = min(wait, rate.wait_time())
+                if idle or (not exhausted and not selector.get_map()):
+                    # Waiting for new targets or for budget held by other stages
+                    wait = min(wait, self.IDLE_POLL_INTERVAL)
+
+                for key, _events in selector.select(wait):
+                    ip, port, started, _timeout = key.data
+                    sock = key.fileobj
+                    err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                    elapsed = time.monotonic() - started
+                    rtt = elapsed * 1000.0
+                    selector.unregister(sock)
+                    self._close(sock)
+                    finish(ip)
+                    if err in (0, errno.ECONNREFUSED):
+                        if rtt_table:
+                            rtt_table.answered(
+                                ip, elapsed, refused=err == errno.ECONNREFUSED
+                            )
+                        if rate:
+                            rate.on_answer()
+                    elif rate and err in _LOSS_ERRORS:
+                        rate.on_loss()
+                    if err == 0:
+                        yield report(ProbeResult(ip, port, PORT_OPEN, rtt))
+                    elif err == errno.ECONNREFUSED:
+                        yield report(ProbeResult(ip, port, PORT_CLOSED, rtt))
+                    else:
+                        yield report(ProbeResult(ip, port, PORT_FILTERED, rtt))
+
+                # Expire connects that exceeded the timeout
+                now = time.monotonic()
+                while deadlines and deadlines[0][0] <= now:
+                    _deadline, _sequence, sock = heapq.heappop(deadlines)
+                    if sock.fileno() == -1:
+                        continue
+                    try:
+                        key = selector.unregister(sock)
+                    except (KeyError, ValueError):
+                        continue
+                    self._close(sock)
+                    ip, port, _started, timeout = key.data
+                    finish(ip)
+                    if rtt_table:
+                        # A host that resets closed ports should have
+                        # answered; one that drops them is just firewalled
+                        if rate and rtt_table.sends_resets(ip):
+                            rate.on_loss()
+                        rtt_table.timed_out(ip)
+                    yield report(
+                        ProbeResult(ip, port, PORT_FILTERED, timeout * 1000.0)
+                    )
+
+                # Drop deadlines of sockets that already completed
+                while deadlines and deadlines[0][2].fileno() == -1:
+                    heapq.heappop(deadlines)
+
+        finally:
+            for key in list(selector.get_map().values()):
+                self._close(key.fileobj)
+                if budget:
+                    budget.release()
+            selector.close()
+
+    def check(self, ip: str, port: int) -> bool:
+        """Probe a single port and return True if it accepted the connection."""
+        for result in self.scan([(ip, port)]):
+            return result.state == PORT_OPEN
+        return False
+
+    def _start_connect(self, ip: str, port: int):
+        """Start a non-blocking connect, returning the socket or an immediate result."""
+        try:
+            sock = socket.socket(address_family(ip), socket.SOCK_STREAM)
+        except OSError as e:
+            logger.debug("Cannot create socket for %s:%s: %s", ip, port, e)
+            return ProbeResult(ip, port, PORT_FILTERED, 0.0)
+
+        sock.setblocking(False)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, _LINGER_RESET)
+        except OSError:
+            pass
+
+        err = sock.connect_ex(socket_address(ip, port))
+        if err in (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY):
+            return sock
+
+        self._close(sock)
+        if err == 0:
+            return ProbeResult(ip, port, PORT_OPEN, 0.0)
+        if err == errno.ECONNREFUSED:
+            return ProbeResult(ip, port, PORT_CLOSED, 0.0)
+        return ProbeResult(ip, port, PORT_FILTERED, 0.0)
+
+    @staticmethod
+    def _close(sock: socket.socket) -> None:
+        """Close a probe socket, ignoring errors."""
+        try:
+            sock.close()
+        except OSError:
+            pass
@@ -0,0 +1,58 @@
+"""
+Per-scan record of port probe outcomes.
+Every stage that probes a port writes the outcome here and checks here
+first, so no (host, port, protocol) is probed twice in one scan.
+"""
+
+import threading
+from typing import Dict, NamedTuple, Optional, Tuple
+
+
+class LedgerEntry(NamedTuple):
+    """Outcome of one probe."""
+
+    state: str  # port_scanner.PORT_OPEN, PORT_CLOSED or PORT_FILTERED
+    rtt: float  # Milliseconds until the answer (or the timeout)
+
+
+class ProbeLedger:
+    """Thread-safe map of (ip, port, protocol) to the probe's outcome."""
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, int, str], LedgerEntry] = {}
+        self._lock = threading.Lock()
+
+    def get(self, ip: str, port: int, protocol: str) -> Optional[LedgerEntry]:
+        """
+        Return the outcome of an earlier probe.
+
+        Args:
+            ip: Host address
+            port: Port number
+            protocol: 'tcp' or 'udp'
+
+        Returns:
+            LedgerEntry, or None if the port was not probed yet
+        """
+        with self._lock:
+            return self._entries.get((ip, port, protocol))
+
+    def record(
+        self, ip: str, port: int, protocol: str, state: str, rtt: float = 0.0
+    ) -> None:
+        """
+        Store the outcome of a probe; the first outcome recorded stays.
+
+        Args:
+            ip: Host address
+            port: Port number
+            protocol: 'tcp' or 'udp'
+            state: PORT_OPEN, PORT_CLOSED or PORT_FILTERED
+            rtt: Milliseconds until the answer (or the timeout)
+        """
+        with self._lock:
+            self._entries.setdefault((ip, port, protocol), LedgerEntry(state, rtt))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
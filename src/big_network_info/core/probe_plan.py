@@ -0,0 +1,148 @@
+"""
+Probe plan for port scanning.
+Collapses the configured services into unique (port, protocol) probes,
+orders them by how likely they are to be open, and generates host x port
+targets lazily, interleaving hosts, for the connect engine.
+"""
+
+import threading
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .services import ServiceInfo
+
+# TCP ports in the order they are most often found open (after nmap's
+# port frequency table, with services common on home networks moved up).
+# Ports not listed are probed afterwards in numeric order.
+# fmt: off
+TCP_PORT_LIKELIHOOD = (
+    80, 443, 22, 445, 139, 8080, 53, 3389, 21, 23,
+    5000, 8000, 8443, 5900, 631, 9100, 554, 1883, 3000, 25,
+    110, 143, 3306, 993, 995, 465, 8081, 8888, 5357, 548,
+    135, 111, 2049, 5555, 8008, 8001, 3001, 5432, 6379, 27017,
+    8883, 990, 2222, 2221,
+)
+# fmt: on
+
+# UDP ports in the order they are most often found open
+UDP_PORT_LIKELIHOOD = (53, 137, 123, 161, 67, 5353, 1900, 500, 138, 514)
+
+
+def _ordered(ports: Iterable[int], likelihood: Tuple[int, ...]) -> List[int]:
+    """Sort ports by likelihood rank, unranked ports last by number."""
+    rank = {port: index for index, port in enumerate(likelihood)}
+    return sorted(ports, key=lambda port: (rank.get(port, len(rank)), port))
+
+
+class ProbePlan:
+    """
+    Unique probes for a list of services.
+
+    Services sharing a port and protocol (e.g. "HTTP Alt" and "Django Dev"
+    on 8080) become one probe; services_for() returns every service an
+    open port stands for.
+    """
+
+    def __init__(self, services: Iterable[ServiceInfo]):
+        """
+        Compile the plan.
+
+        Args:
+            services: Services to check on every host
+        """
+        self._services: Dict[Tuple[int, str], List[ServiceInfo]] = {}
+        for service in services:
+            key = (service.port, service.protocol.lower())
+            labels = self._services.setdefault(key, [])
+            if service not in labels:
+                labels.append(service)
+
+        self.tcp_ports: List[int] = _ordered(
+            (port for port, protocol in self._services if protocol == "tcp"),
+            TCP_PORT_LIKELIHOOD,
+        )
+        self.udp_ports: List[int] = _ordered(
+            (port for port, protocol in self._services if protocol == "udp"),
+            UDP_PORT_LIKELIHOOD,
+        )
+
+    def services_for(self, port: int, protocol: str) -> List[ServiceInfo]:
+        """
+        Return the services an open port stands for.
+
+        Args:
+            port: Port number
+            protocol: 'tcp' or 'udp'
+
+        Returns:
+            Services using the port, in configuration order
+        """
+        return self._services.get((port, protocol.lower()), [])
+
+    def __len__(self) -> int:
+        """Number of probes per host."""
+        return len(self._services)
+
+
+class ProbeFeed:
+    """
+    Host x port targets generated on demand for the connect engine.
+
+    Hosts are added as they are discovered. Up to max_active hosts are in
+    rotation at once and each turn hands out the next port of the next
+    host, so consecutive probes go to different hosts and every host
+    finishes without waiting for the whole range. Only one cursor per
+    host is held, never the full product of hosts and ports.
+
+    Iterating yields (ip, port) targets, yields None while no target is
+    ready but hosts may still be added (so a non-blocking engine can
+    service its open probes and ask again), and stops once the feed is
+    closed and drained.
+    """
+
+    def __init__(self, ports: Iterable[int], max_active: int = 256):
+        """
+        Initialize an open, empty feed.
+
+        Args:
+            ports: Ports to probe on every host, in probing order
+            max_active: Hosts whose ports are handed out concurrently
+        """
+        self.ports = list(ports)
+        self.max_active = max(1, max_active)
+        self._waiting: deque = deque()
+        # [ip, index of the next port]
+        self._active: deque = deque()
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def add_host(self, ip: str) -> None:
+        """Queue every port of a host."""
+        if self.ports:
+            with self._lock:
+                self._waiting.append(ip)
+
+    def close(self) -> None:
+        """Signal that no more hosts will be added."""
+        with self._lock:
+            self._closed = True
+
+    def _next_locked(self) -> Optional[Tuple[str, int]]:
+        while self._waiting and len(self._active) < self.max_active:
+            self._active.append([self._waiting.popleft(), 0])
+        if not self._active:
+            return None
+        entry = self._active.popleft()
+        target = (entry[0], self.ports[entry[1]])
+        entry[1] += 1
+        if entry[1] < len(self.ports):
+            self._active.append(entry)
+        return target
+
+    def __iter__(self) -> Iterator[Optional[Tuple[str, int]]]:
+        while True:
+            with self._lock:
+                target = self._next_locked()
+                if target is None and self._closed:
+                    return
+            yield target
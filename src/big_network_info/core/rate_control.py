@@ -0,0 +1,190 @@
+"""
+Probe rate control shared by every scan stage.
+A token bucket paces probes, an additive-increase/multiplicative-decrease
+loop adapts the rate to loss signals, and per-host caps keep any single
+device from seeing a burst of simultaneous probes.
+"""
+
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, NamedTuple, Optional
+
+
+class ScanProfile(NamedTuple):
+    """Probe limits for one politeness level."""
+
+    name: str
+    rate: float  # Initial probes per second
+    min_rate: float  # The rate never drops below this
+    max_rate: float  # ...nor grows beyond this
+    burst: int  # Probes that may be sent back to back
+    per_host: int  # Probes in flight to a single host
+    window: int  # Probes in flight across all hosts
+    threads: int  # Worker threads for blocking probes
+
+
+PROFILE_GENTLE = "gentle"
+PROFILE_NORMAL = "normal"
+PROFILE_AGGRESSIVE = "aggressive"
+
+PROFILES: Dict[str, ScanProfile] = {
+    PROFILE_GENTLE: ScanProfile(PROFILE_GENTLE, 200, 20, 500, 10, 2, 64, 16),
+    PROFILE_NORMAL: ScanProfile(PROFILE_NORMAL, 1000, 100, 5000, 50, 6, 1024, 64),
+    PROFILE_AGGRESSIVE: ScanProfile(
+        PROFILE_AGGRESSIVE, 5000, 500, 20000, 200, 16, 4096, 255
+    ),
+}
+
+
+def get_scan_profile(name: str) -> ScanProfile:
+    """Return a profile by name, the normal one for unknown names."""
+    return PROFILES.get(name, PROFILES[PROFILE_NORMAL])
+
+
+class RateController:
+    """
+    Token-bucket pacing with AIMD rate adjustment and per-host caps.
+
+    Outcomes are tallied per adjustment interval. An interval in which
+    losses (probes that should have been answered but timed out, ICMP
+    errors, full send queues) make up more than loss_threshold of the
+    outcomes halves the rate; any other interval with answers raises it
+    by a tenth of the initial rate.
+    """
+
+    # Seconds between rate adjustments
+    ADJUST_INTERVAL = 0.5
+
+    def __init__(
+        self,
+        profile: ScanProfile,
+        loss_threshold: float = 0.1,
+        decrease: float = 0.5,
+    ):
+        """
+        Initialize the controller.
+
+        Args:
+            profile: Limits to enforce
+            loss_threshold: Fraction of lost probes per interval that
+                counts as congestion
+            decrease: Factor applied to the rate on congestion
+        """
+        self.profile = profile
+        self.per_host = max(1, profile.per_host)
+        self.loss_threshold = loss_threshold
+        self.decrease = decrease
+        self.increase = max(1.0, profile.rate / 10.0)
+        self._rate = float(profile.rate)
+        self._tokens = float(profile.burst)
+        self._refilled_at = time.monotonic()
+        self._interval_start = self._refilled_at
+        self._answers = 0
+        self._losses = 0
+        self._hosts: Dict[str, int] = defaultdict(int)
+        self._condition = threading.Condition()
+
+    @property
+    def rate(self) -> float:
+        """Current probes per second."""
+        return self._rate
+
+    def _refill_locked(self, now: float) -> None:
+        self._tokens = min(
+            float(self.profile.burst),
+            self._tokens + (now - self._refilled_at) * self._rate,
+        )
+        self._refilled_at = now
+
+    def try_take(self) -> bool:
+        """Take a send token without waiting; False if none is available."""
+        with self._condition:
+            self._refill_locked(time.monotonic())
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+    def wait_time(self) -> float:
+        """Return the seconds until the next send token is available."""
+        with self._condition:
+            self._refill_locked(time.monotonic())
+            if self._tokens >= 1.0:
+                return 0.0
+            return (1.0 - self._tokens) / self._rate
+
+    def take(self, stop_check: Optional[Callable[[], bool]] = None) -> bool:
+        """
+        Wait for a send token.
+
+        Args:
+            stop_check: Optional callable returning True to give up waiting
+
+        Returns:
+            True if a token was taken, False if the wait was aborted
+        """
+        while not self.try_take():
+            if stop_check and stop_check():
+                return False
+            time.sleep(min(self.wait_time(), 0.1))
+        return True
+
+    def acquire(self, ip: str, stop_check: Optional[Callable[[], bool]] = None) -> bool:
+        """
+        Wait for a free slot on a host, then for a send token.
+
+        Blocking probes (run on worker threads) call this before probing
+        and release() afterwards.
+
+        Args:
+            ip: Host about to be probed
+            stop_check: Optional callable returning True to give up waiting
+
+        Returns:
+            True if the probe may be sent, False if the wait was aborted
+        """
+        with self._condition:
+            while self._hosts[ip] >= self.per_host:
+                if stop_check and stop_check():
+                    return False
+                self._condition.wait(0.1)
+            self._hosts[ip] += 1
+        if self.take(stop_check):
+            return True
+        self.release(ip)
+        return False
+
+    def release(self, ip: str) -> None:
+        """Return a host slot taken by acquire()."""
+        with self._condition:
+            if self._hosts[ip] <= 1:
+                self._hosts.pop(ip, None)
+            else:
+                self._hosts[ip] -= 1
+            self._condition.notify_all()
+
+    def on_answer(self) -> None:
+        """Record a probe that got an answer."""
+        with self._condition:
+            self._answers += 1
+            self._adjust_locked(time.monotonic())
+
+    def on_loss(self) -> None:
+        """Record a lost probe or an ICMP/local send error."""
+        with self._condition:
+            self._losses += 1
+            self._adjust_locked(time.monotonic())
+
+    def _adjust_locked(self, now: float) -> None:
+        if now - self._interval_start < self.ADJUST_INTERVAL:
+            return
+        outcomes = self._answers + self._losses
+        self._refill_locked(now)
+        if self._losses and self._losses > outcomes * self.loss_threshold:
+            self._rate = max(self.profile.min_rate, self._rate * self.decrease)
+        elif self._answers:
+            self._rate = min(self.profile.max_rate, self._rate + self.increase)
+        self._answers = 0
+        self._losses = 0
+        self._interval_start = now
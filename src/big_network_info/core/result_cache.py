@@ -0,0 +1,177 @@
+"""
+Persistent cache of lookup results.
+Keeps vendor, hostname and NetBIOS answers in an SQLite database under
+~/.cache/big-network-info so repeat scans and restarts skip the lookups.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILE = Path.home() / ".cache" / "big-network-info" / "results.sqlite"
+
+# Entry kinds and how long their answers stay valid (seconds). Negative
+# entries ("looked up, nothing found") expire sooner than positive ones.
+KIND_HOSTNAME = "hostname"  # keyed by MAC, or by IP when the MAC is unknown
+KIND_NETBIOS = "netbios"  # keyed like hostnames; value "name\tworkgroup\tmac"
+KIND_VENDOR = "vendor"  # online vendor lookups, keyed by OUI
+
+TTLS = {
+    KIND_HOSTNAME: (6 * 3600, 15 * 60),
+    KIND_NETBIOS: (6 * 3600, 15 * 60),
+    KIND_VENDOR: (30 * 86400, 86400),
+}
+
+# Access times are only rewritten when older than this, so cache hits
+# rarely cost a write
+_TOUCH_INTERVAL = 3600.0
+
+
+class CacheHit(NamedTuple):
+    """A cached answer; value is None for a cached negative answer."""
+
+    value: Optional[str]
+
+
+class ResultCache:
+    """
+    SQLite-backed cache with per-entry TTLs and an LRU size limit.
+
+    Thread-safe; one connection is shared under a lock. When the cache
+    file cannot be opened the cache lives in memory for the process.
+    """
+
+    def __init__(self, path: Path = CACHE_FILE, max_entries: int = 20000):
+        """
+        Open (or create) the cache.
+
+        Args:
+            path: Database file
+            max_entries: Entries kept before the least recently used go
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes = 0
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = self._connect(str(path))
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("Cannot open result cache %s, using memory: %s", path, e)
+            self._db = self._connect(":memory:")
+
+    @staticmethod
+    def _connect(target: str) -> sqlite3.Connection:
+        """Open the database and create the schema."""
+        db = sqlite3.connect(target, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " kind TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " value TEXT,"
+            " expires REAL NOT NULL,"
+            " accessed REAL NOT NULL,"
+            " PRIMARY KEY (kind, key)) WITHOUT ROWID"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        return db
+
+    def get(self, kind: str, key: str) -> Optional[CacheHit]:
+        """
+        Return a live entry.
+
+        Args:
+            kind: Entry kind (KIND_*)
+            key: Entry key
+
+        Returns:
+            CacheHit, or None if there is no unexpired entry
+        """
+        now = time.time()
+        with self._lock:
+            try:
+                row = self._db.execute(
+                    "SELECT value, expires, accessed FROM entries"
+                    " WHERE kind = ? AND key = ?",
+                    (kind, key),
+                ).fetchone()
+                if row is None or row[1] <= now:
+                    return None
+                if now - row[2] > _TOUCH_INTERVAL:
+                    self._db.execute(
+                        "UPDATE entries SET accessed = ? WHERE kind = ? AND key = ?",
+                        (now, kind, key),
+                    )
+            except sqlite3.Error as e:
+                logger.debug("Result cache read failed: %s", e)
+                return None
+        return CacheHit(row[0])
+
+    def put(
+        self, kind: str, key: str, value: Optional[str], ttl: Optional[float] = None
+    ) -> None:
+        """
+        Store an answer.
+
+        Args:
+            kind: Entry kind (KIND_*)
+            key: Entry key
+            value: Answer, or None to cache that there is none
+            ttl: Seconds the entry stays valid (default: the kind's TTL)
+        """
+        if ttl is None:
+            positive, negative = TTLS.get(kind, (3600, 600))
+            ttl = positive if value is not None else negative
+        now = time.time()
+        with self._lock:
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                    (kind, key, value, now + ttl, now),
+                )
+                self._writes += 1
+                if self._writes % 256 == 0:
+                    self._prune_locked(now)
+            except sqlite3.Error as e:
+                logger.debug("Result cache write failed: %s", e)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            try:
+                self._db.execute("DELETE FROM entries")
+            except sqlite3.Error as e:
+                logger.debug("Result cache clear failed: %s", e)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def _prune_locked(self, now: float) -> None:
+        """Drop expired entries, then the least recently used beyond the limit."""
+        self._db.execute("DELETE FROM entries WHERE expires <= ?", (now,))
+        self._db.execute(
+            "DELETE FROM entries WHERE (kind, key) IN (SELECT kind, key FROM entries"
+            " ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+
+_shared_lock = threading.Lock()
+_shared_cache: Optional[ResultCache] = None
+
+
+def get_result_cache() -> ResultCache:
+    """Return the process-wide result cache, opening it on first use."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = ResultCache()
+        return _shared_cache
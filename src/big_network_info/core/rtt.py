@@ -0,0 +1,188 @@
+"""
+Per-host round-trip time estimates.
+Smoothed RTT and RTT variance (RFC 6298) per host, fed from ping replies
+and answered probes, give every probe a timeout fitted to its host instead
+of one fixed timeout for the whole scan.
+"""
+
+import threading
+from typing import Dict, Optional
+
+# RFC 6298 gains
+_ALPHA = 0.125
+_BETA = 0.25
+# Variance multiplier in the timeout (srtt + K * rttvar)
+_K = 4.0
+
+
+class HostRtt:
+    """RTT state of one host."""
+
+    __slots__ = (
+        "srtt",
+        "rttvar",
+        "samples",
+        "answers",
+        "resets",
+        "silent",
+        "filtered",
+    )
+
+    def __init__(self):
+        self.srtt: Optional[float] = None  # Seconds
+        self.rttvar = 0.0
+        self.samples = 0
+        self.answers = 0  # Probes the host answered (open or closed)
+        self.resets = 0  # Probes refused with a reset (closed ports)
+        self.silent = 0  # Consecutive probes without an answer
+        self.filtered = False
+
+    def add_sample(self, rtt: float) -> None:
+        """Fold one round-trip time (seconds) into the estimate."""
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2.0
+        else:
+            self.rttvar = (1 - _BETA) * self.rttvar + _BETA * abs(self.srtt - rtt)
+            self.srtt = (1 - _ALPHA) * self.srtt + _ALPHA * rtt
+        self.samples += 1
+
+
+class RttTable:
+    """
+    Thread-safe RTT estimates and probe timeouts for the hosts of a scan.
+
+    A host without samples gets the initial timeout. Once it has answered,
+    its timeout is srtt + 4 * rttvar, kept between the floor and the
+    ceiling. A host that has never answered a probe and lets
+    filtered_after probes in a row time out is considered filtered; its
+    remaining probes get a fraction of the timeout, since they are
+    expected to time out as well.
+    """
+
+    def __init__(
+        self,
+        initial: float = 1.0,
+        floor: float = 0.1,
+        ceiling: float = 2.0,
+        filtered_after: int = 6,
+        filtered_factor: float = 0.25,
+    ):
+        """
+        Initialize the table.
+
+        Args:
+            initial: Timeout in seconds for hosts without samples
+            floor: Shortest timeout in seconds
+            ceiling: Longest timeout in seconds
+            filtered_after: Unanswered probes in a row that mark a silent
+                host as filtered
+            filtered_factor: Fraction of the regular timeout used for
+                filtered hosts
+        """
+        self.floor = floor
+        self.ceiling = max(floor, ceiling)
+        self.initial = min(max(initial, self.floor), self.ceiling)
+        self.filtered_after = max(1, filtered_after)
+        self.filtered_factor = filtered_factor
+        self._hosts: Dict[str, HostRtt] = {}
+        self._lock = threading.Lock()
+
+    def _host(self, ip: str) -> HostRtt:
+        host = self._hosts.get(ip)
+        if host is None:
+            host = self._hosts[ip] = HostRtt()
+        return host
+
+    def add_sample(self, ip: str, rtt: float) -> None:
+        """
+        Record a round-trip time that did not involve the probe (a ping).
+
+        Args:
+            ip: Host address
+            rtt: Round-trip time in seconds
+        """
+        if rtt <= 0:
+            return
+        with self._lock:
+            self._host(ip).add_sample(rtt)
+
+    def answered(self, ip: str, rtt: float, refused: bool = False) -> None:
+        """
+        Record a probe the host answered (connect accepted or refused).
+
+        Args:
+            ip: Host address
+            rtt: Seconds until the answer
+            refused: Whether the answer was a reset (closed port)
+        """
+        with self._lock:
+            host = self._host(ip)
+            if rtt > 0:
+                host.add_sample(rtt)
+            host.answers += 1
+            if refused:
+                host.resets += 1
+            host.silent = 0
+            host.filtered = False
+
+    def timed_out(self, ip: str) -> None:
+        """
+        Record a probe that got no answer within its timeout.
+
+        Timeouts carry no RTT sample (Karn's algorithm); they only count
+        towards the filtered-host detection.
+
+        Args:
+            ip: Host address
+        """
+        with self._lock:
+            host = self._host(ip)
+            host.silent += 1
+            if not host.answers and host.silent >= self.filtered_after:
+                host.filtered = True
+
+    def is_filtered(self, ip: str) -> bool:
+        """Check whether a host has let all its probes time out."""
+        with self._lock:
+            host = self._hosts.get(ip)
+            return bool(host and host.filtered)
+
+    def sends_resets(self, ip: str) -> bool:
+        """
+        Check whether a host answers closed ports with resets.
+
+        Probes to such a host are not expected to time out, so a timeout
+        is a sign of loss rather than of a firewall dropping the probe.
+        """
+        with self._lock:
+            host = self._hosts.get(ip)
+            return bool(host and host.resets)
+
+    def srtt(self, ip: str) -> Optional[float]:
+        """Return the smoothed RTT of a host in seconds, None without samples."""
+        with self._lock:
+            host = self._hosts.get(ip)
+            return host.srtt if host else None
+
+    def timeout(self, ip: str) -> float:
+        """
+        Return the timeout for the next probe to a host.
+
+        Args:
+            ip: Host address
+
+        Returns:
+            Timeout in seconds
+        """
+        with self._lock:
+            host = self._hosts.get(ip)
+            if host is None:
+                return self.initial
+            if host.srtt is None:
+                value = self.initial
+            else:
+                value = host.srtt + _K * host.rttvar
+            if host.filtered:
+                value *= self.filtered_factor
+        return min(max(value, self.floor), self.ceiling)
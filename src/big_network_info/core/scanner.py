@@ -3,18 +3,65 @@ Network scanner implementation using standard sockets.
 Provides host discovery and port scanning functionality without requiring privileges.
 """
 
+import errno
 import ipaddress
 import socket
 import concurrent.futures
-from typing import List, Dict, Optional, Callable
+from typing import Any, List, Dict, Optional, Callable, Iterator, Tuple
 from dataclasses import dataclass
+import dataclasses
 import logging
+import queue
 import time
+import itertools
+import contextlib
+import threading
 import subprocess
 from ..gui.translation import _
+from ..utils.network import (
+    IPRange,
+    address_family,
+    get_onlink_range,
+    ip_to_int,
+    socket_address,
+)
 
 # Import AppConfig for fallback defaults
 from .config import AppConfig
+from .arp_sweep import ArpInterface, ArpSweeper, find_arp_interface
+from .ipv6_discovery import Ipv6Neighbor, discover_ipv6_neighbors
+from .icmp import IcmpPinger
+from .hostname_resolver import (
+    DnsNameSource,
+    HostnameResolver,
+    MdnsNameSource,
+    NetbiosNameSource,
+)
+from .device_classifier import get_device_classifier
+from .local_names import LocalNameIndex, normalize_mac
+from .oui_index import get_oui_index
+from .result_cache import (
+    KIND_HOSTNAME,
+    KIND_NETBIOS,
+    KIND_VENDOR,
+    get_result_cache,
+)
+from .vendor_lookup import OnlineVendorLookup, oui_of
+from .netbios import NetbiosName, NetbiosResolver
+from .neighbors import prime_neighbors, read_neighbor_table
+from .port_scanner import (
+    TcpConnectScanner,
+    PORT_CLOSED,
+    PORT_FILTERED,
+    PORT_OPEN,
+)
+from .probe_ledger import ProbeLedger
+from .rtt import RttTable
+from .rate_control import RateController, get_scan_profile
+from .pipeline import ConcurrencyBudget
+from .probe_plan import ProbeFeed, ProbePlan
+from .syn_scanner import SynScanner, raw_sockets_available
+from .udp_scanner import UdpScanner
 
 try:
     from .services import ServiceInfo, COMMON_SERVICES
@@ -38,11 +85,54 @@ class ScanResult:
     services: List[ServiceInfo]
     response_time: float
     is_alive: bool
+    workgroup: str = ""  # NetBIOS workgroup/domain of Windows and Samba hosts
+    filtered: bool = False  # Every port probe timed out (firewalled host)
+    # Further IPv6 addresses of the device (link-local ones with a %zone)
+    ipv6_addresses: List[str] = dataclasses.field(default_factory=list)
+
+
+# Kinds of incremental scan events (see NetworkScanner.scan_network_iter)
+SCAN_EVENT_ADDED = "added"
+SCAN_EVENT_UPDATED = "updated"
+SCAN_EVENT_COMPLETED = "completed"
+
+
+@dataclass
+class ScanEvent:
+    """A change to one host's result during an incremental scan."""
+
+    kind: str  # SCAN_EVENT_ADDED, SCAN_EVENT_UPDATED or SCAN_EVENT_COMPLETED
+    result: ScanResult
 
 
 class NetworkScanner:
     """Professional network scanner using standard sockets."""
 
+    # Minimum seconds between ARP table reads while hosts stream in
+    ARP_REFRESH_INTERVAL = 0.1
+
+    # Addresses primed per batch (kept below the default gc_thresh3 of 1024
+    # so the kernel neighbor table does not start evicting entries) and the
+    # time given to ARP replies before the table is read
+    PRIMING_CHUNK_SIZE = 512
+    PRIMING_SETTLE_TIME = 0.3
+
+    # Seconds an ARP sweep waits for each reply (devices on the link answer
+    # within milliseconds)
+    ARP_SWEEP_TIMEOUT = 0.5
+
+    # Seconds the IPv6 all-nodes echo collects replies
+    IPV6_ECHO_WAIT = 0.5
+
+    # Seconds a finished scan still waits for online vendor answers
+    VENDOR_LOOKUP_GRACE = 3.0
+
+    # Bounds of the per-host probe timeouts: the shortest timeout in
+    # seconds, and the longest as a multiple of scan_timeout (slow
+    # wireless clients may need more than the configured value)
+    RTT_TIMEOUT_FLOOR = 0.1
+    RTT_TIMEOUT_CEILING_FACTOR = 2.0
+
     def __init__(
         self,
         progress_callback: Optional[Callable[[str, float], None]] = None,
@@ -65,17 +155,23 @@ class NetworkScanner:
             self.ping_timeout = config.ping_timeout
             self.ping_attempts = config.ping_attempts
             self.hostname_timeout = config.hostname_timeout
-            self.discovery_threads = config.discovery_threads
             self.scan_timeout = config.scan_timeout
             self.scan_threads = config.scan_threads
+            self.scan_window = config.scan_window
+            self.scan_profile = config.scan_profile
+            self.use_privileged_scan = config.use_privileged_scan
+            self.offline_mode = config.offline_mode
         else:
             # Default values if no config manager
             self.ping_timeout = 2.0
             self.ping_attempts = 2
             self.hostname_timeout = 0.5
-            self.discovery_threads = AppConfig.default().discovery_threads
             self.scan_timeout = AppConfig.default().scan_timeout
             self.scan_threads = AppConfig.default().scan_threads
+            self.scan_window = AppConfig.default().scan_window
+            self.scan_profile = AppConfig.default().scan_profile
+            self.use_privileged_scan = AppConfig.default().use_privileged_scan
+            self.offline_mode = AppConfig.default().offline_mode
 
         # Add hostname resolution cache
         self.hostname_cache = {}
@@ -83,26 +179,50 @@ class NetworkScanner:
         # Add vendor information cache for better performance
         self.vendor_cache = {}
 
-        # Cache avahi availability to avoid repeated checks
-        self._avahi_available = None
+        # Answers kept on disk across scans and restarts, shared process-wide
+        self.result_cache = get_result_cache()
+
+        # Round-trip times (ms) measured during the last discovery
+        self._response_times: Dict[str, float] = {}
+
+        # Per-host RTT estimates and probe timeouts of the scan in progress
+        self._rtt: Optional[RttTable] = None
+
+        # Names from /etc/hosts, /etc/ethers and local DHCP leases
+        self.local_names = LocalNameIndex()
+
+        # Hostname resolver shared by the lookups of the scan in progress
+        self._names: Optional[HostnameResolver] = None
+
+        # What Windows/Samba hosts reported over NetBIOS/LLMNR (None: no reply)
+        self.netbios_cache: Dict[str, Optional[NetbiosName]] = {}
+
+        # Worker pool, concurrency budget and probe rate of the scan in progress
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._budget: Optional[ConcurrencyBudget] = None
+        self._rate: Optional[RateController] = None
+        # Outcome of every port probe of the scan in progress
+        self._ledger: Optional[ProbeLedger] = None
+        self._progress_floor = 0.0
 
         self._update_progress(
             _("Scanner initialized (socket-based mode)"),
             0,
         )
 
-        # Log available hostname resolution methods
-        avahi_available = self._is_avahi_available()
-        if avahi_available:
-            logging.info(
-                _(
-                    "Avahi-resolve available - enhanced local device name resolution enabled"
-                )
-            )
-        else:
-            logging.debug(
-                _("Avahi-resolve not available - using standard DNS resolution only")
-            )
+    def _refresh_config(self) -> None:
+        """Reload scan settings in case they changed since the scanner was created."""
+        if self.config_manager:
+            cfg = self.config_manager.config
+            self.ping_timeout = cfg.ping_timeout
+            self.ping_attempts = cfg.ping_attempts
+            self.hostname_timeout = cfg.hostname_timeout
+            self.scan_timeout = cfg.scan_timeout
+            self.scan_threads = cfg.scan_threads
+            self.scan_window = cfg.scan_window
+            self.scan_profile = cfg.scan_profile
+            self.use_privileged_scan = cfg.use_privileged_scan
+            self.offline_mode = cfg.offline_mode
 
     def stop_scan(self) -> None:
         """Stop the current scanning operation."""
@@ -110,9 +230,49 @@ class NetworkScanner:
 
     def _update_progress(self, message: str, percentage: float) -> None:
         """Update scan progress if callback is provided."""
+        # Pipelined stages report interleaved; never move the bar backwards
+        percentage = max(percentage, self._progress_floor)
+        self._progress_floor = percentage
         if self.progress_callback:
             self.progress_callback(message, percentage)
 
+    @contextlib.contextmanager
+    def _scan_pool(self) -> Iterator[concurrent.futures.ThreadPoolExecutor]:
+        """
+        Provide the worker pool, concurrency budget, rate controller and
+        probe ledger shared by all scan stages.
+
+        The scan profile sets the limits; scan_window and scan_threads
+        only lower them further. Re-entrant: nested users (e.g. discovery
+        inside scan_network) reuse the pool that is already active.
+
+        Yields:
+            Executor for blocking probes; the budget is available as
+            self._budget, the rate controller as self._rate and the probe
+            ledger as self._ledger
+        """
+        if self._executor is not None:
+            yield self._executor
+            return
+
+        profile = get_scan_profile(self.scan_profile)
+        window = max(1, min(self.scan_window, profile.window))
+        executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, min(self.scan_threads, profile.threads, window))
+        )
+        self._budget = ConcurrencyBudget(window)
+        self._rate = RateController(profile)
+        self._ledger = ProbeLedger()
+        self._executor = executor
+        try:
+            yield executor
+        finally:
+            self._executor = None
+            self._budget = None
+            self._rate = None
+            self._ledger = None
+            executor.shutdown(wait=True, cancel_futures=True)
+
     def get_local_network_range(self) -> str:
         """
         Automatically detect the local network range.
@@ -122,8 +282,6 @@ class NetworkScanner:
         """
         try:
             # Get default gateway
-            import subprocess
-
             result = subprocess.run(
                 ["ip", "route", "show", "default"], capture_output=True, text=True
             )
@@ -171,11 +329,35 @@ class NetworkScanner:
         self._update_progress("Discovering hosts...", 10)
         return self._enhanced_host_discovery(network_range)
 
+    def _acquire_probe_slot(self, ip: str) -> bool:
+        """
+        Wait until a blocking probe of a host fits the scan's rate limits.
+
+        Outside a scan there are no limits. Every successful call must be
+        paired with _release_probe_slot().
+
+        Args:
+            ip: Host about to be probed
+
+        Returns:
+            True if the probe may be sent, False if the scan was stopped
+        """
+        rate = self._rate
+        if rate is None:
+            return True
+        return rate.acquire(ip, stop_check=lambda: self._stop_scanning)
+
+    def _release_probe_slot(self, ip: str) -> None:
+        """Return the slot taken by _acquire_probe_slot()."""
+        rate = self._rate
+        if rate is not None:
+            rate.release(ip)
+
     def _ping_host(self, ip: str) -> tuple[str, bool]:
         """Ping a single host to check if it's alive with improved reliability."""
+        if not self._acquire_probe_slot(ip):
+            return ip, False
         try:
-            import subprocess
-
             # Use a consistent, reliable ping command
             cmd = [
                 "ping",
@@ -209,61 +391,173 @@ class NetworkScanner:
         except Exception as e:
             logging.debug(f"Ping error for {ip}: {e}")
             return ip, False
+        finally:
+            self._release_probe_slot(ip)
 
-    def _get_system_arp_table(self) -> Dict[str, str]:
-        """Get ARP table from system using 'arp' or 'ip neigh' command."""
-        arp_table = {}
+    def _iter_arp_sweep(
+        self, ip_range: IPRange, interface: ArpInterface
+    ) -> Iterator[Dict[str, str]]:
+        """
+        Discover the hosts of an on-link range with one ARP sweep.
 
-        try:
-            import subprocess
+        The ARP reply latency of every host is recorded as its response
+        time and RTT sample.
+
+        Args:
+            ip_range: Addresses to sweep, all on the interface's subnet
+            interface: Interface to sweep from
 
-            # Try 'ip neigh' first (more reliable on modern systems)
+        Yields:
+            Host dictionaries with IP, MAC, and vendor info
+
+        Raises:
+            OSError: If the packet socket cannot be opened
+        """
+        self._update_progress(
+            _("ARP scanning") + f" {len(ip_range)} " + _("addresses..."), 15
+        )
+        sweeper = ArpSweeper(
+            interface,
+            timeout=self.ARP_SWEEP_TIMEOUT,
+            stop_check=lambda: self._stop_scanning,
+            rate=self._rate,
+        )
+        rtt_table = self._rtt
+        for ip, mac, latency in sweeper.sweep(ip_range):
+            self._response_times[ip] = latency
+            if rtt_table:
+                rtt_table.add_sample(ip, latency / 1000.0)
+            yield {"ip": ip, "mac": mac, "vendor": self._get_vendor(mac)}
+
+        # This machine does not answer its own ARP requests
+        if interface.ip in ip_range and not self._stop_scanning:
+            self._response_times[interface.ip] = 0.0
+            yield {
+                "ip": interface.ip,
+                "mac": interface.mac,
+                "vendor": self._get_vendor(interface.mac),
+            }
+
+    def _iter_ping_sweep(
+        self, ips: Iterator[str], total: int
+    ) -> Iterator[Tuple[str, float]]:
+        """
+        Ping every address, using one ICMP socket when possible.
+
+        Falls back to per-host ping subprocesses when the kernel refuses
+        ICMP datagram sockets (see net.ipv4.ping_group_range).
+
+        Args:
+            ips: Addresses to ping (consumed lazily)
+            total: Number of addresses, for progress reporting
+
+        Yields:
+            Tuples of (ip, rtt_ms) for each responding host as replies arrive
+        """
+        if IcmpPinger.is_supported():
+            pinger = IcmpPinger(
+                timeout=self.ping_timeout,
+                attempts=self.ping_attempts,
+                stop_check=lambda: self._stop_scanning,
+                rate_control=self._rate,
+            )
+            sent = [0]
+
+            def counted(source: Iterator[str]) -> Iterator[str]:
+                for ip in source:
+                    sent[0] += 1
+                    yield ip
+
+            found = 0
             try:
-                result = subprocess.run(
-                    ["ip", "neigh"], capture_output=True, text=True, timeout=5
-                )
+                for ip, rtt in pinger.iter_sweep(counted(ips)):
+                    found += 1
+                    self._update_progress(
+                        _("Ping scan:")
+                        + f" {sent[0]}/{total} "
+                        + _("(")
+                        + f"{found} "
+                        + _("found")
+                        + _(")"),
+                        15 + (sent[0] / max(total, 1)) * 10,
+                    )
+                    yield ip, rtt
+                return
+            except OSError as e:
+                if sent[0]:
+                    raise
+                logging.debug(f"ICMP socket sweep failed, using ping command: {e}")
+
+        yield from self._iter_ping_sweep_subprocess(ips, total)
+
+    def _iter_ping_sweep_subprocess(
+        self, ips: Iterator[str], total: int
+    ) -> Iterator[Tuple[str, float]]:
+        """Ping addresses with the system ping command in batches on the shared pool."""
+        batch_size = 100
+        completed = 0
+        found = 0
+
+        with self._scan_pool() as executor:
+            budget = self._budget
+            while not self._stop_scanning:
+                batch_ips = list(itertools.islice(ips, batch_size))
+                if not batch_ips:
+                    break
 
-                if result.returncode == 0:
-                    for line in result.stdout.splitlines():
-                        parts = line.split()
-                        if len(parts) >= 5 and parts[1] == "dev":
-                            ip = parts[0]
-                            # Find MAC address in the line
-                            for i, part in enumerate(parts):
-                                if ":" in part and len(part) == 17:
-                                    arp_table[ip] = part
-                                    break
-
-            except (subprocess.TimeoutExpired, FileNotFoundError):
-                pass
-
-            # Fallback to 'arp' command
-            if not arp_table:
-                try:
-                    result = subprocess.run(
-                        ["arp", "-a"], capture_output=True, text=True, timeout=5
+                futures = [
+                    budget.submit(
+                        executor,
+                        self._ping_host,
+                        ip,
+                        stop_check=lambda: self._stop_scanning,
+                        default=(ip, False),
                     )
+                    for ip in batch_ips
+                ]
 
-                    if result.returncode == 0:
-                        for line in result.stdout.splitlines():
-                            # Parse lines like: "gateway (192.168.1.1) at aa:bb:cc:dd:ee:ff [ether] on wlan0"
-                            parts = line.split()
-                            if len(parts) >= 4:
-                                ip_part = None
-                                mac_part = None
+                for future in concurrent.futures.as_completed(futures):
+                    if self._stop_scanning:
+                        break
 
-                                for part in parts:
-                                    if part.startswith("(") and part.endswith(")"):
-                                        ip_part = part[1:-1]
-                                    elif ":" in part and len(part) == 17:
-                                        mac_part = part
+                    try:
+                        ip, is_alive = future.result()
+                    except Exception:
+                        continue
+                    if is_alive:
+                        # The ping command does not report a usable RTT
+                        found += 1
+                        yield ip, 0.0
 
-                                if ip_part and mac_part:
-                                    arp_table[ip_part] = mac_part
+                # Update progress for this batch
+                completed += len(batch_ips)
+                progress = 15 + (completed / max(total, 1)) * 10
+                self._update_progress(
+                    _("Ping scan:")
+                    + f" {completed}/{total} "
+                    + _("(")
+                    + f"{found} "
+                    + _("found")
+                    + _(")"),
+                    progress,
+                )
+
+    def _get_system_arp_table(self) -> Dict[str, str]:
+        """
+        Get resolved IPv4 neighbors from the kernel neighbor table.
 
-                except (subprocess.TimeoutExpired, FileNotFoundError):
-                    pass
+        Reads the table over netlink (or /proc/net/arp) without spawning
+        processes. FAILED and INCOMPLETE entries are skipped, since they
+        do not prove that the host is alive.
 
+        Returns:
+            Dictionary mapping IP addresses to MAC addresses
+        """
+        arp_table = {}
+        try:
+            for entry in read_neighbor_table(socket.AF_INET):
+                if entry.is_resolved:
+                    arp_table[entry.ip] = entry.mac
         except Exception as e:
             logging.error(_("Failed to get ARP table") + f": {e}")
 
@@ -302,12 +596,13 @@ class NetworkScanner:
                 self.vendor_cache[normalized_mac] = vendor
                 return vendor
 
-            # Method 3: Try online API lookup (only if not a randomized MAC)
-            if not self._is_locally_administered_mac(mac):
-                vendor = self._get_vendor_online(mac)
-                if vendor and vendor != "Unknown":
-                    self.vendor_cache[normalized_mac] = vendor
-                    return vendor
+            # Method 3: Earlier online lookups, remembered on disk per OUI.
+            # New ones run in the background during scans (OnlineVendorLookup)
+            cached = self.result_cache.get(KIND_VENDOR, oui_of(mac))
+            if cached is not None and cached.value:
+                vendor = cached.value
+                self.vendor_cache[normalized_mac] = vendor
+                return vendor
 
             # Cache the result (even if "Unknown" to avoid repeated lookups)
             self.vendor_cache[normalized_mac] = vendor
@@ -320,8 +615,8 @@ class NetworkScanner:
 
     def _get_vendor_ieee_oui(self, mac: str) -> str:
         """
-        Get vendor information by reading the IEEE OUI file directly.
-        This is much faster than subprocess calls to arp-scan.
+        Get vendor information from the compiled IEEE OUI index.
+        Matches the longest registered prefix (MA-S, MA-M, then MA-L).
 
         Args:
             mac: MAC address to look up
@@ -330,80 +625,15 @@ class NetworkScanner:
             Vendor name or "Unknown"
         """
         try:
-            # Check if IEEE OUI file exists
-            oui_file_path = "/usr/share/arp-scan/ieee-oui.txt"
-            if not hasattr(self, "_ieee_oui_available"):
-                import os
-
-                self._ieee_oui_available = os.path.isfile(oui_file_path)
-                if self._ieee_oui_available:
-                    logging.debug("IEEE OUI file found - using for vendor lookup")
-                else:
-                    logging.debug("IEEE OUI file not found - using internal database")
-
-            if not self._ieee_oui_available:
+            index = get_oui_index()
+            if index is None:
                 return "Unknown"
-
-            # Extract OUI from MAC address (first 6 hex characters)
-            oui = mac.replace(":", "").replace("-", "").upper()[:6]
-
-            # Load and cache OUI database if not already loaded
-            if not hasattr(self, "_oui_database"):
-                self._load_ieee_oui_file(oui_file_path)
-
-            # Look up vendor in the cached database
-            return self._oui_database.get(oui, "Unknown")
+            return index.lookup(mac) or "Unknown"
 
         except Exception as e:
             logging.debug(f"IEEE OUI lookup failed for {mac}: {e}")
             return "Unknown"
 
-    def _load_ieee_oui_file(self, file_path: str) -> None:
-        """
-        Load and parse the IEEE OUI file into memory for fast lookups.
-        The file format is: OUI<tab>Vendor Name
-        Example: 8C1F640F2<tab>Graphimecc Group SRL
-
-        Args:
-            file_path: Path to the IEEE OUI file
-        """
-        try:
-            self._oui_database = {}
-
-            with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                for line_num, line in enumerate(f, 1):
-                    line = line.strip()
-
-                    # Skip empty lines and comments
-                    if not line or line.startswith("#"):
-                        continue
-
-                    # Parse line - expected format: OUI<whitespace>Vendor Name
-                    parts = line.split(None, 1)  # Split on any whitespace, max 2 parts
-
-                    if len(parts) >= 2:
-                        oui_hex = parts[0].strip()
-                        vendor_name = parts[1].strip()
-
-                        # Validate OUI format (should be hex characters)
-                        if len(oui_hex) >= 6 and all(
-                            c in "0123456789ABCDEF" for c in oui_hex.upper()
-                        ):
-                            # Use first 6 characters as OUI key
-                            oui_key = oui_hex.upper()[:6]
-                            self._oui_database[oui_key] = vendor_name
-
-            logging.info(
-                _("Loaded")
-                + f" {len(self._oui_database)} "
-                + _("OUI entries from IEEE database")
-            )
-
-        except Exception as e:
-            logging.error(_("Failed to load IEEE OUI file") + f" {file_path}: {e}")
-            # Initialize empty database to avoid repeated load attempts
-            self._oui_database = {}
-
     # Internal OUI database with common vendors that may be missing from IEEE file
     # Especially IoT devices and recent manufacturers
     _INTERNAL_OUI_DB = {
@@ -426,7 +656,7 @@ class NetworkScanner:
         "84F3EB": "Espressif Inc.",
         "A020A6": "Espressif Inc.",
         "A4CF12": "Espressif Inc.",
-        "BC:DD:C2": "Espressif Inc.",
+        "BCDDC2": "Espressif Inc.",
         "C8C9A3": "Espressif Inc.",
         "EC94CB": "Espressif Inc.",
         "240AC4": "Espressif Inc.",
@@ -463,9 +693,7 @@ class NetworkScanner:
         # TP-Link (network equipment)
         "14CC20": "TP-LINK TECHNOLOGIES CO.,LTD.",
         "1C3BF3": "TP-LINK TECHNOLOGIES CO.,LTD.",
-        "44D9E7": "TP-LINK TECHNOLOGIES CO.,LTD.",
         "50BD5F": "TP-LINK TECHNOLOGIES CO.,LTD.",
-        "500FF5": "TP-LINK TECHNOLOGIES CO.,LTD.",
         "60E327": "TP-LINK TECHNOLOGIES CO.,LTD.",
         "6466B3": "TP-LINK TECHNOLOGIES CO.,LTD.",
         "90F652": "TP-LINK TECHNOLOGIES CO.,LTD.",
@@ -563,92 +791,6 @@ class NetworkScanner:
         "001DD1": "Nokia Shanghai Bell Co., Ltd.",
     }
 
-    # Vendor to device type mapping for enhanced identification
-    # Keys are lowercase substrings that appear in vendor names
-    _VENDOR_DEVICE_TYPES = {
-        # Smartphones
-        "xiaomi mobile": "Smartphone",
-        "samsung electronics": "Smartphone",
-        "apple": "Smartphone",
-        "huawei": "Smartphone",
-        "oppo": "Smartphone",
-        "vivo mobile": "Smartphone",
-        "oneplus": "Smartphone",
-        "motorola": "Smartphone",
-        "lg electronics": "Smartphone",
-        "zte": "Smartphone",
-        "realme": "Smartphone",
-        "poco": "Smartphone",
-        # IoT / Smart Home
-        "tuya": "Smart Device",
-        "espressif": "IoT Device",
-        "shelly": "Smart Device",
-        "sonoff": "Smart Device",
-        "itead": "Smart Device",
-        "wyze": "Smart Device",
-        "philips hue": "Smart Light",
-        "signify": "Smart Light",
-        "yeelight": "Smart Light",
-        # Network Equipment
-        "tp-link": "Network Device",
-        "tenda": "Network Device",
-        "netgear": "Network Device",
-        "d-link": "Network Device",
-        "linksys": "Network Device",
-        "ubiquiti": "Network Device",
-        "mikrotik": "Network Device",
-        "cisco": "Network Device",
-        "juniper": "Network Device",
-        "nokia": "Router/Modem",
-        "huawei technologies": "Router/Modem",
-        "zte corporation": "Router/Modem",
-        # Media Devices
-        "roku": "Streaming Device",
-        "amazon": "Smart Device",
-        "google": "Smart Device",
-        "chromecast": "Streaming Device",
-        # Cameras
-        "trolink": "IP Camera",
-        "hikvision": "IP Camera",
-        "dahua": "IP Camera",
-        "reolink": "IP Camera",
-        "eufy": "IP Camera",
-        "arlo": "IP Camera",
-        "ring": "Smart Doorbell",
-        # Computers
-        "dell": "Computer",
-        "hewlett packard": "Computer",
-        "hp inc": "Computer",
-        "lenovo": "Computer",
-        "acer": "Computer",
-        "intel": "Computer",
-        "amd": "Computer",
-        "asus": "Computer",
-        "gigabyte": "Computer",
-        "msi": "Computer",
-        # Printers
-        "brother": "Printer",
-        "canon": "Printer",
-        "epson": "Printer",
-        "xerox": "Printer",
-        "lexmark": "Printer",
-        # Gaming
-        "nintendo": "Game Console",
-        "sony interactive": "Game Console",
-        "microsoft": "Game Console",
-        "valve": "Gaming PC",
-        # NAS / Storage
-        "synology": "NAS",
-        "qnap": "NAS",
-        "western digital": "NAS",
-        "seagate": "NAS",
-        # TVs
-        "tcl": "Smart TV",
-        "hisense": "Smart TV",
-        "philips consumer": "Smart TV",
-        "lg display": "Smart TV",
-    }
-
     def _get_device_type_from_vendor(self, vendor: str) -> str:
         """
         Determine device type based on vendor name.
@@ -659,15 +801,7 @@ class NetworkScanner:
         Returns:
             Device type string or empty string if unknown
         """
-        if not vendor or vendor == "Unknown":
-            return ""
-
-        vendor_lower = vendor.lower()
-        for pattern, device_type in self._VENDOR_DEVICE_TYPES.items():
-            if pattern in vendor_lower:
-                return device_type
-
-        return ""
+        return get_device_classifier().vendor_type(vendor)
 
     def _is_locally_administered_mac(self, mac: str) -> bool:
         """
@@ -707,419 +841,210 @@ class NetworkScanner:
         except Exception:
             return "Unknown"
 
-    def _get_vendor_online(self, mac: str) -> str:
+    def _wants_online_vendor(self, mac: str) -> bool:
         """
-        Get vendor from online API as last resort.
-        Only called if local lookups fail. Uses fast timeout to avoid blocking.
+        Check whether a MAC's vendor should be looked up online.
 
         Args:
-            mac: MAC address
+            mac: MAC address whose vendor is unknown locally
 
         Returns:
-            Vendor name or "Unknown"
+            True unless offline mode is on, the MAC is randomized or the
+            OUI's online answer (or failure) is already cached
         """
-        try:
-            import urllib.request
-            import json
+        return (
+            not self.offline_mode
+            and bool(mac)
+            and not self._is_locally_administered_mac(mac)
+            and self.result_cache.get(KIND_VENDOR, oui_of(mac)) is None
+        )
 
-            oui = mac.replace(":", "").replace("-", "").upper()[:6]
+    def _create_hostname_resolver(self) -> HostnameResolver:
+        """Build a resolver racing every hostname source within hostname_timeout."""
+        # Re-reads the local files only if they changed since the last scan
+        self.local_names.refresh()
+        return HostnameResolver(
+            timeout=self.hostname_timeout,
+            local_names=self.local_names,
+            sources=[
+                MdnsNameSource(self.hostname_timeout),
+                DnsNameSource(self.hostname_timeout),
+                NetbiosNameSource(self.hostname_timeout),
+            ],
+        )
 
-            # Use maclookup.app API (free, no key required)
-            url = f"https://api.maclookup.app/v2/macs/{oui}"
+    def _persistent_key(self, ip: str, mac: str = "") -> str:
+        """Key of a host in the result cache: its MAC if known, else its IP."""
+        return normalize_mac(mac) or ip
 
-            req = urllib.request.Request(
-                url,
-                headers={"User-Agent": "BigNetworkInfo/1.0"}
-            )
+    def _get_cached_hostname(self, ip: str, mac: str = "") -> Optional[str]:
+        """
+        Get a hostname without network traffic, from local files or the result cache.
 
-            # Very short timeout to avoid blocking scan
-            with urllib.request.urlopen(req, timeout=1.5) as response:
-                data = json.loads(response.read().decode("utf-8"))
-                if data.get("success") and data.get("found"):
-                    company = data.get("company", "")
-                    if company:
-                        logging.debug(f"Online API resolved {oui} to {company}")
-                        return company
+        Args:
+            ip: IP address
+            mac: MAC address, if known
 
-        except Exception as e:
-            logging.debug(f"Online vendor lookup failed for {mac}: {e}")
+        Returns:
+            Hostname (the IP if a lookup is known to fail), or None if the
+            host has to be resolved
+        """
+        if ip in self.hostname_cache:
+            return self.hostname_cache[ip]
 
-        return "Unknown"
+        local = self.local_names.lookup(ip, mac)
+        if local:
+            hostname = local.name
+        else:
+            cached = self.result_cache.get(KIND_HOSTNAME, self._persistent_key(ip, mac))
+            if cached is None:
+                return None
+            hostname = cached.value or ip
+        self.hostname_cache[ip] = hostname
+        return hostname
 
-    def _get_hostname(self, ip: str) -> str:
+    def _get_hostname(self, ip: str, mac: str = "") -> str:
         """
-        Try to resolve hostname for an IP address using multiple fast methods with caching.
-        Uses enhanced avahi integration for better local network device detection.
+        Try to resolve hostname for an IP address using every source at once, with caching.
+        Names from local files are used without any network traffic; otherwise
+        multicast DNS, reverse DNS and NetBIOS/LLMNR are raced under one
+        deadline and the most trusted answer wins.
+
+        During a scan the scan's shared resolver has usually queried the host
+        when it was discovered; otherwise a one-shot resolver is used.
 
         Args:
             ip: IP address
+            mac: MAC address, if known
 
         Returns:
             Hostname or the IP address if resolution fails
         """
-        # Check cache first
-        if ip in self.hostname_cache:
-            return self.hostname_cache[ip]
+        # Check the caches first
+        cached = self._get_cached_hostname(ip, mac)
+        if cached is not None:
+            return cached
 
         hostname = ip  # Default fallback
-
-        # Method 1: Enhanced avahi resolution for local network devices
-        if self._is_avahi_available():
-            try:
-                resolved = self._resolve_hostname_avahi(ip)
-                if resolved and resolved != ip and not resolved.startswith(ip):
-                    hostname = resolved
-                    self.hostname_cache[ip] = hostname
-                    logging.debug(
-                        _("Avahi resolved") + f" {ip} " + _("to") + f" {hostname}"
-                    )
-                    return hostname
-
-                # Try service discovery for additional device information
-                services_info = self._discover_avahi_services(ip)
-                if services_info["services"]:
-                    # Use service-based hostname if available
-                    for service in services_info["services"]:
-                        if service["hostname"] and service["hostname"] != ip:
-                            service_hostname = service["hostname"]
-                            if service_hostname.endswith(".local"):
-                                service_hostname = service_hostname[:-6]
-                            if service_hostname and len(service_hostname) > 3:
-                                hostname = service_hostname
-                                self.hostname_cache[ip] = hostname
-                                logging.debug(
-                                    f"Avahi service discovery resolved {ip} to {hostname}"
-                                )
-                                return hostname
-
-            except Exception as e:
-                logging.debug(_("Avahi resolution failed for") + f" {ip}: {e}")
-
-        # Method 2: Standard reverse DNS with configurable timeout
         try:
-            # Set aggressive timeout for hostname resolution
-            old_timeout = socket.getdefaulttimeout()
-            socket.setdefaulttimeout(self.hostname_timeout)
-
-            resolved = socket.gethostbyaddr(ip)[0]
-            if resolved and resolved != ip and not resolved.startswith(ip):
-                hostname = resolved
-                self.hostname_cache[ip] = hostname
-                return hostname
-
-        except (socket.herror, socket.gaierror, OSError):
-            pass
-        finally:
-            if "old_timeout" in locals():
-                socket.setdefaulttimeout(old_timeout)
+            resolver = self._names
+            if resolver is not None:
+                answer = resolver.lookup(ip, mac)
+            else:
+                mac = mac or self._get_system_arp_table().get(ip, "")
+                with self._create_hostname_resolver() as resolver:
+                    answer = resolver.lookup(ip, mac)
+            if answer:
+                hostname = answer.name
+                logging.debug(f"Resolved {ip} to {hostname} via {answer.source}")
+            # A lookup cut short by a stopped scan proves nothing
+            if not self._stop_scanning:
+                self.result_cache.put(
+                    KIND_HOSTNAME,
+                    self._persistent_key(ip, mac),
+                    answer.name if answer else None,
+                )
+        except Exception as e:
+            logging.debug(f"Hostname resolution failed for {ip}: {e}")
 
         # Cache the result (even if it's just the IP) to avoid repeated lookups
         self.hostname_cache[ip] = hostname
         return hostname
 
-    def _is_avahi_available(self) -> bool:
-        """Check if avahi tools are available on the system (cached)."""
-        if self._avahi_available is not None:
-            return self._avahi_available
-
-        try:
-            # Check for multiple avahi tools - avahi-resolve and avahi-browse
-            resolve_result = subprocess.run(
-                ["which", "avahi-resolve"], capture_output=True, timeout=2, check=False
-            )
-            browse_result = subprocess.run(
-                ["which", "avahi-browse"], capture_output=True, timeout=2, check=False
-            )
-
-            # Consider avahi available if at least avahi-resolve is present
-            self._avahi_available = resolve_result.returncode == 0
-
-            # Log additional capabilities
-            if browse_result.returncode == 0:
-                logging.debug("Avahi-browse available for enhanced service discovery")
-
-        except Exception:
-            self._avahi_available = False
-
-        return self._avahi_available
-
-    def _resolve_hostname_avahi(self, ip: str) -> Optional[str]:
+    def _get_netbios_info(self, ip: str, mac: str = "") -> Optional[NetbiosName]:
         """
-        Use avahi-resolve to get hostname for IP address with enhanced detection.
-        This is particularly effective for local network devices with .local domains.
+        Get the name, workgroup and MAC a host reports over NetBIOS/LLMNR (cached).
 
         Args:
-            ip: IP address to resolve
+            ip: IP address
+            mac: MAC address, if known
 
         Returns:
-            Resolved hostname or None if resolution fails
+            NetbiosName, or None if the host answered neither protocol
         """
-        try:
-            # Try address resolution first
-            result = subprocess.run(
-                ["avahi-resolve", "-a", ip],
-                capture_output=True,
-                text=True,
-                timeout=self.hostname_timeout,
-                check=False,
-            )
-
-            if result.returncode == 0 and result.stdout.strip():
-                # avahi-resolve output format: "192.168.1.100	hostname.local"
-                lines = result.stdout.strip().split("\n")
-                for line in lines:
-                    parts = line.split("\t")
-                    if len(parts) >= 2:
-                        resolved_ip, hostname = parts[0].strip(), parts[1].strip()
-                        if resolved_ip == ip and hostname:
-                            # Keep .local suffix for better identification but also try without
-                            if hostname.endswith(".local"):
-                                clean_hostname = hostname[:-6]
-                                # Prefer the clean name if it's descriptive
-                                if (
-                                    len(clean_hostname) > 4
-                                    and not clean_hostname.replace("-", "")
-                                    .replace("_", "")
-                                    .isdigit()
-                                ):
-                                    return clean_hostname
-                                else:
-                                    return hostname
-                            return hostname
-
-            # Try hostname-to-address resolution to find any known .local names
-            # This helps catch devices that might be in avahi cache
-            try:
-                # First try common device naming patterns
-                common_names = [
-                    f"host-{ip.replace('.', '-')}.local",
-                    f"device-{ip.split('.')[-1]}.local",
-                    f"station-{ip.split('.')[-1]}.local",
-                ]
-
-                for name in common_names:
-                    try:
-                        reverse_result = subprocess.run(
-                            ["avahi-resolve", "-n", name],
-                            capture_output=True,
-                            text=True,
-                            timeout=1,
-                            check=False,
-                        )
-                        if (
-                            reverse_result.returncode == 0
-                            and ip in reverse_result.stdout
-                        ):
-                            return name[:-6]  # Remove .local suffix
-                    except (subprocess.SubprocessError, OSError):
-                        continue
-
-            except Exception:
-                pass
-
-        except (subprocess.TimeoutExpired, subprocess.CalledProcessError, OSError):
-            pass
+        if ip in self.netbios_cache:
+            return self.netbios_cache[ip]
 
-        return None
+        key = self._persistent_key(ip, mac)
+        cached = self.result_cache.get(KIND_NETBIOS, key)
+        if cached is not None:
+            info = NetbiosName(*cached.value.split("\t", 2)) if cached.value else None
+        else:
+            source = self._names.get_source("netbios") if self._names else None
+            if source is not None:
+                info = source.resolver.lookup(ip)
+            else:
+                with NetbiosResolver(timeout=self.hostname_timeout) as resolver:
+                    info = resolver.lookup(ip)
+            if not self._stop_scanning:
+                self.result_cache.put(
+                    KIND_NETBIOS, key, "\t".join(info) if info else None
+                )
+        self.netbios_cache[ip] = info
+        return info
 
-    def _check_port(
-        self, ip: str, port: int, protocol: str, timeout: float = 1.0
-    ) -> bool:
+    def _identify_host(self, ip: str, mac: str = "") -> Dict[str, str]:
         """
-        Check if a specific port is open on a host.
+        Resolve everything a host can tell about its identity.
 
         Args:
-            ip: Target IP address
-            port: Port number to check
-            protocol: Protocol ('tcp' or 'udp')
-            timeout: Connection timeout
+            ip: IP address
+            mac: MAC address from the neighbor table, if known
 
         Returns:
-            True if port is open, False otherwise
+            Dictionary with hostname, workgroup, and the MAC and vendor
+            reported over NetBIOS (empty strings when unknown)
         """
-        if self._stop_scanning:
-            return False
-
-        return self._check_port_socket(ip, port, protocol, timeout)
-
-    def _check_port_socket(
-        self, ip: str, port: int, protocol: str, timeout: float
-    ) -> bool:
-        """Check port using standard sockets (no root required)."""
-        try:
-            if protocol.lower() == "tcp":
-                # TCP connect scan
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(timeout)
-                result = sock.connect_ex((ip, port))
-                sock.close()
-                return result == 0
-
-            elif protocol.lower() == "udp":
-                # UDP is tricky without raw sockets, so we'll try a simple send
-                try:
-                    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-                    sock.settimeout(timeout)
-                    # Send empty packet and see if we get a response
-                    sock.sendto(b"", (ip, port))
-                    try:
-                        sock.recvfrom(1024)
-                        sock.close()
-                        return True
-                    except socket.timeout:
-                        # Timeout might mean the port is open but not responding
-                        sock.close()
-                        return True
-                    except Exception:
-                        sock.close()
-                        return False
-                except Exception:
-                    return False
-
-        except Exception:
-            return False
-
-        return False
+        identity = {
+            "hostname": self._get_hostname(ip, mac),
+            "workgroup": "",
+            "mac": "",
+            "vendor": "",
+        }
+        info = self._get_netbios_info(ip, mac)
+        if info:
+            identity["workgroup"] = info.workgroup
+            if info.mac:
+                identity["mac"] = info.mac
+                identity["vendor"] = self._get_vendor(info.mac)
+        return identity
+
+    def _create_rtt_table(self) -> RttTable:
+        """Build the per-host timeout table, starting every host at scan_timeout."""
+        return RttTable(
+            initial=self.scan_timeout,
+            floor=min(self.RTT_TIMEOUT_FLOOR, self.scan_timeout),
+            ceiling=self.scan_timeout * self.RTT_TIMEOUT_CEILING_FACTOR,
+        )
 
     def _get_device_type_hint(
-        self, ip: str, services: List[ServiceInfo], vendor: str = ""
+        self,
+        ip: str,
+        services: List[ServiceInfo],
+        vendor: str = "",
+        hostname: str = "",
     ) -> str:
         """
         Try to determine device type based on open services, patterns, and vendor.
         Uses very conservative logic - only identifies clear servers and infrastructure.
         Most devices will remain unclassified (which is correct for clients).
 
+        The rules live in device_rules.json and can be extended with
+        ~/.config/big-network-info/device_rules.json.
+
         Args:
             ip: IP address
             services: List of detected services
             vendor: Vendor name from MAC lookup (optional)
+            hostname: Hostname already resolved for the host (optional)
 
         Returns:
             Device type hint or empty string for regular clients
         """
-        # Don't classify localhost/loopback addresses
-        if ip.startswith("127.") or ip == "::1":
-            return ""
-
-        # First, try to get device type from vendor (most reliable for IoT/phones)
-        if vendor:
-            vendor_type = self._get_device_type_from_vendor(vendor)
-            if vendor_type:
-                return vendor_type
-
-        service_ports = [service.port for service in services]
-
-        # Check for common gateway IPs and hostnames
-        is_likely_gateway = (
-            ip.endswith(".1") or ip.endswith(".254") or ip.endswith(".255")
+        return get_device_classifier().classify(
+            ip, (service.port for service in services), vendor, hostname
         )
 
-        # Get hostname for additional checks
-        hostname = ""
-        for result in [self._get_hostname(ip)]:
-            if result and result.lower() not in ["unknown", ip]:
-                hostname = result.lower()
-                break
-
-        # Network Infrastructure (Routers, Firewalls) - VERY conservative
-        gateway_hostnames = any(
-            term in hostname
-            for term in ["gateway", "router", "gw", "rt", "firewall", "fw"]
-        )
-        has_web_interface = any(port in service_ports for port in [80, 443])
-        has_multiple_network_services = (
-            len([p for p in service_ports if p in [53, 67, 123, 161]]) >= 2
-        )
-
-        if (is_likely_gateway and has_web_interface) or (
-            gateway_hostnames and has_web_interface and has_multiple_network_services
-        ):
-            return "Router"
-
-        # Dedicated Printers (high confidence - specific printer ports)
-        printer_ports = [631, 9100, 515]  # IPP, JetDirect, LPR
-        if any(port in service_ports for port in printer_ports):
-            return "Printer"
-
-        # Dedicated Database Servers (high confidence - must be clearly dedicated)
-        db_ports = [3306, 5432, 27017, 6379]  # MySQL, PostgreSQL, MongoDB, Redis
-        db_services = [p for p in service_ports if p in db_ports]
-        if db_services:
-            # Only classify if it has DB services + minimal other services (SSH, web admin)
-            other_services = [
-                p for p in service_ports if p not in db_ports + [22, 80, 443]
-            ]
-            if len(other_services) <= 1 and len(db_services) >= 1:
-                return "Database Server"
-
-        # Dedicated Mail Servers (high confidence - multiple mail protocols)
-        mail_ports = [25, 110, 143, 465, 993, 995]
-        mail_services = [p for p in service_ports if p in mail_ports]
-        if len(mail_services) >= 2:  # Multiple mail protocols = dedicated mail server
-            return "Mail Server"
-
-        # NAS/Storage Devices (specific vendor ports)
-        nas_ports = [5000, 5001, 2049, 548]  # Synology, QNAP, NFS, AFP
-        if any(port in service_ports for port in nas_ports):
-            return "NAS"
-
-        # Smart TV/Media Devices (specific streaming ports)
-        media_ports = [8008, 8009, 7000, 32469, 1900]  # Chromecast, Apple TV, UPnP
-        if any(port in service_ports for port in media_ports):
-            return "Media Device"
-
-        # IP Cameras (specific streaming/camera protocols)
-        camera_ports = [554, 8554, 1935]  # RTSP, RTMP
-        if any(port in service_ports for port in camera_ports):
-            return "Camera"
-
-        # Dedicated Development Servers (clear dev environments only)
-        dev_ports = [3000, 3001, 5000, 8000, 8001]
-        dev_services = [p for p in service_ports if p in dev_ports]
-        if dev_services and len(service_ports) <= 3:  # Only dev ports + maybe SSH/admin
-            return "Dev Server"
-
-        # **VERY CONSERVATIVE** server detection
-        # Only classify as server if MULTIPLE strong server indicators
-
-        # Count STRONG server indicators (not client services)
-        strong_server_indicators = 0
-
-        # Web server with many services (not just web admin interface)
-        if any(port in service_ports for port in [80, 443]) and len(service_ports) >= 5:
-            strong_server_indicators += 1
-
-        # SSH with many services (potential Linux server)
-        if 22 in service_ports and len(service_ports) >= 5:
-            strong_server_indicators += 1
-
-        # Mail services (servers, not clients)
-        if any(port in service_ports for port in [25, 110, 143, 465, 993, 995]):
-            strong_server_indicators += 1
-
-        # Domain services (DC, LDAP)
-        if any(port in service_ports for port in [88, 389, 636]):
-            strong_server_indicators += 1
-
-        # Only classify as server if MULTIPLE strong indicators (not just one)
-        if strong_server_indicators >= 2:
-            if 3389 in service_ports:  # RDP detected
-                return "Windows Server"
-            elif 22 in service_ports:  # Linux with SSH
-                return "Linux Server"
-            elif any(port in service_ports for port in [80, 443]):
-                return "Web Server"
-
-        # For EVERYTHING ELSE - return empty string
-        # This includes:
-        # - Workstations/laptops with SMB, NetBIOS, etc.
-        # - Clients with DHCP, DNS, NTP, SNMP ports open
-        # - Devices with just SSH access
-        # - Devices with just web interfaces
-        # - Any device that doesn't clearly provide services to the network
-
-        return ""
-
     def _enhance_hostname(
         self, ip: str, hostname: str, services: List[ServiceInfo], vendor: str = ""
     ) -> str:
@@ -1139,452 +1064,774 @@ class NetworkScanner:
         if hostname != ip:
             return hostname
 
+        # Devices are told apart by the last octet, or the last hextet
+        # of an IPv6 address
+        is_ipv6 = address_family(ip) == socket.AF_INET6
+        if is_ipv6:
+            suffix = format(ip_to_int(ip) & 0xFFFF, "x")
+        else:
+            suffix = ip.split(".")[-1]
+
         # Get device type hint from services and vendor
         device_type = self._get_device_type_hint(ip, services, vendor)
         if device_type:
-            last_octet = ip.split(".")[-1]
-            return f"{device_type}-{last_octet}"
+            return f"{device_type}-{suffix}"
 
         # If no device type detected, check if it's a common gateway
-        if ip.endswith(".1"):
-            return f"Gateway-{ip.split('.')[-1]}"
+        # (a convention of IPv4 subnets only)
+        if not is_ipv6 and suffix == "1":
+            return f"Gateway-{suffix}"
 
         return ip
 
-    def scan_network(self, network_range: str) -> List[ScanResult]:
+    def scan_network(
+        self,
+        network_range: str,
+        result_callback: Optional[Callable[[ScanEvent], None]] = None,
+    ) -> List[ScanResult]:
         """
         Perform a comprehensive network scan with parallel hostname and service detection.
 
+        Discovery, hostname resolution and port probing run as a pipeline:
+        each host enters the later stages as soon as it is discovered.
+
         Args:
             network_range: Network range to scan
+            result_callback: Optional callback receiving every ScanEvent
+                as soon as it happens (see scan_network_iter)
 
         Returns:
             List of scan results for all discovered hosts
         """
-        # Refresh configuration values in case settings changed
-        if self.config_manager:
-            cfg = self.config_manager.config
-            self.ping_timeout = cfg.ping_timeout
-            self.ping_attempts = cfg.ping_attempts
-            self.hostname_timeout = cfg.hostname_timeout
-            self.discovery_threads = cfg.discovery_threads
-            self.scan_timeout = cfg.scan_timeout
-            self.scan_threads = cfg.scan_threads
-        self._stop_scanning = False
-        # Use configured scan_threads for unified port scanning
-        thread_count = (
-            self.config_manager.config.scan_threads
-            if self.config_manager
-            else self.scan_threads
-        )
-        results = []
+        results: Dict[str, ScanResult] = {}
+        for event in self.scan_network_iter(network_range):
+            results[event.result.ip] = event.result
+            if result_callback:
+                result_callback(event)
+        return list(results.values())
+
+    def scan_network_iter(self, network_range: str) -> Iterator[ScanEvent]:
+        """
+        Scan a network and yield results incrementally.
 
-        try:
-            # Step 1: Discover hosts
-            self._update_progress(_("Scanning network for live hosts..."), 5)
-            hosts = self.discover_hosts(network_range)
-
-            if not hosts:
-                self._update_progress(_("No hosts found"), 100)
-                return results
-
-            # Step 2: Resolve hostnames for all hosts in parallel
-            total_hosts = len(hosts)
-            self._update_progress(_("Resolving hostnames..."), 35)
-
-            # Resolve all hostnames in parallel
-            hostname_results = {}
-            with concurrent.futures.ThreadPoolExecutor(
-                max_workers=min(self.discovery_threads, total_hosts)
-            ) as executor:
-                hostname_futures = {
-                    executor.submit(self._get_hostname, host["ip"]): host["ip"]
-                    for host in hosts
-                }
-
-                completed = 0
-                for future in concurrent.futures.as_completed(hostname_futures):
-                    if self._stop_scanning:
-                        break
+        A host is reported with SCAN_EVENT_ADDED the moment it is discovered,
+        with SCAN_EVENT_UPDATED whenever an open service or its hostname
+        arrives, and with SCAN_EVENT_COMPLETED once every probe for it has
+        finished. Each event carries a snapshot of the host's result, so
+        consumers may hand it to another thread without copying.
 
-                    ip = hostname_futures[future]
-                    try:
-                        hostname = future.result(timeout=self.hostname_timeout + 0.5)
-                        hostname_results[ip] = hostname
-                    except (concurrent.futures.TimeoutError, Exception):
-                        hostname_results[ip] = ip
+        Args:
+            network_range: Network range to scan
 
-                    completed += 1
-                    progress = 35 + (completed / total_hosts) * 20
-                    self._update_progress(
-                        _("Resolved") + f" {completed}/{total_hosts} " + _("hostnames"),
-                        progress,
-                    )
+        Yields:
+            ScanEvent for every change to a host's result
+        """
+        self._refresh_config()
+        self._stop_scanning = False
+        self._progress_floor = 0.0
+        # Ping replies and answered probes tune each host's probe timeout
+        self._rtt = self._create_rtt_table()
+        finished = False
 
-            # Step 3: Scan services for all hosts in parallel
-            self._update_progress(_("Scanning services..."), 55)
+        try:
+            # Reject bad ranges before any thread or socket is started
+            self._parse_scan_range(network_range)
+            self._update_progress(_("Scanning network for live hosts..."), 5)
 
             # Get all services to scan
             if self.config_manager:
                 services_to_scan = self.config_manager.get_all_services()
             else:
                 services_to_scan = COMMON_SERVICES
+            # Services sharing a port are probed once
+            plan = ProbePlan(services_to_scan)
+
+            # Every stage runs as soon as a host is discovered: the discovery
+            # thread queues hostname lookups on the shared pool and feeds TCP
+            # and UDP targets to the two probe engine threads. All of them
+            # draw from one concurrency budget and report back through one
+            # event queue, so results are only ever touched from this thread.
+            events: queue.SimpleQueue = queue.SimpleQueue()
+            stop_check = lambda: self._stop_scanning  # noqa: E731
+
+            with self._scan_pool() as executor, contextlib.ExitStack() as stack:
+                budget = self._budget
+                # TCP targets are generated lazily, likeliest ports first,
+                # rotating over as many hosts as the window can keep busy
+                max_active = max(1, budget.limit // self._rate.per_host)
+                feed = ProbeFeed(plan.tcp_ports, max_active=max_active)
+                udp_feed = ProbeFeed(plan.udp_ports, max_active=max_active)
+
+                # One resolver races every hostname source for the whole
+                # scan; hosts are queried in batches as soon as they are
+                # discovered. Both background stages are entered on the
+                # stack, so they are closed however the scan ends.
+                names = stack.enter_context(self._create_hostname_resolver())
+                self._names = names
+
+                # Vendors missing locally are looked up online in the
+                # background; their answers update the hosts' results
+                vendors = None
+                if not self.offline_mode:
+                    vendors = stack.enter_context(
+                        OnlineVendorLookup(
+                            cache=self.result_cache,
+                            on_result=lambda oui, vendor: events.put(
+                                ("vendor", oui, vendor)
+                            ),
+                            deadline=None,
+                        )
+                    )
 
-            # Create all port scan tasks (host x service combinations)
-            all_scan_tasks = []
-            for host in hosts:
-                for service in services_to_scan:
-                    all_scan_tasks.append((host["ip"], service))
-
-            # Execute all port scans in parallel using configured scan_threads
-            service_results = {host["ip"]: [] for host in hosts}
-            total_scans = len(all_scan_tasks)
-            # Show actual thread count from configuration
-            self._update_progress(
-                _("Starting port scan:")
-                + f" {total_scans} "
-                + _("tasks with")
-                + f" {thread_count} "
-                + _("threads"),
-                55,
-            )
-            with concurrent.futures.ThreadPoolExecutor(
-                max_workers=thread_count
-            ) as executor:
-                # Submit all port scan tasks
-                future_to_task = {
-                    executor.submit(
-                        self._check_port,
-                        ip,
-                        service.port,
-                        service.protocol,
-                        self.scan_timeout,
-                    ): (ip, service)
-                    for ip, service in all_scan_tasks
-                }
-
-                completed = 0
-                for future in concurrent.futures.as_completed(future_to_task):
-                    if self._stop_scanning:
-                        break
-
-                    ip, service = future_to_task[future]
+                def discover() -> None:
                     try:
-                        if future.result():
-                            service_results[ip].append(service)
-                    except Exception:
-                        pass
-
-                    completed += 1
-                    progress = 55 + (completed / total_scans) * 30
-                    if (
-                        completed % 20 == 0 or completed == total_scans
-                    ):  # Update less frequently
-                        self._update_progress(
-                            _("Scanned") + f" {completed}/{total_scans} " + _("ports"),
-                            progress,
-                        )
+                        for host in self.iter_discover_hosts(network_range):
+                            ip = host["ip"]
+                            events.put(("host", host))
+                            mac = host.get("mac", "")
+                            # Hosts named locally or in the result cache
+                            # cost no packets
+                            if self._get_cached_hostname(ip, mac) is None:
+                                names.query([ip], {ip: mac})
+                            future = budget.submit(
+                                executor,
+                                self._identify_host,
+                                ip,
+                                mac,
+                                stop_check=stop_check,
+                            )
+                            future.add_done_callback(
+                                lambda f, ip=ip: events.put(
+                                    ("identity", ip, self._future_result(f, None))
+                                )
+                            )
+                            feed.add_host(ip)
+                            # Dual-stack devices get their TCP ports probed
+                            # over IPv6 as well; UDP probing stays IPv4
+                            for address in host.get("ipv6", []):
+                                feed.add_host(address)
+                            if address_family(ip) == socket.AF_INET:
+                                udp_feed.add_host(ip)
+                    except Exception as e:
+                        logging.error(f"Enhanced discovery failed: {e}")
+                    finally:
+                        feed.close()
+                        udp_feed.close()
+                        events.put(("discovery_done",))
+
+                def probe_ports() -> None:
+                    # Half-open SYN scan when enabled and CAP_NET_RAW is held
+                    engine_class = TcpConnectScanner
+                    if self.use_privileged_scan:
+                        if raw_sockets_available():
+                            engine_class = SynScanner
+                        else:
+                            logging.warning(
+                                "Privileged scan needs raw sockets; "
+                                "using connect scan"
+                            )
+                    engine = engine_class(
+                        timeout=self.scan_timeout,
+                        max_in_flight=budget.limit,
+                        stop_check=stop_check,
+                        budget=budget,
+                        rtt=self._rtt,
+                        rate=self._rate,
+                        ledger=self._ledger,
+                    )
+                    try:
+                        for result in engine.scan(feed):
+                            events.put(("port", result.ip, result.port, result.state))
+                    except Exception as e:
+                        logging.error(f"Port scan failed: {e}")
+                    finally:
+                        events.put(("ports_done",))
+
+                def probe_udp() -> None:
+                    engine = UdpScanner(
+                        timeout=self.scan_timeout,
+                        max_in_flight=budget.limit,
+                        stop_check=stop_check,
+                        budget=budget,
+                        rtt=self._rtt,
+                        rate=self._rate,
+                        ledger=self._ledger,
+                    )
+                    try:
+                        for result in engine.scan(udp_feed):
+                            events.put(
+                                ("udp", result.ip, result.port, result.state)
+                            )
+                    except Exception as e:
+                        logging.error(f"UDP scan failed: {e}")
+                    finally:
+                        events.put(("udp_done",))
+
+                workers = [
+                    threading.Thread(target=discover, daemon=True),
+                    threading.Thread(target=probe_ports, daemon=True),
+                    threading.Thread(target=probe_udp, daemon=True),
+                ]
+                for worker in workers:
+                    worker.start()
+
+                try:
+                    yield from self._collect_scan_events(events, plan, vendors)
+                    finished = True
+                finally:
+                    if not finished:
+                        # Consumer stopped iterating or the scan failed
+                        self._stop_scanning = True
+                    feed.close()
+                    udp_feed.close()
+                    for worker in workers:
+                        worker.join()
+                    self._names = None
+                    self._rtt = None
 
-            # Step 4: Combine results
-            self._update_progress(_("Finalizing results..."), 85)
+        except Exception as e:
+            logging.error(f"Network scan failed: {e}")
+            self._update_progress(_("Scan failed:") + f" {e}", 100)
 
-            for host_data in hosts:
-                if self._stop_scanning:
-                    break
+    def _collect_scan_events(
+        self,
+        events: queue.SimpleQueue,
+        plan: ProbePlan,
+        vendors: Optional[OnlineVendorLookup] = None,
+    ) -> Iterator[ScanEvent]:
+        """
+        Turn stage messages from scan_network_iter into ScanEvents.
 
-                ip = host_data["ip"]
-                hostname = hostname_results.get(ip, ip)
-                services = service_results.get(ip, [])
-                vendor = host_data["vendor"]
+        Args:
+            events: Queue the pipeline stages report to
+            plan: Probes run on every host
+            vendors: Online vendor lookup stage (None in offline mode)
 
-                # Enhance hostname with device type (using vendor info)
-                hostname = self._enhance_hostname(ip, hostname, services, vendor)
+        Yields:
+            ScanEvent for every change to a host's result
+        """
+        results: Dict[str, ScanResult] = {}
+        raw_hostnames: Dict[str, str] = {}
+        # ip -> [TCP probes left, UDP probes left, identity lookups left]
+        pending: Dict[str, List[int]] = {}
+        # IPv6 address of a dual-stack device -> the device's IP
+        owners: Dict[str, str] = {}
+        # OUIs submitted to the online vendor lookup and not answered yet
+        pending_ouis = set()
+        vendor_wait_until = None
+        discovery_done = False
+        ports_done = False
+        udp_done = False
+        ports_completed = 0
+        tcp_total = 0
+
+        def snapshot(kind: str, ip: str) -> ScanEvent:
+            result = results[ip]
+            result.hostname = self._enhance_hostname(
+                ip, raw_hostnames.get(ip, ip), result.services, result.vendor
+            )
+            return ScanEvent(
+                kind,
+                dataclasses.replace(
+                    result,
+                    services=list(result.services),
+                    ipv6_addresses=list(result.ipv6_addresses),
+                ),
+            )
 
-                # Create scan result
-                scan_result = ScanResult(
+        def settle(ip: str) -> Iterator[ScanEvent]:
+            if all(left <= 0 for left in pending[ip]):
+                del pending[ip]
+                if plan.tcp_ports and self._rtt:
+                    results[ip].filtered = self._rtt.is_filtered(ip)
+                yield snapshot(SCAN_EVENT_COMPLETED, ip)
+
+        def lookup_vendor(result: ScanResult) -> None:
+            if (
+                vendors
+                and result.mac
+                and result.vendor == "Unknown"
+                and self._wants_online_vendor(result.mac)
+                and vendors.submit(result.mac)
+            ):
+                pending_ouis.add(oui_of(result.mac))
+
+        while not (
+            discovery_done
+            and ports_done
+            and udp_done
+            and not pending
+            and not pending_ouis
+        ):
+            if self._stop_scanning:
+                return
+            if discovery_done and ports_done and udp_done and not pending:
+                # Only vendor lookups are left; give them a bounded grace
+                if vendor_wait_until is None:
+                    vendor_wait_until = time.monotonic() + self.VENDOR_LOOKUP_GRACE
+                    self._update_progress(_("Looking up vendors..."), 95)
+                elif time.monotonic() >= vendor_wait_until:
+                    break
+            try:
+                message = events.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            kind, args = message[0], message[1:]
+            if kind == "host":
+                host = args[0]
+                ip = host["ip"]
+                addresses = host.get("ipv6", [])
+                results[ip] = ScanResult(
                     ip=ip,
-                    hostname=hostname,
-                    mac=host_data["mac"],
-                    vendor=vendor,
-                    services=services,
-                    response_time=0.0,  # Not measuring individual response time anymore
+                    hostname=ip,
+                    mac=host["mac"],
+                    vendor=host["vendor"],
+                    services=[],
+                    response_time=self._response_times.get(ip, 0.0),
                     is_alive=True,
+                    ipv6_addresses=list(addresses),
                 )
-                results.append(scan_result)
+                for address in addresses:
+                    owners[address] = ip
+                # TCP ports are probed on every address, UDP ports on IPv4
+                tcp_probes = len(plan.tcp_ports) * (1 + len(addresses))
+                udp_probes = 0
+                if address_family(ip) == socket.AF_INET:
+                    udp_probes = len(plan.udp_ports)
+                pending[ip] = [tcp_probes, udp_probes, 1]
+                tcp_total += tcp_probes
+                lookup_vendor(results[ip])
+                yield snapshot(SCAN_EVENT_ADDED, ip)
+                yield from settle(ip)
+
+            elif kind == "port":
+                address, port, state = args
+                ip = owners.get(address, address)
+                ports_completed += 1
+                if ip in pending:
+                    pending[ip][0] -= 1
+                    services = results[ip].services
+                    # A dual-stack service answers on both addresses
+                    found = [
+                        service
+                        for service in plan.services_for(port, "tcp")
+                        if service not in services
+                    ]
+                    if state == PORT_OPEN and found:
+                        services.extend(found)
+                        yield snapshot(SCAN_EVENT_UPDATED, ip)
+                    yield from settle(ip)
+
+                if ports_completed % 20 == 0:  # Update less frequently
+                    total_scans = tcp_total
+                    progress = 0.0
+                    if discovery_done:
+                        progress = 35 + (ports_completed / max(total_scans, 1)) * 50
+                    self._update_progress(
+                        _("Scanned") + f" {ports_completed}/{total_scans} " + _("ports"),
+                        progress,
+                    )
 
+            elif kind == "udp":
+                ip, port, state = args
+                if ip in pending:
+                    pending[ip][1] -= 1
+                    # Silent (open|filtered) ports are not reported as services
+                    if state == PORT_OPEN:
+                        results[ip].services.extend(plan.services_for(port, "udp"))
+                        yield snapshot(SCAN_EVENT_UPDATED, ip)
+                    yield from settle(ip)
+
+            elif kind == "identity":
+                ip = args[0]
+                if ip not in pending:
+                    continue
+                pending[ip][2] -= 1
+                identity = args[1] or {}
+                result = results[ip]
+                raw_hostnames[ip] = identity.get("hostname") or ip
+                result.workgroup = identity.get("workgroup", "")
+                if identity.get("mac") and not result.mac:
+                    # Hosts behind a router have no neighbor entry
+                    result.mac = identity["mac"]
+                    result.vendor = identity["vendor"]
+                    lookup_vendor(result)
+                if raw_hostnames[ip] != ip or result.workgroup or result.mac:
+                    yield snapshot(SCAN_EVENT_UPDATED, ip)
+                yield from settle(ip)
+
+            elif kind == "vendor":
+                oui, vendor = args
+                pending_ouis.discard(oui)
+                if not vendor:
+                    continue
+                for ip, result in results.items():
+                    if result.vendor == "Unknown" and oui_of(result.mac) == oui:
+                        result.vendor = vendor
+                        self.vendor_cache[
+                            result.mac.replace(":", "").replace("-", "").upper()
+                        ] = vendor
+                        yield snapshot(SCAN_EVENT_UPDATED, ip)
+
+            elif kind == "discovery_done":
+                discovery_done = True
+                if not results:
+                    self._update_progress(_("No hosts found"), 100)
+
+            elif kind == "ports_done":
+                ports_done = True
+                # The engine only stops early on errors; do not wait for
+                # probes it will never report
+                for ip in list(pending):
+                    pending[ip][0] = 0
+                    yield from settle(ip)
+                if pending:
+                    self._update_progress(_("Resolving hostnames..."), 85)
+
+            elif kind == "udp_done":
+                udp_done = True
+                for ip in list(pending):
+                    pending[ip][1] = 0
+                    yield from settle(ip)
+
+        if results:
             self._update_progress(_("Scan completed"), 100)
-            return results
 
-        except Exception as e:
-            logging.error(f"Network scan failed: {e}")
-            self._update_progress(_("Scan failed:") + f" {e}", 100)
-            return results
+    @staticmethod
+    def _future_result(future: concurrent.futures.Future, default):
+        """Return a finished future's result, or default if it failed or was cancelled."""
+        if future.cancelled() or future.exception() is not None:
+            return default
+        return future.result()
 
     def _enhanced_host_discovery(self, network_range: str) -> List[Dict[str, str]]:
         """Enhanced host discovery using multiple detection methods."""
-        hosts = []
-        discovered_ips = set()
-
         try:
-            # Parse IP range
-            try:
-                from ..utils.network import parse_ip_range
-            except ImportError:
-                try:
-                    from utils.network import parse_ip_range
-                except ImportError:
-                    # Fallback: use simple IP range parsing
-                    def parse_ip_range(network_range: str) -> List[str]:
-                        if "/" in network_range:
-                            network = ipaddress.ip_network(network_range, strict=False)
-                            return [str(ip) for ip in network.hosts()]
-                        elif "-" in network_range:
-                            start_ip, end_ip = network_range.split("-")
-                            start = ipaddress.ip_address(start_ip.strip())
-                            end = ipaddress.ip_address(end_ip.strip())
-                            return [
-                                str(ipaddress.ip_address(int(start) + i))
-                                for i in range(int(end) - int(start) + 1)
-                            ]
-                        else:
-                            return [network_range]
+            # Share one pool and rate controller across the discovery methods
+            with self._scan_pool():
+                hosts = list(self.iter_discover_hosts(network_range))
+            self._update_progress(_("Found") + f" {len(hosts)} " + _("hosts"), 35)
+            return hosts
 
-            ip_list = parse_ip_range(network_range)
-            if len(ip_list) > 254:
-                ip_list = ip_list[:254]
+        except Exception as e:
+            logging.error(f"Enhanced discovery failed: {e}")
+            return []
+
+    @staticmethod
+    def _parse_scan_range(network_range: str) -> IPRange:
+        """
+        Parse a range whose hosts are to be discovered.
 
-            # Method 1: Optimized ping discovery
-            self._update_progress(
-                _("Ping scanning") + f" {len(ip_list)} " + _("addresses..."), 15
+        Args:
+            network_range: Network range to scan
+
+        Returns:
+            Parsed IPv4 range
+
+        Raises:
+            ValueError: If the range is invalid or IPv6, which cannot be
+                swept address by address
+        """
+        ip_range = IPRange.parse(network_range)
+        if ip_range.version == 6:
+            raise ValueError(
+                _(
+                    "IPv6 ranges cannot be swept; scan the IPv4 subnet of the "
+                    "link to find its IPv6 hosts"
+                )
             )
-            alive_hosts = []
-            batch_size = 100
-            max_workers = min(self.discovery_threads, 25)
+        return ip_range
 
-            for batch_start in range(0, len(ip_list), batch_size):
-                if self._stop_scanning:
-                    break
+    def iter_discover_hosts(self, network_range: str) -> Iterator[Dict[str, Any]]:
+        """
+        Discover live hosts and yield each one as soon as it is found.
 
-                batch_ips = ip_list[batch_start : batch_start + batch_size]
+        Addresses are generated lazily, so ranges of any size (/16 and larger)
+        can be swept with memory bounded by the number of probes in flight.
 
-                with concurrent.futures.ThreadPoolExecutor(
-                    max_workers=min(max_workers, len(batch_ips))
-                ) as executor:
-                    futures = [executor.submit(self._ping_host, ip) for ip in batch_ips]
+        When the range is on a local link, the IPv6 hosts of that link are
+        found with one multicast echo while the IPv4 sweep runs. Their
+        addresses are attached to the IPv4 host with the same MAC; devices
+        seen only over IPv6 are yielded at the end with an IPv6 address as
+        their IP.
 
-                    batch_completed = 0
-                    for future in concurrent.futures.as_completed(futures):
-                        if self._stop_scanning:
-                            break
+        Args:
+            network_range: Network range to scan (e.g., "10.0.0.0/16")
 
-                        try:
-                            ip, is_alive = future.result(
-                                timeout=self.ping_timeout * 2
-                            )  # Reduced from *3 to *2
-                            if is_alive:
-                                alive_hosts.append(ip)
-                                discovered_ips.add(ip)
-                        except Exception:
-                            pass
+        Yields:
+            Host dictionaries with IP, MAC, vendor info and the list of the
+            device's (other) IPv6 addresses
 
-                        batch_completed += 1
+        Raises:
+            ValueError: If the range is invalid or IPv6
+        """
+        self._response_times = {}
+        ip_range = self._parse_scan_range(network_range)
+        interface = find_arp_interface(ip_range)
+
+        lookup = None
+        if interface and self._executor is not None:
+            lookup = self._executor.submit(
+                discover_ipv6_neighbors,
+                interface.name,
+                self.IPV6_ECHO_WAIT,
+                lambda: self._stop_scanning,
+            )
+        by_mac: Optional[Dict[str, List[Ipv6Neighbor]]] = None
+
+        def ipv6_neighbors() -> Dict[str, List[Ipv6Neighbor]]:
+            # Waits for the echo the first time a MAC needs matching
+            nonlocal by_mac
+            if by_mac is None:
+                by_mac = {}
+                for neighbor in self._future_result(lookup, []):
+                    # Without a MAC an address cannot be told apart from
+                    # the IPv4 hosts, so it is left out
+                    if neighbor.mac:
+                        by_mac.setdefault(neighbor.mac, []).append(neighbor)
+                        if self._rtt and neighbor.rtt:
+                            self._rtt.add_sample(neighbor.ip, neighbor.rtt / 1000.0)
+            return by_mac
+
+        merged = set()
+        for host in self._iter_discover_ipv4_hosts(ip_range, interface):
+            host["ipv6"] = []
+            mac = normalize_mac(host["mac"])
+            if lookup and mac:
+                host["ipv6"] = [n.ip for n in ipv6_neighbors().get(mac, [])]
+                merged.add(mac)
+            yield host
+
+        if not lookup or self._stop_scanning:
+            return
+        for mac, neighbors in ipv6_neighbors().items():
+            if mac in merged:
+                continue
+            # A routable address identifies the device better than a
+            # link-local one
+            neighbors.sort(key=lambda neighbor: "%" in neighbor.ip)
+            ip = neighbors[0].ip
+            self._response_times[ip] = max(neighbor.rtt for neighbor in neighbors)
+            yield {
+                "ip": ip,
+                "mac": mac,
+                "vendor": self._get_vendor(mac),
+                "ipv6": [neighbor.ip for neighbor in neighbors[1:]],
+            }
+
+    def _iter_discover_ipv4_hosts(
+        self, ip_range: IPRange, interface: Optional[ArpInterface]
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Discover the live IPv4 hosts of a range (see iter_discover_hosts).
 
-                # Update progress for this batch
-                completed = min(batch_start + batch_size, len(ip_list))
-                progress = 15 + (completed / len(ip_list)) * 10
-                self._update_progress(
-                    _("Ping scan:")
-                    + f" {completed}/{len(ip_list)} "
-                    + _("(")
-                    + f"{len(alive_hosts)} "
-                    + _("found")
-                    + _(")"),
-                    progress,
-                )
+        Args:
+            ip_range: Addresses to sweep
+            interface: Local interface whose subnet holds the whole range,
+                None if the range is not on one local link
 
-                # Only add delay for very large networks (> 200 IPs) to prevent overwhelming
-                if len(ip_list) > 200 and batch_start + batch_size < len(ip_list):
-                    time.sleep(0.05)  # Much shorter delay
-
-            # Method 2: Check ARP table for recently active hosts
-            self._update_progress(_("Checking ARP table..."), 26)
-            arp_table = self._get_system_arp_table()
-            arp_added = 0
-
-            for ip in arp_table.keys():
-                if ip not in discovered_ips and self._is_in_network(ip, network_range):
-                    alive_hosts.append(ip)
-                    discovered_ips.add(ip)
-                    arp_added += 1
-
-            if arp_added > 0:
-                logging.debug(f"Added {arp_added} hosts from ARP table")
-
-            # Method 3: TCP port probe for silent hosts (limited for large networks)
-            self._update_progress(_("TCP port probe for silent hosts..."), 28)
-            remaining_ips = [ip for ip in ip_list if ip not in discovered_ips]
-
-            if remaining_ips:
-                # Limit the number of IPs to probe for large networks
-                max_probe_ips = min(50, len(remaining_ips))
-                probe_ips = remaining_ips[:max_probe_ips]
-
-                # Test fewer, more common ports to reduce load
-                test_ports = [22, 80, 443, 445, 3389]  # Most common ports
-
-                # Much smaller thread pool to avoid overwhelming the network
-                max_probe_workers = min(10, len(probe_ips) * len(test_ports))
-
-                with concurrent.futures.ThreadPoolExecutor(
-                    max_workers=max_probe_workers
-                ) as executor:
-                    port_futures = []
-                    for ip in probe_ips:
-                        for port in test_ports:
-                            future = executor.submit(self._tcp_ping, ip, port)
-                            port_futures.append((future, ip))
-
-                    found_in_probe = set()
-                    for future, ip in port_futures:
-                        if self._stop_scanning:
-                            break
-                        try:
-                            if future.result(timeout=2.0):  # Reasonable timeout
-                                if (
-                                    ip not in discovered_ips
-                                    and ip not in found_in_probe
-                                ):
-                                    alive_hosts.append(ip)
-                                    discovered_ips.add(ip)
-                                    found_in_probe.add(ip)
-                        except Exception:
-                            continue
-
-            # Build final host list with MAC and vendor info
-            self._update_progress(_("Getting MAC addresses..."), 32)
-            for ip in alive_hosts:
-                if self._stop_scanning:
-                    break
+        Yields:
+            Host dictionaries with IP, MAC, and vendor info
+        """
+        discovered_ips = set()
+        total = len(ip_range)
+
+        # The kernel resolves an on-link host's MAC before it can send the
+        # echo request, so the neighbor table normally has it once the reply
+        # arrives. The table is re-read on a miss (at most every
+        # ARP_REFRESH_INTERVAL); hosts missed in between wait for the next
+        # read. Hosts beyond the local link have no MAC and go out at once.
+        onlink = get_onlink_range()
+
+        # Privileged scans of a local subnet: one ARP sweep finds every
+        # device with its MAC and replaces all the steps below
+        if interface and self.use_privileged_scan and raw_sockets_available():
+            try:
+                yield from self._iter_arp_sweep(ip_range, interface)
+                return
+            except OSError as e:
+                logging.warning(f"ARP sweep failed, using ping sweep: {e}")
 
-                mac = arp_table.get(ip, "")
-                vendor = self._get_vendor(mac) if mac else "Unknown"
-                hosts.append({"ip": ip, "mac": mac, "vendor": vendor})
+        arp_table: Dict[str, str] = {}
+        arp_read_at = 0.0
+        waiting: List[str] = []
 
-            self._update_progress(_("Found") + f" {len(hosts)} " + _("hosts"), 35)
-            return hosts
+        def build_host(ip: str) -> Dict[str, str]:
+            mac = arp_table.get(ip, "")
+            vendor = self._get_vendor(mac) if mac else "Unknown"
+            return {"ip": ip, "mac": mac, "vendor": vendor}
 
-        except Exception as e:
-            logging.error(f"Enhanced discovery failed: {e}")
-            return []
+        # Method 1: ICMP echo sweep (in-process when the kernel allows it)
+        self._update_progress(
+            _("Ping scanning") + f" {total} " + _("addresses..."), 15
+        )
+        rtt_table = self._rtt
+        for ip, rtt in self._iter_ping_sweep(iter(ip_range), total):
+            discovered_ips.add(ip)
+            self._response_times[ip] = rtt
+            if rtt_table:
+                rtt_table.add_sample(ip, rtt / 1000.0)
+
+            if ip in arp_table or ip not in onlink:
+                yield build_host(ip)
+                continue
+
+            waiting.append(ip)
+            if time.monotonic() - arp_read_at >= self.ARP_REFRESH_INTERVAL:
+                arp_table = self._get_system_arp_table()
+                arp_read_at = time.monotonic()
+                for waiting_ip in waiting:
+                    yield build_host(waiting_ip)
+                waiting.clear()
+
+        # Method 2: Check ARP table for recently active hosts
+        self._update_progress(_("Checking ARP table..."), 26)
+        arp_table = self._get_system_arp_table()
+        for waiting_ip in waiting:
+            yield build_host(waiting_ip)
+        waiting.clear()
+
+        arp_added = 0
+        for ip in arp_table.keys():
+            if self._stop_scanning:
+                return
+            if ip not in discovered_ips and ip in ip_range:
+                discovered_ips.add(ip)
+                arp_added += 1
+                yield build_host(ip)
+
+        if arp_added > 0:
+            logging.debug(f"Added {arp_added} hosts from ARP table")
+
+        # Method 3: UDP priming sweep for silent hosts on the local link.
+        # One datagram per address makes the kernel ARP for it; hosts that
+        # answer ARP then show up in the neighbor table.
+        self._update_progress(_("Resolving silent hosts on the local link..."), 28)
+        for ip, mac in self._iter_priming_sweep(ip_range, onlink, discovered_ips):
+            discovered_ips.add(ip)
+            arp_table[ip] = mac
+            yield build_host(ip)
+
+        # Method 4: TCP port probe for silent hosts beyond the local link
+        # (limited for large networks)
+        probe_ips = list(
+            itertools.islice(
+                (
+                    ip
+                    for ip in ip_range
+                    if ip not in discovered_ips and ip not in onlink
+                ),
+                50,
+            )
+        )
 
-    def _discover_avahi_services(self, ip: str) -> Dict[str, any]:
-        """
-        Use avahi-browse to discover services advertised by a device.
-        This provides additional context about device types and capabilities.
+        if probe_ips and not self._stop_scanning:
+            self._update_progress(_("TCP port probe for silent hosts..."), 30)
+            # Test fewer, more common ports to reduce load
+            test_ports = [22, 80, 443, 445, 3389]  # Most common ports
+
+            with self._scan_pool() as executor:
+                budget = self._budget
+                port_futures = []
+                for ip in probe_ips:
+                    for port in test_ports:
+                        future = budget.submit(
+                            executor,
+                            self._tcp_ping,
+                            ip,
+                            port,
+                            stop_check=lambda: self._stop_scanning,
+                            default=False,
+                        )
+                        port_futures.append((future, ip))
 
-        Args:
-            ip: IP address to check for services
+                for future, ip in port_futures:
+                    if self._stop_scanning:
+                        break
+                    try:
+                        if future.result():
+                            if ip not in discovered_ips:
+                                discovered_ips.add(ip)
+                                yield build_host(ip)
+                    except Exception:
+                        continue
 
-        Returns:
-            Dictionary with discovered service information
+    def _iter_priming_sweep(
+        self, ip_range: IPRange, onlink: IPRange, discovered_ips: set
+    ) -> Iterator[Tuple[str, str]]:
         """
-        services_info = {"services": [], "device_type": None, "manufacturer": None}
+        Prime the kernel neighbor cache for undiscovered on-link addresses.
 
-        if not self._is_avahi_available():
-            return services_info
+        Addresses are primed in chunks no larger than the kernel's default
+        neighbor table threshold, and the table is read once after each
+        chunk has had time to settle.
 
-        try:
-            # Check for avahi-browse availability
-            browse_check = subprocess.run(
-                ["which", "avahi-browse"], capture_output=True, timeout=1, check=False
-            )
-            if browse_check.returncode != 0:
-                return services_info
+        Args:
+            ip_range: Addresses being scanned
+            onlink: Directly connected addresses
+            discovered_ips: Addresses already known to be alive
 
-            # Browse for all services with timeout
-            result = subprocess.run(
-                ["avahi-browse", "-a", "-t", "-r", "-p"],
-                capture_output=True,
-                text=True,
-                timeout=3,
-                check=False,
+        Yields:
+            Tuples of (ip, mac) for hosts that answered ARP
+        """
+        targets = (
+            ip for ip in ip_range if ip not in discovered_ips and ip in onlink
+        )
+        while not self._stop_scanning:
+            chunk = list(itertools.islice(targets, self.PRIMING_CHUNK_SIZE))
+            if not chunk:
+                break
+
+            prime_neighbors(
+                chunk,
+                stop_check=lambda: self._stop_scanning,
+                rate_control=self._rate,
             )
+            time.sleep(self.PRIMING_SETTLE_TIME)
 
-            if result.returncode == 0 and result.stdout.strip():
-                lines = result.stdout.strip().split("\n")
-                for line in lines:
-                    # avahi-browse -p output format: =;eth0;IPv4;Service;_http._tcp;local;hostname;192.168.1.100;80;
-                    if line.startswith("=") and ip in line:
-                        parts = line.split(";")
-                        if len(parts) >= 9:
-                            (
-                                interface,
-                                protocol,
-                                service_name,
-                                service_type,
-                                domain,
-                                hostname,
-                                service_ip,
-                                port,
-                            ) = parts[1:9]
-                            if service_ip == ip:
-                                service_info = {
-                                    "name": service_name,
-                                    "type": service_type,
-                                    "port": port,
-                                    "hostname": hostname,
-                                }
-                                services_info["services"].append(service_info)
-
-                                # Infer device type from services
-                                if (
-                                    "_airplay._tcp" in service_type
-                                    or "_raop._tcp" in service_type
-                                ):
-                                    services_info["device_type"] = "Apple Device"
-                                elif "_googlecast._tcp" in service_type:
-                                    services_info["device_type"] = "Chromecast Device"
-                                elif (
-                                    "_printer._tcp" in service_type
-                                    or "_ipp._tcp" in service_type
-                                ):
-                                    services_info["device_type"] = "Network Printer"
-                                elif (
-                                    "_smb._tcp" in service_type
-                                    or "_afp._tcp" in service_type
-                                ):
-                                    services_info["device_type"] = "File Server"
-                                elif "_ssh._tcp" in service_type:
-                                    services_info["device_type"] = "SSH Server"
-                                elif "_http._tcp" in service_type:
-                                    services_info["device_type"] = "Web Server"
-
-        except (subprocess.TimeoutExpired, subprocess.CalledProcessError, OSError) as e:
-            logging.debug(f"Avahi service discovery failed for {ip}: {e}")
-
-        return services_info
+            chunk_ips = set(chunk)
+            for ip, mac in self._get_system_arp_table().items():
+                if ip in chunk_ips:
+                    yield ip, mac
 
     def _tcp_ping(self, ip: str, port: int) -> bool:
-        """Perform a TCP connection test to detect hosts that don't respond to ICMP."""
-        try:
-            import socket
+        """
+        Perform a TCP connection test to detect hosts that don't respond to ICMP.
 
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        Answers (open or closed) go into the probe ledger, so the service
+        scan does not probe the port again. Silence after this short
+        timeout is not recorded: the service scan must still probe the
+        port with its own, longer timeout.
+        """
+        ledger = self._ledger
+        known = None
+        if ledger is not None:
+            known = ledger.get(ip, port, "tcp")
+        if known:
+            return known.state != PORT_FILTERED
+
+        if not self._acquire_probe_slot(ip):
+            return False
+        try:
+            sock = socket.socket(address_family(ip), socket.SOCK_STREAM)
             sock.settimeout(0.3)  # Very quick timeout
-            result = sock.connect_ex((ip, port))
+            started = time.monotonic()
+            result = sock.connect_ex(socket_address(ip, port))
+            rtt = (time.monotonic() - started) * 1000.0
             sock.close()
-            return (
-                result == 0 or result == 111
-            )  # Connected or connection refused (host exists)
         except Exception:
             return False
+        finally:
+            self._release_probe_slot(ip)
 
-    def _is_in_network(self, ip: str, network_range: str) -> bool:
-        """Check if an IP address is within the specified network range."""
-        try:
-            import ipaddress
-
-            network = ipaddress.ip_network(network_range, strict=False)
-            return ipaddress.ip_address(ip) in network
-        except Exception:
+        if result == 0:
+            state = PORT_OPEN
+        elif result == errno.ECONNREFUSED:
+            state = PORT_CLOSED
+        else:
             return False
+        if ledger is not None:
+            ledger.record(ip, port, "tcp", state, rtt)
+        # Connected or connection refused (host exists)
+        return True
@@ -0,0 +1,430 @@
+"""
+Half-open TCP SYN scanner for privileged scans.
+One raw socket per address family sends hand-built SYNs and reads the
+replies. The initial sequence number of each SYN is a keyed hash of the
+target (a SYN cookie), so a SYN/ACK or RST is matched to its probe from
+the packet alone. No kernel connection is set up and no descriptor is
+used per probe. Requires CAP_NET_RAW.
+"""
+
+import errno
+import hashlib
+import heapq
+import itertools
+import logging
+import os
+import select
+import socket
+import struct
+import time
+from collections import defaultdict, deque
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from ..utils.network import scoped_address, socket_address
+from .pipeline import ConcurrencyBudget
+from .port_scanner import PORT_CLOSED, PORT_FILTERED, PORT_OPEN, ProbeResult
+from .probe_ledger import ProbeLedger
+from .rate_control import RateController
+from .rtt import RttTable
+
+logger = logging.getLogger(__name__)
+
+# TCP flags
+_SYN = 0x02
+_RST = 0x04
+_ACK = 0x10
+
+# Header without options, then the MSS option (kind 2, length 4)
+_TCP_HEADER = struct.Struct("!HHIIBBHHH")
+_MSS_OPTION = struct.pack("!BBH", 2, 4, 1460)
+_SYN_WINDOW = 1024
+
+# Send errors that mean the kernel queue is full rather than the target
+_LOSS_ERRORS = frozenset((errno.ENOBUFS, errno.EAGAIN))
+
+
+def raw_sockets_available() -> bool:
+    """Check whether this process may open raw sockets (CAP_NET_RAW)."""
+    try:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_TCP)
+    except OSError:
+        return False
+    sock.close()
+    return True
+
+
+def _checksum(data: bytes) -> int:
+    """Internet checksum (RFC 1071)."""
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    while total >> 16:
+        total = (total & 0xFFFF) + (total >> 16)
+    return ~total & 0xFFFF
+
+
+class SynScanner:
+    """Stateless raw-socket SYN scanner, a drop-in for TcpConnectScanner."""
+
+    # Seconds between polls for new targets while the work feed is empty
+    IDLE_POLL_INTERVAL = 0.02
+
+    def __init__(
+        self,
+        timeout: float = 1.0,
+        retries: int = 1,
+        max_in_flight: int = 4096,
+        stop_check: Optional[Callable[[], bool]] = None,
+        budget: Optional[ConcurrencyBudget] = None,
+        rtt: Optional[RttTable] = None,
+        rate: Optional[RateController] = None,
+        ledger: Optional[ProbeLedger] = None,
+    ):
+        """
+        Initialize the scanner.
+
+        Args:
+            timeout: Seconds to wait for an answer to each SYN
+            retries: SYNs resent to a silent port before it is filtered
+            max_in_flight: Maximum unanswered SYNs at once
+            stop_check: Optional callable returning True when scanning should abort
+            budget: Optional concurrency budget shared with other scan
+                stages; every probe in flight holds one slot
+            rtt: Optional per-host RTT table for the timeouts; every
+                answer or timeout is recorded in it
+            rate: Optional rate controller pacing the SYNs, capping the
+                probes in flight per host and told about answers and losses
+            ledger: Optional probe ledger; targets it already holds are
+                answered from it, new outcomes are recorded in it
+        """
+        self.timeout = max(0.05, timeout)
+        self.retries = max(0, retries)
+        self.max_in_flight = max(1, max_in_flight)
+        self.stop_check = stop_check
+        self.budget = budget
+        self.rtt = rtt
+        self.rate = rate
+        self.ledger = ledger
+        self._secret = os.urandom(16)
+        self._sources: Dict[str, bytes] = {}
+
+    def _cookie(self, ip: str, port: int, sport: int) -> int:
+        """Initial sequence number of the SYN to a target."""
+        address = ip.split("%", 1)[0]
+        digest = hashlib.blake2s(
+            f"{address}:{port}:{sport}".encode(), key=self._secret, digest_size=4
+        ).digest()
+        return int.from_bytes(digest, "big")
+
+    def _source_address(self, ip: str) -> bytes:
+        """Return the packed local address the kernel will send from to ip."""
+        source = self._sources.get(ip)
+        if source is None:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            try:
+                # Connecting a UDP socket only runs the route lookup
+                sock.connect((ip, 9))
+                source = socket.inet_aton(sock.getsockname()[0])
+            except OSError:
+                source = bytes(4)
+            finally:
+                sock.close()
+            self._sources[ip] = source
+        return source
+
+    def _build_syn(self, ip: str, port: int, sport: int) -> bytes:
+        """
+        Build a SYN segment.
+
+        IPv4 segments carry their checksum over the pseudo-header; the
+        kernel fills in the checksum of IPv6 ones (IPV6_CHECKSUM).
+        """
+        header = _TCP_HEADER.pack(
+            sport,
+            port,
+            self._cookie(ip, port, sport),
+            0,
+            6 << 4,  # Data offset in 32-bit words
+            _SYN,
+            _SYN_WINDOW,
+            0,
+            0,
+        )
+        segment = header + _MSS_OPTION
+        if ":" in ip:
+            return segment
+        pseudo = (
+            self._source_address(ip)
+            + socket.inet_aton(ip)
+            + struct.pack("!BBH", 0, socket.IPPROTO_TCP, len(segment))
+        )
+        checksum = _checksum(pseudo + segment)
+        return segment[:16] + struct.pack("!H", checksum) + segment[18:]
+
+    def scan(self, targets: Iterable[Tuple[str, int]]) -> Iterator[ProbeResult]:
+        """
+        Probe (ip, port) pairs and yield results as they complete.
+
+        Targets follow the same protocol as TcpConnectScanner.scan: they
+        are consumed lazily and None means "nothing to do yet".
+
+        Args:
+            targets: Iterable of (ip, port) pairs, possibly interleaved with None
+
+        Yields:
+            ProbeResult for every target, in completion order; a SYN/ACK
+            is PORT_OPEN, an RST PORT_CLOSED and silence PORT_FILTERED
+        """
+        raw = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_TCP)
+        raw.setblocking(False)
+        # A bound, non-listening socket reserves the source port: the
+        # kernel answers our SYN/ACKs with RST (closing the half-open
+        # connection) and no local connection can pick the same port.
+        reserved = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        reserved.bind(("0.0.0.0", 0))
+        sport = reserved.getsockname()[1]
+        raw6, reserved6 = self._open_ipv6(sport)
+        sockets = [raw] + ([raw6] if raw6 else [])
+
+        # (ip, port) -> [first send time, SYNs sent, deadline, timeout]
+        pending: Dict[Tuple[str, int], list] = {}
+        # Heap of (deadline, sequence, (ip, port)); stale entries are skipped
+        deadlines: list = []
+        sequence = itertools.count()
+        rtt_table = self.rtt
+        rate = self.rate
+        per_host = rate.per_host if rate else self.max_in_flight
+        # Probes in flight per host, targets waiting for one of those to
+        # finish, and targets whose host has a free slot again
+        host_load: Dict[str, int] = defaultdict(int)
+        deferred: Dict[str, deque] = {}
+        deferred_count = 0
+        ready: deque = deque()
+        resend: deque = deque()
+        source = iter(targets)
+        exhausted = False
+        budget = self.budget
+        ledger = self.ledger
+
+        def finish(key: Tuple[str, int], state: str) -> ProbeResult:
+            nonlocal deferred_count
+            entry = pending.pop(key)
+            ip = key[0]
+            if budget:
+                budget.release()
+            host_load[ip] -= 1
+            waiting = deferred.get(ip)
+            if waiting:
+                ready.append(waiting.popleft())
+                deferred_count -= 1
+                if not waiting:
+                    del deferred[ip]
+            if host_load[ip] <= 0:
+                del host_load[ip]
+
+            if state == PORT_FILTERED:
+                rtt = entry[3] * 1000.0
+            else:
+                elapsed = time.monotonic() - entry[0]
+                rtt = elapsed * 1000.0
+                if rtt_table:
+                    # Only SYNs answered on the first try give a sample
+                    rtt_table.answered(
+                        ip,
+                        elapsed if entry[1] == 1 else 0.0,
+                        refused=state == PORT_CLOSED,
+                    )
+                if rate:
+                    rate.on_answer()
+            result = ProbeResult(*key, state, rtt)
+            if ledger is not None:
+                ledger.record(*key, "tcp", state, rtt)
+            return result
+
+        def send(key: Tuple[str, int]) -> bool:
+            entry = pending[key]
+            sock = raw6 if ":" in key[0] else raw
+            try:
+                if sock is None:
+                    raise OSError(errno.EAFNOSUPPORT, "no IPv6 raw socket")
+                sock.sendto(self._build_syn(*key, sport), socket_address(key[0], 0))
+            except OSError as e:
+                if e.errno in _LOSS_ERRORS or isinstance(e, BlockingIOError):
+                    if rate:
+                        rate.on_loss()
+                    return False
+                logger.debug("SYN to %s:%s failed: %s", *key, e)
+            entry[1] += 1
+            entry[3] = rtt_table.timeout(key[0]) if rtt_table else self.timeout
+            entry[2] = time.monotonic() + entry[3]
+            heapq.heappush(deadlines, (entry[2], next(sequence), key))
+            return True
+
+        try:
+            while True:
+                if self.stop_check and self.stop_check():
+                    break
+
+                # Resend SYNs that went unanswered, then start new probes
+                idle = False
+                paced = False
+                while resend or len(pending) < self.max_in_flight:
+                    if resend:
+                        if rate and not rate.try_take():
+                            paced = True
+                            break
+                        if not send(resend[0]):
+                            break
+                        resend.popleft()
+                        continue
+                    if ready:
+                        target = ready.popleft()
+                    elif exhausted or deferred_count >= self.max_in_flight:
+                        idle = not exhausted
+                        break
+                    else:
+                        try:
+                            target = next(source)
+                        except StopIteration:
+                            exhausted = True
+                            break
+                        if target is None:
+                            idle = True
+                            break
+                        key = (target[0], target[1])
+                        known = None
+                        if ledger is not None:
+                            known = ledger.get(*key, "tcp")
+                        if known is not None or key in pending:
+                            if known is not None:
+                                # Probed by an earlier stage of the scan
+                                yield ProbeResult(*key, known.state, known.rtt)
+                            continue
+                    ip, port = target
+                    if host_load[ip] >= per_host:
+                        deferred.setdefault(ip, deque()).append(target)
+                        deferred_count += 1
+                        continue
+                    if rate and not rate.try_take():
+                        ready.appendleft(target)
+                        paced = True
+                        break
+                    if budget and not budget.try_acquire():
+                        ready.appendleft(target)
+                        idle = True
+                        break
+                    key = (ip, port)
+                    host_load[ip] += 1
+                    pending[key] = [time.monotonic(), 0, 0.0, 0.0]
+                    if not send(key):
+                        resend.append(key)
+                        break
+
+                if exhausted and not ready and not pending:
+                    break
+
+                wait = rtt_table.ceiling if rtt_table else self.timeout
+                if deadlines:
+                    wait = max(0.0, deadlines[0][0] - time.monotonic())
+                if paced:
+                    wait = min(wait, rate.wait_time())
+                if idle or (not exhausted and not pending):
+                    # Waiting for new targets or for budget held by other stages
+                    wait = min(wait, self.IDLE_POLL_INTERVAL)
+
+                readable, _w, _x = select.select(sockets, [], [], wait)
+                for sock in readable:
+                    for key, state in self._receive(sock, sport):
+                        if key in pending:
+                            yield finish(key, state)
+
+                # Resend or give up on SYNs that got no answer in time
+                now = time.monotonic()
+                while deadlines and deadlines[0][0] <= now:
+                    deadline, _sequence, key = heapq.heappop(deadlines)
+                    entry = pending.get(key)
+                    if entry is None or entry[2] != deadline:
+                        continue
+                    if entry[1] <= self.retries:
+                        resend.append(key)
+                        continue
+                    if rtt_table:
+                        # A host that resets closed ports should have
+                        # answered; one that drops them is just firewalled
+                        if rate and rtt_table.sends_resets(key[0]):
+                            rate.on_loss()
+                        rtt_table.timed_out(key[0])
+                    yield finish(key, PORT_FILTERED)
+
+        finally:
+            if budget:
+                for _key in pending:
+                    budget.release()
+            for sock in (raw, reserved, raw6, reserved6):
+                if sock:
+                    sock.close()
+
+    @staticmethod
+    def _open_ipv6(
+        sport: int,
+    ) -> Tuple[Optional[socket.socket], Optional[socket.socket]]:
+        """Open the IPv6 raw socket and reserve sport for it, if possible."""
+        try:
+            raw6 = socket.socket(socket.AF_INET6, socket.SOCK_RAW, socket.IPPROTO_TCP)
+        except OSError as e:
+            logger.debug("No IPv6 raw socket: %s", e)
+            return None, None
+        raw6.setblocking(False)
+        reserved6 = socket.socket(socket.AF_INET6, socket.SOCK_STREAM)
+        try:
+            # Offset of the checksum field in the TCP header
+            raw6.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_CHECKSUM, 16)
+            reserved6.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_V6ONLY, 1)
+            reserved6.bind(("::", sport))
+        except OSError as e:
+            # The port stays reserved for IPv4 only
+            logger.debug("Cannot set up IPv6 SYN scanning: %s", e)
+            reserved6.close()
+            reserved6 = None
+        return raw6, reserved6
+
+    def _receive(
+        self, raw: socket.socket, sport: int
+    ) -> Iterator[Tuple[Tuple[str, int], str]]:
+        """Read every queued packet, yielding ((ip, port), state) for our replies."""
+        ipv6 = raw.family == socket.AF_INET6
+        while True:
+            try:
+                packet, address = raw.recvfrom(128)
+            except OSError:
+                # Nothing left to read (EAGAIN)
+                return
+            # IPv4 raw sockets deliver the IP header, IPv6 ones do not
+            header_length = 0 if ipv6 else (packet[0] & 0x0F) * 4
+            segment = packet[header_length : header_length + _TCP_HEADER.size]
+            if len(segment) < _TCP_HEADER.size:
+                continue
+            port, dport, _seq, ack, _offset, flags, _w, _c, _u = (
+                _TCP_HEADER.unpack(segment)
+            )
+            if dport != sport:
+                continue
+            if not ipv6:
+                ip = socket.inet_ntoa(packet[12:16])
+            elif address[3]:
+                ip = scoped_address(address[0], socket.if_indextoname(address[3]))
+            else:
+                ip = address[0].split("%", 1)[0]
+            # The answer acknowledges our cookie + 1; anything else is not ours
+            if ack != (self._cookie(ip, port, sport) + 1) & 0xFFFFFFFF:
+                continue
+            if flags & _RST:
+                yield (ip, port), PORT_CLOSED
+            elif flags & (_SYN | _ACK) == _SYN | _ACK:
+                yield (ip, port), PORT_OPEN
+
+    def check(self, ip: str, port: int) -> bool:
+        """Probe a single port and return True if it answered with SYN/ACK."""
+        for result in self.scan([(ip, port)]):
+            return result.state == PORT_OPEN
+        return False
@@ -0,0 +1,391 @@
+"""
+Event-loop driven UDP service scanner.
+Sends protocol-correct requests from a few sockets and classifies ports by
+the answer: a reply means open, an ICMP port unreachable (read from the
+error queue via IP_RECVERR) means closed, silence means open|filtered.
+"""
+
+import errno
+import heapq
+import itertools
+import logging
+import select
+import socket
+import struct
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .dns_message import TYPE_A, TYPE_PTR, encode_query
+from .mdns import MDNS_PORT, SERVICE_ENUMERATION
+from .netbios import NETBIOS_NS_PORT, encode_nbstat_request
+from .pipeline import ConcurrencyBudget
+from .port_scanner import (
+    PORT_CLOSED,
+    PORT_FILTERED,
+    PORT_OPEN,
+    PORT_OPEN_FILTERED,
+    ProbeResult,
+)
+from .probe_ledger import ProbeLedger
+from .rate_control import RateController
+from .rtt import RttTable
+
+logger = logging.getLogger(__name__)
+
+# linux/in.h and linux/errqueue.h; not every Python exposes them
+IP_RECVERR = getattr(socket, "IP_RECVERR", 11)
+MSG_ERRQUEUE = getattr(socket, "MSG_ERRQUEUE", 0x2000)
+SO_EE_ORIGIN_ICMP = 2
+ICMP_DEST_UNREACH = 3
+ICMP_PORT_UNREACH = 3
+
+# struct sock_extended_err: errno, origin, type, code, pad, info, data
+_EXTENDED_ERR = struct.Struct("=IBBBBII")
+_ERR_ANCILLARY_SIZE = socket.CMSG_SPACE(_EXTENDED_ERR.size + 16)
+
+# Transaction id carried by the requests that have one
+_TXID = 0x424E
+
+
+def _snmp_get_request() -> bytes:
+    """SNMPv1 GetRequest for sysDescr.0 with the community "public"."""
+
+    def tlv(tag: int, value: bytes) -> bytes:
+        return bytes([tag, len(value)]) + value
+
+    varbind = tlv(0x30, tlv(0x06, bytes([0x2B, 6, 1, 2, 1, 1, 1, 0])) + b"\x05\x00")
+    pdu = tlv(
+        0xA0,
+        tlv(0x02, struct.pack("!I", _TXID))  # request-id
+        + tlv(0x02, b"\x00")  # error-status
+        + tlv(0x02, b"\x00")  # error-index
+        + tlv(0x30, varbind),
+    )
+    return tlv(0x30, tlv(0x02, b"\x00") + tlv(0x04, b"public") + pdu)
+
+
+# Requests that make a service answer; other ports get an empty datagram.
+# Built once and shared by every probe.
+UDP_PAYLOADS: Dict[int, bytes] = {
+    53: encode_query([("localhost", TYPE_A)], txid=_TXID),
+    # NTP v4 client request
+    123: b"\xe3" + b"\x00" * 47,
+    # Portmapper NULL call (ONC RPC program 100000 version 2)
+    111: struct.pack("!10I", _TXID, 0, 2, 100000, 2, 0, 0, 0, 0, 0),
+    NETBIOS_NS_PORT: encode_nbstat_request(_TXID),
+    161: _snmp_get_request(),
+    1900: (
+        b"M-SEARCH * HTTP/1.1\r\n"
+        b"HOST: 239.255.255.250:1900\r\n"
+        b'MAN: "ssdp:discover"\r\n'
+        b"MX: 1\r\n"
+        b"ST: ssdp:all\r\n\r\n"
+    ),
+    # NAT-PMP external address request
+    5351: b"\x00\x00",
+    # Unicast mDNS query; responders answer to the source port directly
+    MDNS_PORT: encode_query([(SERVICE_ENUMERATION, TYPE_PTR)], txid=_TXID),
+}
+
+# Send errors that belong to an earlier probe's ICMP error, not this send
+_STALE_ERRORS = frozenset(
+    (errno.ECONNREFUSED, errno.EHOSTUNREACH, errno.ENETUNREACH, errno.EHOSTDOWN)
+)
+
+
+class UdpScanner:
+    """Multiplexed UDP prober with payloads, retries and ICMP error reading."""
+
+    # Seconds between polls for new targets while the work feed is empty
+    IDLE_POLL_INTERVAL = 0.02
+
+    def __init__(
+        self,
+        timeout: float = 1.0,
+        retries: int = 1,
+        sockets: int = 2,
+        max_in_flight: int = 512,
+        stop_check: Optional[Callable[[], bool]] = None,
+        budget: Optional[ConcurrencyBudget] = None,
+        rtt: Optional[RttTable] = None,
+        rate: Optional[RateController] = None,
+        ledger: Optional[ProbeLedger] = None,
+    ):
+        """
+        Initialize the scanner.
+
+        Args:
+            timeout: Seconds to wait for an answer to each send
+            retries: Extra sends before a silent port is open|filtered
+            sockets: Sockets the probes are spread over
+            max_in_flight: Maximum unanswered probes at once
+            stop_check: Optional callable returning True when scanning should abort
+            budget: Optional concurrency budget shared with other scan
+                stages; every probe in flight holds one slot
+            rtt: Optional per-host RTT table for the timeouts; answers
+                are recorded in it
+            rate: Optional rate controller pacing the sends
+            ledger: Optional probe ledger; ports it already holds are
+                answered from it, new outcomes are recorded in it
+        """
+        self.timeout = max(0.05, timeout)
+        self.retries = max(0, retries)
+        self.sockets = max(1, sockets)
+        self.max_in_flight = max(1, max_in_flight)
+        self.stop_check = stop_check
+        self.budget = budget
+        self.rtt = rtt
+        self.rate = rate
+        self.ledger = ledger
+
+    def scan(self, targets: Iterable[Tuple[str, int]]) -> Iterator[ProbeResult]:
+        """
+        Probe (ip, port) pairs and yield results as they complete.
+
+        Targets follow the same protocol as TcpConnectScanner.scan: they
+        are consumed lazily and None means "nothing to do yet".
+
+        Args:
+            targets: Iterable of (ip, port) pairs, possibly interleaved with None
+
+        Yields:
+            ProbeResult for every target, in completion order; the state is
+            PORT_OPEN, PORT_CLOSED, PORT_FILTERED (other ICMP unreachable,
+            or the probe could not be sent) or PORT_OPEN_FILTERED (no
+            answer)
+        """
+        socks = self._open_sockets()
+        if not socks:
+            for target in targets:
+                if target is None:
+                    if self.stop_check and self.stop_check():
+                        return
+                    time.sleep(self.IDLE_POLL_INTERVAL)
+                    continue
+                yield ProbeResult(*target, PORT_OPEN_FILTERED, 0.0)
+            return
+
+        # (ip, port) -> [socket, first send time, sends, deadline]
+        pending: Dict[Tuple[str, int], list] = {}
+        # Heap of (deadline, sequence, (ip, port)); stale entries are skipped
+        deadlines: list = []
+        sequence = itertools.count()
+        retry_queue: List[Tuple[str, int]] = []
+        # Probes that could not be sent at all
+        failed: List[Tuple[str, int]] = []
+        # Target waiting for a rate token or budget before its first send
+        held: Optional[Tuple[str, int]] = None
+        next_socket = itertools.cycle(socks)
+        source = iter(targets)
+        exhausted = False
+        budget = self.budget
+        rate = self.rate
+        ledger = self.ledger
+
+        def finish(key: Tuple[str, int], state: str) -> ProbeResult:
+            entry = pending.pop(key)
+            if budget:
+                budget.release()
+            elapsed = time.monotonic() - entry[1]
+            if state in (PORT_OPEN, PORT_CLOSED):
+                if self.rtt:
+                    self.rtt.answered(key[0], elapsed, refused=state == PORT_CLOSED)
+                if rate:
+                    rate.on_answer()
+            result = ProbeResult(*key, state, elapsed * 1000.0)
+            if ledger is not None:
+                ledger.record(*key, "udp", state, result.rtt)
+            return result
+
+        def send(key: Tuple[str, int], entry: list) -> bool:
+            # False: the socket is full and the probe must be retried
+            payload = UDP_PAYLOADS.get(key[1], b"")
+            error = None
+            for _attempt in range(3):
+                try:
+                    entry[0].sendto(payload, key)
+                    error = None
+                    break
+                except (BlockingIOError, InterruptedError):
+                    if rate:
+                        rate.on_loss()
+                    return False
+                except OSError as e:
+                    error = e
+                    if e.errno in _STALE_ERRORS:
+                        continue
+                    if e.errno == errno.ENOBUFS:
+                        if rate:
+                            rate.on_loss()
+                        return False
+                    break
+            if error is not None:
+                # Nothing went out; reported as filtered like a local
+                # connect error in the TCP engine
+                logger.debug("UDP send to %s:%s failed: %s", *key, error)
+                if rate:
+                    rate.on_loss()
+                failed.append(key)
+                return True
+            entry[2] += 1
+            timeout = self.rtt.timeout(key[0]) if self.rtt else self.timeout
+            entry[3] = time.monotonic() + timeout
+            heapq.heappush(deadlines, (entry[3], next(sequence), key))
+            return True
+
+        try:
+            while True:
+                if self.stop_check and self.stop_check():
+                    break
+
+                # Resend probes whose answer is overdue, then start new ones
+                idle = False
+                paced = False
+                while retry_queue or (
+                    (held or not exhausted) and len(pending) < self.max_in_flight
+                ):
+                    if retry_queue:
+                        key = retry_queue[-1]
+                        if key not in pending:
+                            retry_queue.pop()
+                            continue
+                        if rate and not rate.try_take():
+                            paced = True
+                            break
+                        retry_queue.pop()
+                        if not send(key, pending[key]):
+                            retry_queue.append(key)
+                            break
+                        continue
+                    if held:
+                        key, held = held, None
+                    else:
+                        try:
+                            target = next(source)
+                        except StopIteration:
+                            exhausted = True
+                            break
+                        if target is None:
+                            idle = True
+                            break
+                        key = (target[0], target[1])
+                        known = ledger.get(*key, "udp") if ledger is not None else None
+                        if known is not None:
+                            yield ProbeResult(*key, known.state, known.rtt)
+                            continue
+                        if key in pending:
+                            continue
+                    # Tokens and budget are only taken for a real probe
+                    if rate and not rate.try_take():
+                        held = key
+                        paced = True
+                        break
+                    if budget and not budget.try_acquire():
+                        held = key
+                        idle = True
+                        break
+                    entry = [next(next_socket), time.monotonic(), 0, 0.0]
+                    pending[key] = entry
+                    if not send(key, entry):
+                        retry_queue.append(key)
+                        break
+
+                while failed:
+                    key = failed.pop()
+                    if key in pending:
+                        yield finish(key, PORT_FILTERED)
+
+                if exhausted and not held and not pending:
+                    break
+
+                wait = self.timeout
+                if deadlines:
+                    wait = max(0.0, deadlines[0][0] - time.monotonic())
+                if paced:
+                    wait = min(wait, rate.wait_time())
+                if idle or (not exhausted and not pending):
+                    wait = min(wait, self.IDLE_POLL_INTERVAL)
+
+                readable, _w, _x = select.select(socks, [], [], wait)
+                for sock in readable:
+                    for key, state in self._drain(sock):
+                        if key in pending:
+                            yield finish(key, state)
+
+                # Resend or give up on probes that got no answer in time
+                now = time.monotonic()
+                while deadlines and deadlines[0][0] <= now:
+                    deadline, _sequence, key = heapq.heappop(deadlines)
+                    entry = pending.get(key)
+                    if entry is None or entry[3] != deadline:
+                        continue
+                    if entry[2] <= self.retries:
+                        retry_queue.append(key)
+                    else:
+                        yield finish(key, PORT_OPEN_FILTERED)
+
+        finally:
+            for _key in pending:
+                if budget:
+                    budget.release()
+            for sock in socks:
+                sock.close()
+
+    def check(self, ip: str, port: int) -> str:
+        """Probe a single port and return its state."""
+        for result in self.scan([(ip, port)]):
+            return result.state
+        return PORT_OPEN_FILTERED
+
+    def _open_sockets(self) -> List[socket.socket]:
+        """Open the probe sockets with ICMP errors queued for reading."""
+        socks = []
+        for _ in range(self.sockets):
+            try:
+                sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            except OSError as e:
+                logger.debug("Cannot create UDP probe socket: %s", e)
+                break
+            sock.setblocking(False)
+            try:
+                sock.setsockopt(socket.IPPROTO_IP, IP_RECVERR, 1)
+            except OSError as e:
+                # Closed ports will look open|filtered
+                logger.debug("IP_RECVERR not available: %s", e)
+            socks.append(sock)
+        return socks
+
+    @staticmethod
+    def _drain(sock: socket.socket) -> Iterator[Tuple[Tuple[str, int], str]]:
+        """Read every queued ICMP error and reply, yielding ((ip, port), state)."""
+        while True:
+            try:
+                _data, ancdata, _flags, address = sock.recvmsg(
+                    512, _ERR_ANCILLARY_SIZE, MSG_ERRQUEUE
+                )
+            except OSError:
+                # Empty error queue (EAGAIN)
+                break
+            for level, kind, payload in ancdata:
+                if level != socket.IPPROTO_IP or kind != IP_RECVERR:
+                    continue
+                if len(payload) < _EXTENDED_ERR.size or not address:
+                    continue
+                _errno, origin, icmp_type, code, _pad, _info, _data = (
+                    _EXTENDED_ERR.unpack_from(payload)
+                )
+                if origin != SO_EE_ORIGIN_ICMP or icmp_type != ICMP_DEST_UNREACH:
+                    continue
+                # The error names the original destination
+                state = PORT_CLOSED if code == ICMP_PORT_UNREACH else PORT_FILTERED
+                yield (address[0], address[1]), state
+
+        while True:
+            try:
+                _data, address = sock.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                # A pending error already read from the queue above
+                continue
+            yield (address[0], address[1]), PORT_OPEN
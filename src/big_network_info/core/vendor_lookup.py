@@ -0,0 +1,277 @@
+"""
+Background online MAC vendor lookup.
+Resolves OUIs missing from the local databases through a web API with a
+few pooled keep-alive connections, under an overall deadline, without
+blocking host discovery.
+"""
+
+import http.client
+import json
+import logging
+import queue
+import threading
+import time
+import urllib.parse
+from typing import Callable, Optional, Set
+
+from .result_cache import KIND_VENDOR, ResultCache
+
+logger = logging.getLogger(__name__)
+
+# maclookup.app: free, no key required; GET <base><OUI> returns JSON
+MACLOOKUP_URL = "https://api.maclookup.app/v2/macs/"
+
+# How long an unreachable API is not asked again about an OUI (seconds);
+# a definite "not found" is cached with the cache's regular negative TTL
+FAILURE_TTL = 3600.0
+
+# Consecutive failed fresh connections after which the API counts as
+# unreachable and the remaining OUIs are dropped without being tried
+UNREACHABLE_AFTER = 3
+
+
+def oui_of(mac: str) -> str:
+    """Return the first six hex digits of a MAC, uppercase."""
+    return mac.replace(":", "").replace("-", "").replace(".", "").upper()[:6]
+
+
+def parse_vendor_response(body: bytes) -> Optional[str]:
+    """
+    Extract the company from a maclookup.app response.
+
+    Returns:
+        Company name, or None if the OUI is not registered
+    """
+    data = json.loads(body.decode("utf-8"))
+    if data.get("success") and data.get("found"):
+        return data.get("company") or None
+    return None
+
+
+class OnlineVendorLookup:
+    """
+    Batched background vendor lookups.
+
+    OUIs are submitted as hosts are found and looked up by a small set of
+    worker threads, each keeping one keep-alive connection to the API.
+    Every submitted OUI is reported exactly once through on_result: with
+    the company, or None if it is unknown, the API is unreachable or the
+    stage's deadline passed. Answers and failures are recorded in the
+    result cache for the OUIs actually asked about; once the API proves
+    unreachable the remaining OUIs are dropped without further attempts
+    (and without cache entries, so a later scan tries them again).
+    """
+
+    def __init__(
+        self,
+        cache: Optional[ResultCache] = None,
+        on_result: Optional[Callable[[str, Optional[str]], None]] = None,
+        base_url: str = MACLOOKUP_URL,
+        workers: int = 4,
+        timeout: float = 1.5,
+        deadline: Optional[float] = 8.0,
+    ):
+        """
+        Initialize the lookup stage.
+
+        Args:
+            cache: Result cache to record answers and failures in
+            on_result: Callable receiving (oui, company or None) per OUI,
+                called from a worker thread
+            base_url: API prefix the OUI is appended to
+            workers: Concurrent connections to the API
+            timeout: Seconds per request
+            deadline: Seconds after start() when pending lookups are dropped
+                (None: no deadline; the owner decides when to close)
+        """
+        self.cache = cache
+        self.on_result = on_result
+        self.base_url = base_url
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.deadline = deadline
+
+        parsed = urllib.parse.urlsplit(base_url)
+        self._https = parsed.scheme == "https"
+        self._host = parsed.hostname or ""
+        self._port = parsed.port
+        self._path = parsed.path or "/"
+
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._submitted: Set[str] = set()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._closed = False
+        self._unreachable = False
+        self._failures = 0  # Consecutive failed fresh connections
+        self._ends_at: Optional[float] = None
+
+    def __enter__(self) -> "OnlineVendorLookup":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def start(self) -> None:
+        """Start the workers; the deadline counts from now."""
+        if self.deadline is not None:
+            self._ends_at = time.monotonic() + self.deadline
+        for _ in range(self.workers):
+            thread = threading.Thread(target=self._work, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def close(self) -> None:
+        """Stop the workers; OUIs not looked up yet are reported as None."""
+        with self._lock:
+            self._closed = True
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def submit(self, mac: str) -> bool:
+        """
+        Queue the OUI of a MAC for lookup.
+
+        Args:
+            mac: MAC address
+
+        Returns:
+            True if the OUI was queued, False if it already was
+        """
+        oui = oui_of(mac)
+        with self._lock:
+            if len(oui) != 6 or oui in self._submitted:
+                return False
+            self._submitted.add(oui)
+        self._queue.put(oui)
+        return True
+
+    def lookup(self, mac: str) -> Optional[str]:
+        """
+        Look up one MAC synchronously on the calling thread.
+
+        Args:
+            mac: MAC address
+
+        Returns:
+            Company name, or None if unknown or unreachable
+        """
+        connection = None
+        try:
+            connection = self._connect()
+            return self._fetch(connection, oui_of(mac))
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            logger.debug("Online vendor lookup failed for %s: %s", mac, e)
+            return None
+        finally:
+            if connection is not None:
+                connection.close()
+
+    def _connect(self) -> http.client.HTTPConnection:
+        """Open a connection to the API host."""
+        connection_class = (
+            http.client.HTTPSConnection if self._https else http.client.HTTPConnection
+        )
+        return connection_class(self._host, self._port, timeout=self.timeout)
+
+    def _fetch(self, connection: http.client.HTTPConnection, oui: str) -> Optional[str]:
+        """
+        Ask the API about one OUI over an open connection.
+
+        Returns:
+            Company name, or None if the OUI is not registered
+
+        Raises:
+            OSError, http.client.HTTPException: If the API did not answer
+            ValueError: If the answer was not usable
+        """
+        connection.request(
+            "GET",
+            self._path + oui,
+            headers={"User-Agent": "BigNetworkInfo/1.0", "Connection": "keep-alive"},
+        )
+        response = connection.getresponse()
+        body = response.read()
+        if response.status == 404:
+            return None
+        if response.status != 200:
+            raise ValueError(f"HTTP {response.status}")
+        return parse_vendor_response(body)
+
+    def _work(self) -> None:
+        """Look up queued OUIs over one keep-alive connection until closed."""
+        connection = None
+        try:
+            while True:
+                oui = self._queue.get()
+                if oui is None:
+                    return
+                with self._lock:
+                    skip = (
+                        self._closed
+                        or self._unreachable
+                        or (
+                            self._ends_at is not None
+                            and time.monotonic() >= self._ends_at
+                        )
+                    )
+                if skip:
+                    self._report(oui, None)
+                    continue
+
+                try:
+                    try:
+                        fresh = connection is None
+                        if fresh:
+                            connection = self._connect()
+                        vendor = self._fetch(connection, oui)
+                    except (OSError, http.client.HTTPException):
+                        if fresh:
+                            raise
+                        # The server closed the kept-alive connection
+                        connection.close()
+                        connection = self._connect()
+                        vendor = self._fetch(connection, oui)
+                except (OSError, http.client.HTTPException) as e:
+                    # A fresh connection failed; a few in a row mean the
+                    # API is out of reach
+                    logger.debug("Online vendor lookup failed for %s: %s", oui, e)
+                    if connection is not None:
+                        connection.close()
+                        connection = None
+                    with self._lock:
+                        self._failures += 1
+                        if self._failures >= UNREACHABLE_AFTER:
+                            self._unreachable = True
+                    if self.cache is not None:
+                        self.cache.put(KIND_VENDOR, oui, None, ttl=FAILURE_TTL)
+                    self._report(oui, None)
+                    continue
+                except ValueError as e:
+                    # Rate limited or garbled; try again on a later scan
+                    logger.debug("Online vendor lookup failed for %s: %s", oui, e)
+                    self._report(oui, None)
+                    continue
+
+                with self._lock:
+                    self._failures = 0
+                if vendor:
+                    logger.debug("Online API resolved %s to %s", oui, vendor)
+                if self.cache is not None:
+                    self.cache.put(KIND_VENDOR, oui, vendor)
+                self._report(oui, vendor)
+        finally:
+            if connection is not None:
+                connection.close()
+
+    def _report(self, oui: str, vendor: Optional[str]) -> None:
+        """Hand a finished OUI to on_result."""
+        if self.on_result:
+            try:
+                self.on_result(oui, vendor)
+            except Exception as e:
+                logger.debug("Vendor result callback failed: %s", e)
@@ -11,7 +11,8 @@ gi.require_version("Gdk", "4.0")
 
 from gi.repository import Gtk, Adw, Gdk, Gio, GLib
 from .translation import _
-from typing import List, Callable, Optional
+from typing import Dict, List, Callable, Optional, Tuple
+import bisect
 import logging
 import shlex
 import subprocess
@@ -21,7 +22,7 @@ logger = logging.getLogger(__name__)
 
 from ..core.scanner import ScanResult
 from ..core.services import ServiceInfo
-from ..utils.network import is_local_ip
+from ..utils.network import ip_to_int, is_local_ip
 
 
 class LoadingView(Gtk.Box):
@@ -95,6 +96,16 @@ class ScanResultsView(Gtk.Box):
         self.back_callback = back_callback
         self.current_results: List[ScanResult] = []
 
+        # Live results of a scan in progress (see begin_live_results)
+        self._live_container: Optional[Gtk.Box] = None
+        self._live_progress: Optional[Gtk.ProgressBar] = None
+        self._live_summary: Optional[Gtk.Label] = None
+        self._live_results: Dict[str, ScanResult] = {}
+        self._live_cards: Dict[str, Gtk.Box] = {}
+        self._live_order: List[Tuple[int, str]] = []
+        self._live_dirty: Dict[str, ScanResult] = {}
+        self._live_flush_pending = False
+
         # Scrolled area for dynamic content (welcome/results)
         self.scrolled = Gtk.ScrolledWindow()
         self.scrolled.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
@@ -163,6 +174,137 @@ class ScanResultsView(Gtk.Box):
 
         return box
 
+    def begin_live_results(self) -> None:
+        """
+        Prepare the view for results that arrive while a scan is running.
+
+        Host cards are inserted in IP order as hosts are discovered and
+        rebuilt in place when their services or hostname change. The final
+        categorized layout replaces them once display_results() is called.
+        """
+        self.current_results = []
+        self._live_results = {}
+        self._live_cards = {}
+        self._live_order = []
+        self._live_dirty = {}
+        self._live_flush_pending = False
+
+        while self.results_box.get_first_child():
+            self.results_box.remove(self.results_box.get_first_child())
+
+        self.welcome_box.set_visible(False)
+        self.results_box.set_visible(True)
+        # Export and Scan Again only make sense for a finished scan
+        self.footer_separator.set_visible(False)
+        self.footer_box.set_visible(False)
+
+        header_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=8)
+        header_box.set_halign(Gtk.Align.CENTER)
+
+        self._live_summary = Gtk.Label(label=self.get_summary_text([]))
+        self._live_summary.add_css_class("title-2")
+        self._live_summary.add_css_class("dim-label")
+        self._live_summary.set_justify(Gtk.Justification.CENTER)
+        header_box.append(self._live_summary)
+
+        self._live_progress = Gtk.ProgressBar()
+        self._live_progress.set_size_request(300, -1)
+        self._live_progress.set_show_text(True)
+        header_box.append(self._live_progress)
+        self.results_box.append(header_box)
+
+        self._live_container = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=12)
+        self._live_container.set_margin_start(12)
+        self._live_container.set_margin_end(12)
+        self._live_container.set_margin_top(8)
+        self._live_container.set_margin_bottom(12)
+        self.results_box.append(self._live_container)
+
+    def end_live_results(self) -> None:
+        """
+        Leave live mode without results, e.g. after a failed scan.
+
+        The view goes back to its welcome message; updates still queued for
+        the abandoned scan are ignored.
+        """
+        self._live_container = None
+        self._live_progress = None
+        self._live_dirty = {}
+        self.current_results = []
+
+        while self.results_box.get_first_child():
+            self.results_box.remove(self.results_box.get_first_child())
+        self.results_box.set_visible(False)
+        self.welcome_box.set_visible(True)
+
+    def update_live_progress(self, message: str, percentage: float) -> None:
+        """
+        Show scan progress above the live results.
+
+        Args:
+            message: Status message
+            percentage: Progress percentage (0-100)
+        """
+        if self._live_progress is None:
+            return
+        self._live_progress.set_fraction(percentage / 100.0)
+        self._live_progress.set_text(f"{message} ({percentage:.0f}%)")
+
+    def update_live_result(self, result: ScanResult) -> None:
+        """
+        Insert or refresh the card of a host while the scan is running.
+
+        Updates are coalesced: every card changed since the last redraw is
+        rebuilt once on the next idle cycle.
+
+        Args:
+            result: Latest snapshot of the host's result
+        """
+        if self._live_container is None:
+            return
+        self._live_dirty[result.ip] = result
+        if not self._live_flush_pending:
+            self._live_flush_pending = True
+            GLib.idle_add(self._flush_live_results)
+
+    def _flush_live_results(self) -> bool:
+        """Apply pending live updates to the host cards."""
+        self._live_flush_pending = False
+        if self._live_container is None:
+            return False
+
+        dirty, self._live_dirty = self._live_dirty, {}
+        for ip, result in dirty.items():
+            self._live_results[ip] = result
+            enhanced = self.enhance_gateway_identification(result)
+
+            card_wrapper = self._live_cards.get(ip)
+            if card_wrapper is not None:
+                # Rebuild the card in place, keeping it open if the user expanded it
+                old_card = card_wrapper.get_first_child()
+                expanded = old_card.get_expanded() if old_card else False
+                if old_card:
+                    card_wrapper.remove(old_card)
+                new_card = self.create_host_card(enhanced)
+                new_card.set_expanded(expanded)
+                card_wrapper.append(new_card)
+                continue
+
+            card_wrapper = self.create_card_wrapper(enhanced)
+            key = (self.ip_to_int(ip), ip)
+            index = bisect.bisect(self._live_order, key)
+            if index == 0:
+                self._live_container.prepend(card_wrapper)
+            else:
+                previous = self._live_cards[self._live_order[index - 1][1]]
+                self._live_container.insert_child_after(card_wrapper, previous)
+            self._live_order.insert(index, key)
+            self._live_cards[ip] = card_wrapper
+
+        self.current_results = list(self._live_results.values())
+        self._live_summary.set_text(self.get_summary_text(self.current_results))
+        return False
+
     def display_results(self, results: List[ScanResult]) -> None:
         """
         Display scan results with improved sorting and gateway identification.
@@ -170,6 +312,10 @@ class ScanResultsView(Gtk.Box):
         Args:
             results: List of scan results to display
         """
+        # Leave live mode; late idle updates must not touch the final layout
+        self._live_container = None
+        self._live_progress = None
+
         # Store results for export functionality
         self.current_results = results
 
@@ -318,6 +464,9 @@ class ScanResultsView(Gtk.Box):
             services=result.services,
             response_time=result.response_time,
             is_alive=result.is_alive,
+            workgroup=result.workgroup,
+            filtered=result.filtered,
+            ipv6_addresses=result.ipv6_addresses,
         )
 
     def is_gateway(self, result: ScanResult) -> bool:
@@ -342,14 +491,8 @@ class ScanResultsView(Gtk.Box):
     def ip_to_int(self, ip: str) -> int:
         """Convert IP address to integer for sorting."""
         try:
-            parts = ip.split(".")
-            return (
-                (int(parts[0]) << 24)
-                + (int(parts[1]) << 16)
-                + (int(parts[2]) << 8)
-                + int(parts[3])
-            )
-        except (ValueError, IndexError):
+            return ip_to_int(ip)
+        except ValueError:
             return 0
 
     def add_categorized_results(
@@ -415,38 +558,43 @@ class ScanResultsView(Gtk.Box):
         # Optional styling class based on section type
         devices_box.add_css_class(f"results-{style_class}-container")
 
-        for i, result in enumerate(results):
-            # Create the host expander row
-            host_card = self.create_host_card(result)
-            # Wrap in a styled card container for clear visual separation
-            card_wrapper = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=0)
-            card_wrapper.add_css_class("card")
-            card_wrapper.add_css_class("device-card-separated")
-            # Add margins around each card
-            card_wrapper.set_margin_start(8)
-            card_wrapper.set_margin_end(8)
-            card_wrapper.set_margin_top(4)
-            card_wrapper.set_margin_bottom(4)
-            card_wrapper.append(host_card)
-            devices_box.append(card_wrapper)
+        for result in results:
+            devices_box.append(self.create_card_wrapper(result))
 
         container.append(devices_box)
 
-    def create_summary_header(self, results: List[ScanResult]) -> Gtk.Box:
-        """Create centered summary header for scan results with softer styling."""
-        header_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=8)
-        header_box.set_halign(Gtk.Align.CENTER)
-
-        # Summary info centered
+    def create_card_wrapper(self, result: ScanResult) -> Gtk.Box:
+        """Wrap a host card in a styled container for clear visual separation."""
+        card_wrapper = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=0)
+        card_wrapper.add_css_class("card")
+        card_wrapper.add_css_class("device-card-separated")
+        # Add margins around each card
+        card_wrapper.set_margin_start(8)
+        card_wrapper.set_margin_end(8)
+        card_wrapper.set_margin_top(4)
+        card_wrapper.set_margin_bottom(4)
+        card_wrapper.append(self.create_host_card(result))
+        return card_wrapper
+
+    def get_summary_text(self, results: List[ScanResult]) -> str:
+        """Return the "Found N hosts with M services" summary line."""
         total_hosts = len(results)
         total_services = sum(len(result.services) for result in results)
-        summary_label = Gtk.Label(
-            label=_("Found")
+        return (
+            _("Found")
             + f" {total_hosts} "
             + _("hosts with")
             + f" {total_services} "
             + _("services")
         )
+
+    def create_summary_header(self, results: List[ScanResult]) -> Gtk.Box:
+        """Create centered summary header for scan results with softer styling."""
+        header_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=8)
+        header_box.set_halign(Gtk.Align.CENTER)
+
+        # Summary info centered
+        summary_label = Gtk.Label(label=self.get_summary_text(results))
         summary_label.add_css_class("title-2")
         summary_label.add_css_class("dim-label")
         summary_label.set_justify(Gtk.Justification.CENTER)
@@ -596,6 +744,39 @@ class ScanResultsView(Gtk.Box):
                 hostname_row.add_suffix(hostname_copy_btn)
                 device_info_group.add(hostname_row)
 
+            # Workgroup row (Windows and Samba hosts)
+            if result.workgroup:
+                workgroup_row = Adw.ActionRow()
+                workgroup_row.set_title(result.workgroup)
+                workgroup_row.set_subtitle(_("Workgroup"))
+                workgroup_row.set_title_selectable(True)
+                device_info_group.add(workgroup_row)
+
+            # Further IPv6 addresses of the device
+            for address in result.ipv6_addresses:
+                ipv6_row = Adw.ActionRow()
+                ipv6_row.set_title(address)
+                ipv6_row.set_subtitle(_("IPv6 Address"))
+                ipv6_row.set_title_selectable(True)
+
+                ipv6_copy_btn = Gtk.Button()
+                ipv6_copy_btn.set_icon_name("edit-copy-symbolic")
+                ipv6_copy_btn.set_tooltip_text(_("Copy IPv6 address"))
+                ipv6_copy_btn.add_css_class("flat")
+                ipv6_copy_btn.connect(
+                    "clicked",
+                    lambda btn, address=address: self.copy_to_clipboard(address),
+                )
+                ipv6_row.add_suffix(ipv6_copy_btn)
+                device_info_group.add(ipv6_row)
+
+            # Every port probe timed out: a firewall drops them
+            if result.filtered:
+                filtered_row = Adw.ActionRow()
+                filtered_row.set_title(_("Filtered"))
+                filtered_row.set_subtitle(_("No port answered; probes are blocked"))
+                device_info_group.add(filtered_row)
+
             device_info_wrapper.append(device_info_group)
             expanded_container.append(device_info_wrapper)
 
@@ -1203,6 +1384,9 @@ class ScanResultsView(Gtk.Box):
         if result.vendor and result.vendor != "Unknown":
             summary_lines.append(f"{_('Vendor')}: {result.vendor}")
 
+        if result.workgroup:
+            summary_lines.append(f"{_('Workgroup')}: {result.workgroup}")
+
         if result.response_time > 0:
             summary_lines.append(f"{_('Response Time')}: {result.response_time:.1f}ms")
 
@@ -13,6 +13,17 @@ from gi.repository import Gtk, Adw, Gio
 
 from ..core.services import ServiceInfo, COMMON_SERVICES
 from ..core.config import ConfigManager
+from ..core.result_cache import get_result_cache
+from ..core.rate_control import (
+    PROFILE_AGGRESSIVE,
+    PROFILE_GENTLE,
+    PROFILE_NORMAL,
+    PROFILES,
+    get_scan_profile,
+)
+
+# Scan speed profiles in the order the settings list shows them
+SCAN_PROFILES = [PROFILE_GENTLE, PROFILE_NORMAL, PROFILE_AGGRESSIVE]
 
 
 class ConfigurationView(Gtk.ScrolledWindow):
@@ -128,24 +139,6 @@ class ConfigurationView(Gtk.ScrolledWindow):
         hostname_timeout_row.connect("notify::value", self.on_hostname_timeout_changed)
         self.detection_group.add(hostname_timeout_row)
 
-        # Discovery threads setting
-        discovery_threads_row = Adw.SpinRow()
-        discovery_threads_row.set_title(_("Discovery Threads"))
-        discovery_threads_row.set_subtitle(_("Parallel threads for host discovery"))
-        discovery_threads_adjustment = Gtk.Adjustment(
-            value=self.config_manager.config.discovery_threads,
-            lower=1,
-            upper=255,
-            step_increment=10,
-            page_increment=25,
-        )
-        discovery_threads_row.set_adjustment(discovery_threads_adjustment)
-        discovery_threads_row.set_digits(0)
-        discovery_threads_row.connect(
-            "notify::value", self.on_discovery_threads_changed
-        )
-        self.detection_group.add(discovery_threads_row)
-
         # Port scan timeout setting
         scan_timeout_row = Adw.SpinRow()
         scan_timeout_row.set_title(_("Port Scan Timeout"))
@@ -162,10 +155,34 @@ class ConfigurationView(Gtk.ScrolledWindow):
         scan_timeout_row.connect("notify::value", self.on_scan_timeout_changed)
         self.detection_group.add(scan_timeout_row)
 
+        # Scan speed profile
+        scan_profile_row = Adw.ComboRow()
+        scan_profile_row.set_title(_("Scan Speed"))
+        scan_profile_row.set_subtitle(
+            _(
+                "Gentle spares cheap routers and IoT devices; aggressive suits fast wired networks"
+            )
+        )
+        profile_model = Gtk.StringList()
+        profile_model.append(_("Gentle"))
+        profile_model.append(_("Normal"))
+        profile_model.append(_("Aggressive"))
+        scan_profile_row.set_model(profile_model)
+        current_profile = self.config_manager.config.scan_profile
+        scan_profile_row.set_selected(
+            SCAN_PROFILES.index(current_profile)
+            if current_profile in SCAN_PROFILES
+            else SCAN_PROFILES.index(PROFILE_NORMAL)
+        )
+        scan_profile_row.connect("notify::selected", self.on_scan_profile_changed)
+        self.detection_group.add(scan_profile_row)
+
         # Scan threads setting
         scan_threads_row = Adw.SpinRow()
-        scan_threads_row.set_title(_("Port Scan Threads"))
-        scan_threads_row.set_subtitle(_("Parallel threads for port scanning"))
+        scan_threads_row.set_title(_("Worker Threads"))
+        scan_threads_row.set_subtitle(
+            _("Threads for hostname lookups and other blocking probes")
+        )
         scan_threads_adjustment = Gtk.Adjustment(
             value=self.config_manager.config.scan_threads,
             lower=1,
@@ -180,6 +197,63 @@ class ConfigurationView(Gtk.ScrolledWindow):
         scan_threads_row.connect("notify::value", self.on_scan_threads_changed)
         self.detection_group.add(scan_threads_row)
 
+        # Scan window setting; the scan speed profile caps it further
+        scan_window_row = Adw.SpinRow()
+        scan_window_row.set_title(_("Parallel Probes"))
+        self.scan_window_row = scan_window_row
+        self.update_scan_window_subtitle()
+        scan_window_adjustment = Gtk.Adjustment(
+            value=self.config_manager.config.scan_window,
+            lower=16,
+            upper=max(profile.window for profile in PROFILES.values()),
+            step_increment=64,
+            page_increment=512,
+        )
+        scan_window_row.set_adjustment(scan_window_adjustment)
+        scan_window_row.set_digits(0)
+        scan_window_row.connect("notify::value", self.on_scan_window_changed)
+        self.detection_group.add(scan_window_row)
+
+        # Privileged (SYN) scan
+        privileged_row = Adw.ActionRow()
+        privileged_row.set_title(_("Privileged Scan"))
+        privileged_row.set_subtitle(
+            _("Use a half-open SYN scan when running with raw socket access")
+        )
+        privileged_switch = Gtk.Switch()
+        privileged_switch.set_valign(Gtk.Align.CENTER)
+        privileged_switch.set_active(self.config_manager.config.use_privileged_scan)
+        privileged_switch.connect("notify::active", self.on_privileged_scan_toggled)
+        privileged_row.add_suffix(privileged_switch)
+        privileged_row.set_activatable_widget(privileged_switch)
+        self.detection_group.add(privileged_row)
+
+        # Offline mode
+        offline_row = Adw.ActionRow()
+        offline_row.set_title(_("Offline Mode"))
+        offline_row.set_subtitle(
+            _("Never look up unknown device vendors on the internet")
+        )
+        offline_switch = Gtk.Switch()
+        offline_switch.set_valign(Gtk.Align.CENTER)
+        offline_switch.set_active(self.config_manager.config.offline_mode)
+        offline_switch.connect("notify::active", self.on_offline_mode_toggled)
+        offline_row.add_suffix(offline_switch)
+        offline_row.set_activatable_widget(offline_switch)
+        self.detection_group.add(offline_row)
+
+        # Cached lookup results
+        cache_row = Adw.ActionRow()
+        cache_row.set_title(_("Cached Names and Vendors"))
+        cache_row.set_subtitle(
+            _("Hostnames and vendors remembered between scans to make them faster")
+        )
+        clear_cache_button = Gtk.Button(label=_("Clear"))
+        clear_cache_button.set_valign(Gtk.Align.CENTER)
+        clear_cache_button.connect("clicked", self.on_clear_result_cache)
+        cache_row.add_suffix(clear_cache_button)
+        self.detection_group.add(cache_row)
+
         self.main_box.append(self.detection_group)
 
     def create_custom_services_section(self) -> None:
@@ -792,12 +866,6 @@ class ConfigurationView(Gtk.ScrolledWindow):
         self.config_manager.config.hostname_timeout = new_value
         self.config_manager.save_config()
 
-    def on_discovery_threads_changed(self, spin_row, *args) -> None:
-        """Handle discovery threads setting change."""
-        new_value = int(spin_row.get_value())
-        self.config_manager.config.discovery_threads = new_value
-        self.config_manager.save_config()
-
     def on_scan_timeout_changed(self, spin_row, *args) -> None:
         """Handle scan timeout setting change."""
         new_value = spin_row.get_value()
@@ -809,3 +877,46 @@ class ConfigurationView(Gtk.ScrolledWindow):
         new_value = int(spin_row.get_value())
         self.config_manager.config.scan_threads = new_value
         self.config_manager.save_config()
+
+    def on_scan_profile_changed(self, combo_row, *args) -> None:
+        """Handle scan speed profile change."""
+        selected = combo_row.get_selected()
+        if 0 <= selected < len(SCAN_PROFILES):
+            self.config_manager.config.scan_profile = SCAN_PROFILES[selected]
+            self.config_manager.save_config()
+            self.update_scan_window_subtitle()
+
+    def update_scan_window_subtitle(self) -> None:
+        """Show how many parallel probes the selected scan speed allows."""
+        window = get_scan_profile(self.config_manager.config.scan_profile).window
+        self.scan_window_row.set_subtitle(
+            _("Maximum probes in flight across all scan stages")
+            + " ("
+            + _("at most")
+            + f" {window} "
+            + _("at the selected scan speed")
+            + ")"
+        )
+
+    def on_privileged_scan_toggled(self, switch: Gtk.Switch, *args) -> None:
+        """Handle privileged scan setting change."""
+        self.config_manager.config.use_privileged_scan = switch.get_active()
+        self.config_manager.save_config()
+
+    def on_offline_mode_toggled(self, switch: Gtk.Switch, *args) -> None:
+        """Handle offline mode setting change."""
+        self.config_manager.config.offline_mode = switch.get_active()
+        self.config_manager.save_config()
+
+    def on_clear_result_cache(self, button: Gtk.Button) -> None:
+        """Forget every cached hostname, NetBIOS and vendor answer."""
+        get_result_cache().clear()
+        self.show_message(
+            _("Cache Cleared"), _("The next scan will look up every device again.")
+        )
+
+    def on_scan_window_changed(self, spin_row, *args) -> None:
+        """Handle scan window setting change."""
+        new_value = int(spin_row.get_value())
+        self.config_manager.config.scan_window = new_value
+        self.config_manager.save_config()
@@ -15,7 +15,7 @@ import webbrowser
 import subprocess
 from typing import List, Optional
 
-from ..core.scanner import NetworkScanner, ScanResult
+from ..core.scanner import NetworkScanner, ScanEvent, ScanResult
 from ..core.services import ServiceInfo
 from ..core.config import ConfigManager
 from ..core.network_diagnostics import (
@@ -41,6 +41,7 @@ class NetworkScannerApp(Adw.Application):
         self.config_manager = ConfigManager()
         self.current_results: List[ScanResult] = []
         self.scanning_thread: Optional[threading.Thread] = None
+        self.scan_generation = 0
 
     def do_activate(self):
         """Activate the application and create the main window."""
@@ -254,9 +255,16 @@ class NetworkScannerApp(Adw.Application):
         # Switch to scanning view
         self.scanner_stack.set_visible_child_name("scanning")
 
+        # Events still queued from a previous scan are dropped
+        self.scan_generation += 1
+
         # Create scanner with progress callback (auto-detect privilege mode)
+        generation = self.scan_generation
         self.scanner = NetworkScanner(
-            progress_callback=self.on_scan_progress, config_manager=self.config_manager
+            progress_callback=lambda message, percentage: self.on_scan_progress(
+                message, percentage, generation
+            ),
+            config_manager=self.config_manager,
         )
 
         # Start scanning thread
@@ -272,44 +280,98 @@ class NetworkScannerApp(Adw.Application):
         Args:
             network_range: Network range to scan
         """
+        generation = self.scan_generation
         try:
-            results = self.scanner.scan_network(network_range)
-            GLib.idle_add(self.on_scan_completed, results)
+            results = self.scanner.scan_network(
+                network_range,
+                result_callback=lambda event: GLib.idle_add(
+                    self.on_scan_event, event, generation
+                ),
+            )
+            GLib.idle_add(self.on_scan_completed, results, generation)
         except Exception as e:
-            GLib.idle_add(self.on_scan_error, str(e))
+            GLib.idle_add(self.on_scan_error, str(e), generation)
+
+    def on_scan_event(self, event: ScanEvent, generation: int) -> bool:
+        """
+        Show a host as soon as the scanner reports it.
+
+        The first host switches from the progress page to the results view,
+        which then fills in while the scan keeps running.
+
+        Args:
+            event: Incremental scan event
+            generation: Scan the event belongs to
+        """
+        if generation != self.scan_generation:
+            return False
+        if self.scanner_stack.get_visible_child_name() == "scanning":
+            self.results_view.begin_live_results()
+            self.scanner_stack.set_visible_child_name("results")
+        self.results_view.update_live_result(event.result)
+        return False
+
+    def on_scan_progress(
+        self, message: str, percentage: float, generation: int
+    ) -> None:
+        """
+        Handle scan progress updates (called from the scanning thread).
 
-    def on_scan_progress(self, message: str, percentage: float) -> None:
+        Args:
+            message: Progress message
+            percentage: Progress percentage (0-100)
+            generation: Scan the update belongs to
         """
-        Handle scan progress updates.
+        GLib.idle_add(self.show_scan_progress, message, percentage, generation)
+
+    def show_scan_progress(
+        self, message: str, percentage: float, generation: int
+    ) -> bool:
+        """
+        Show a progress update unless it belongs to an earlier scan.
 
         Args:
             message: Progress message
             percentage: Progress percentage (0-100)
+            generation: Scan the update belongs to
         """
-        GLib.idle_add(self.loading_view.update_progress, message, percentage)
+        if generation != self.scan_generation:
+            return False
+        self.loading_view.update_progress(message, percentage)
+        self.results_view.update_live_progress(message, percentage)
+        return False
 
-    def on_scan_completed(self, results: List[ScanResult]) -> None:
+    def on_scan_completed(self, results: List[ScanResult], generation: int) -> None:
         """
         Handle scan completion.
 
         Args:
             results: Scan results
+            generation: Scan the results belong to
         """
+        if generation != self.scan_generation:
+            return
         self.current_results = results
         self.results_view.display_results(results)
 
         # Switch to results view
         self.scanner_stack.set_visible_child_name("results")
 
-    def on_scan_error(self, error_message: str) -> None:
+    def on_scan_error(self, error_message: str, generation: int) -> None:
         """
         Handle scan error.
 
         Args:
             error_message: Error message
+            generation: Scan that failed
         """
+        if generation != self.scan_generation:
+            return
         self.show_error_dialog(_("Scan failed") + f": {error_message}")
 
+        # Drop the partial live results of the failed scan
+        self.results_view.end_live_results()
+
         # Reset scanner state
         self.scanner = None
         self.scanning_thread = None
@@ -3,69 +3,297 @@ Network utility functions.
 Helper functions for network operations and IP address handling.
 """
 
+import bisect
+import functools
 import ipaddress
 import socket
-from typing import List
+import struct
+from typing import Iterable, Iterator, List, Tuple
 
+# Largest IPv6 range accepted by the parser; bigger ones cannot be enumerated
+# (and a /64 would not even fit in len())
+MAX_IPV6_RANGE_SIZE = 1 << 16
 
-def parse_ip_range(ip_range: str) -> List[str]:
+
+def ip_to_int(ip: str) -> int:
     """
-    Parse various IP range formats and return list of IP addresses.
+    Convert an IPv4 or IPv6 address string to an integer.
 
-    Supported formats:
-    - CIDR notation: 192.168.1.0/24
-    - Range notation: 192.168.1.1-254
-    - Single IP: 192.168.1.1
+    The zone of a scoped IPv6 address (fe80::1%eth0) is ignored.
 
     Args:
-        ip_range: IP range string
+        ip: IP address string
 
     Returns:
-        List of IP addresses
-    """
-    ip_list = []
+        Integer value of the address
 
+    Raises:
+        ValueError: If the string is not a valid IP address
+    """
     try:
-        if "/" in ip_range:
-            # CIDR notation
-            network = ipaddress.ip_network(ip_range, strict=False)
-            ip_list = [str(ip) for ip in network.hosts()]
-
-        elif "-" in ip_range:
-            # Range notation (e.g., 192.168.1.1-254)
-            if ip_range.count("-") == 1:
-                start_ip, end_part = ip_range.split("-")
-                start_ip = start_ip.strip()
-                end_part = end_part.strip()
-
-                # Parse start IP
-                start_addr = ipaddress.ip_address(start_ip)
-
-                # Check if end_part is just the last octet
-                if "." not in end_part:
-                    # Just the last octet (e.g., "192.168.1.1-254")
-                    base_ip = ".".join(start_ip.split(".")[:-1])
-                    start_octet = int(start_ip.split(".")[-1])
-                    end_octet = int(end_part)
-
-                    for i in range(start_octet, end_octet + 1):
-                        ip_list.append(f"{base_ip}.{i}")
-                else:
-                    # Full IP range (e.g., "192.168.1.1-192.168.1.254")
-                    end_addr = ipaddress.ip_address(end_part)
-                    current = start_addr
-                    while current <= end_addr:
-                        ip_list.append(str(current))
-                        current += 1
-        else:
-            # Single IP
-            ip_addr = ipaddress.ip_address(ip_range)
-            ip_list = [str(ip_addr)]
+        if ":" in ip:
+            address = ip.split("%", 1)[0]
+            high, low = struct.unpack(
+                "!QQ", socket.inet_pton(socket.AF_INET6, address)
+            )
+            return (high << 64) | low
+        return struct.unpack("!I", socket.inet_pton(socket.AF_INET, ip))[0]
+    except (OSError, TypeError) as e:
+        raise ValueError(f"Invalid IP address: {ip}") from e
+
+
+def int_to_ip(value: int, version: int = 4) -> str:
+    """
+    Convert an integer back to an IP address string.
+
+    Args:
+        value: Integer address
+        version: IP version (4 or 6)
+
+    Returns:
+        IP address string
+    """
+    if version == 6:
+        return socket.inet_ntop(
+            socket.AF_INET6, struct.pack("!QQ", value >> 64, value & (2**64 - 1))
+        )
+    return socket.inet_ntoa(struct.pack("!I", value))
+
+
+class IPRange:
+    """
+    Compact, immutable set of IP addresses stored as integer segments.
+
+    Supports ranges made of several comma-separated parts, for example
+    "10.0.0.0/24,10.0.5.1-40". Length, membership and index access do not
+    depend on the number of addresses, and iteration produces address
+    strings only as they are consumed.
+    """
+
+    __slots__ = ("_starts", "_ends", "_offsets", "_size", "version")
+
+    def __init__(self, segments: Iterable[Tuple[int, int]], version: int = 4):
+        """
+        Initialize the range from inclusive (first, last) integer pairs.
+
+        Overlapping and adjacent segments are merged.
+
+        Args:
+            segments: Iterable of (first, last) address integers
+            version: IP version of every address (4 or 6)
+        """
+        merged: List[List[int]] = []
+        for first, last in sorted(seg for seg in segments if seg[0] <= seg[1]):
+            if merged and first <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], last)
+            else:
+                merged.append([first, last])
+
+        self.version = version
+        self._starts = [seg[0] for seg in merged]
+        self._ends = [seg[1] for seg in merged]
+        # Index of the first address of each segment within the whole range
+        self._offsets = []
+        size = 0
+        for first, last in merged:
+            self._offsets.append(size)
+            size += last - first + 1
+        self._size = size
+
+    @classmethod
+    def parse(cls, ip_range: str) -> "IPRange":
+        """
+        Parse a range string into an IPRange.
+
+        Supported formats (comma-separated parts may be combined):
+        - CIDR notation: 192.168.1.0/24
+        - Range notation: 192.168.1.1-254 or 192.168.1.1-192.168.1.254
+        - Single IP: 192.168.1.1
+
+        Args:
+            ip_range: IP range string
+
+        Returns:
+            Parsed IPRange
+
+        Raises:
+            ValueError: If the format is invalid, mixes IPv4 and IPv6, or
+                holds more than MAX_IPV6_RANGE_SIZE IPv6 addresses
+        """
+        return _parse_ip_range_cached(ip_range.strip())
+
+    @staticmethod
+    def _parse_segment(part: str) -> Tuple[int, int, int]:
+        """Parse one range part into (first, last, version)."""
+        if ":" in part:
+            # IPv6 address or network; like hosts(), skip the subnet-router
+            # anycast address on networks larger than /127
+            network = ipaddress.IPv6Network(part, strict=False)
+            first = int(network.network_address)
+            last = int(network.broadcast_address)
+            if network.prefixlen < 127:
+                first += 1
+            return first, last, 6
+
+        if "/" in part:
+            # CIDR notation; like ip_network().hosts(), skip network and
+            # broadcast addresses unless the prefix is /31 or /32
+            network = ipaddress.IPv4Network(part, strict=False)
+            first = int(network.network_address)
+            last = int(network.broadcast_address)
+            if network.prefixlen < 31:
+                first += 1
+                last -= 1
+            return first, last, 4
+
+        if "-" in part:
+            if part.count("-") != 1:
+                raise ValueError(part)
+            start_ip, end_part = (piece.strip() for piece in part.split("-"))
+            first = int(ipaddress.IPv4Address(start_ip))
+
+            if "." not in end_part:
+                # Just the last octet (e.g., "192.168.1.1-254")
+                end_octet = int(end_part)
+                if not 0 <= end_octet <= 255:
+                    raise ValueError(part)
+                last = (first & 0xFFFFFF00) | end_octet
+            else:
+                # Full IP range (e.g., "192.168.1.1-192.168.1.254")
+                last = int(ipaddress.IPv4Address(end_part))
+            return first, last, 4
+
+        # Single IP
+        address = int(ipaddress.IPv4Address(part))
+        return address, address, 4
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def __iter__(self) -> Iterator[str]:
+        for first, last in zip(self._starts, self._ends):
+            for value in range(first, last + 1):
+                yield int_to_ip(value, self.version)
+
+    def __contains__(self, ip) -> bool:
+        """Check membership of an address string or integer."""
+        if isinstance(ip, str):
+            if (":" in ip) != (self.version == 6):
+                return False
+            try:
+                ip = ip_to_int(ip)
+            except ValueError:
+                return False
+        index = bisect.bisect_right(self._starts, ip) - 1
+        return index >= 0 and ip <= self._ends[index]
+
+    def __getitem__(self, index: int) -> str:
+        return int_to_ip(self.int_at(index), self.version)
+
+    def __repr__(self) -> str:
+        return f"IPRange({str(self)!r})"
+
+    def __str__(self) -> str:
+        parts = []
+        for first, last in zip(self._starts, self._ends):
+            if first == last:
+                parts.append(int_to_ip(first, self.version))
+            else:
+                parts.append(
+                    f"{int_to_ip(first, self.version)}-{int_to_ip(last, self.version)}"
+                )
+        return ",".join(parts)
+
+    def int_at(self, index: int) -> int:
+        """
+        Return the address at a position as an integer.
+
+        Args:
+            index: Position within the range (negative values count from the end)
 
+        Returns:
+            Integer address
+
+        Raises:
+            IndexError: If the index is out of range
+        """
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("IPRange index out of range")
+        segment = bisect.bisect_right(self._offsets, index) - 1
+        return self._starts[segment] + (index - self._offsets[segment])
+
+
+@functools.lru_cache(maxsize=32)
+def _parse_ip_range_cached(ip_range: str) -> IPRange:
+    """Parse and cache range strings; IPRange is immutable so sharing is safe."""
+    segments = []
+    versions = set()
+    try:
+        for part in ip_range.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            first, last, version = IPRange._parse_segment(part)
+            if first > last:
+                raise ValueError(part)
+            segments.append((first, last))
+            versions.add(version)
+        if not segments or len(versions) > 1:
+            raise ValueError(ip_range)
     except (ipaddress.AddressValueError, ValueError) as e:
         raise ValueError(f"Invalid IP range format: {ip_range}") from e
 
-    return ip_list
+    parsed = IPRange(segments, versions.pop())
+    if parsed.version == 6 and parsed._size > MAX_IPV6_RANGE_SIZE:
+        raise ValueError(
+            f"IPv6 range too large: {ip_range} "
+            f"(at most {MAX_IPV6_RANGE_SIZE} addresses)"
+        )
+    return parsed
+
+
+def get_onlink_range(route_file: str = "/proc/net/route") -> IPRange:
+    """
+    Get the IPv4 addresses that are directly reachable on a local link.
+
+    Reads the kernel routing table and collects every route without a
+    gateway (excluding the default route), i.e. the connected subnets.
+
+    Args:
+        route_file: Path of the kernel IPv4 routing table
+
+    Returns:
+        IPRange covering all on-link networks (empty if none are found)
+    """
+    segments = []
+    try:
+        with open(route_file, "r") as f:
+            next(f, None)  # Header line
+            for line in f:
+                parts = line.split()
+                if len(parts) < 8:
+                    continue
+                try:
+                    # The kernel prints network-order addresses as native
+                    # integers, so repack them in host byte order
+                    destination, gateway, mask = (
+                        struct.unpack("!I", struct.pack("=I", int(field, 16)))[0]
+                        for field in (parts[1], parts[2], parts[7])
+                    )
+                except (ValueError, struct.error):
+                    continue
+                if gateway or not mask:
+                    continue
+                first = destination & mask
+                segments.append((first, first | (~mask & 0xFFFFFFFF)))
+    except OSError:
+        pass
+    return IPRange(segments)
 
 
 def get_local_ips() -> List[str]:
@@ -131,3 +359,63 @@ def is_local_ip(ip: str) -> bool:
 
     local_ips = get_local_ips()
     return ip in local_ips
+
+
+def address_family(ip: str) -> int:
+    """Return the socket family of an address string (AF_INET or AF_INET6)."""
+    return socket.AF_INET6 if ":" in ip else socket.AF_INET
+
+
+@functools.lru_cache(maxsize=64)
+def _scope_id(zone: str) -> int:
+    """Resolve an IPv6 zone (interface name or index) to a scope id."""
+    if zone.isdigit():
+        return int(zone)
+    try:
+        return socket.if_nametoindex(zone)
+    except OSError:
+        return 0
+
+
+def scoped_address(ip: str, interface: str) -> str:
+    """
+    Normalize an IPv6 address seen on an interface.
+
+    Link-local addresses get the interface as their zone (fe80::1%eth0);
+    other addresses are returned without one.
+
+    Args:
+        ip: IPv6 address, with or without a zone
+        interface: Interface the address was seen on
+
+    Returns:
+        Address string accepted by socket_address()
+    """
+    address = ip.split("%", 1)[0]
+    try:
+        if ipaddress.IPv6Address(address).is_link_local:
+            return f"{address}%{interface}"
+    except ValueError:
+        pass
+    return address
+
+
+def socket_address(ip: str, port: int) -> tuple:
+    """
+    Build the socket address for connect() or sendto().
+
+    IPv6 addresses get the 4-tuple form with the zone of link-local
+    addresses resolved to its scope id; Python does not resolve a zone
+    given in a plain (host, port) pair.
+
+    Args:
+        ip: IPv4 or IPv6 address, IPv6 optionally with a %zone
+        port: Port number
+
+    Returns:
+        (ip, port) for IPv4, (ip, port, flowinfo, scope_id) for IPv6
+    """
+    if ":" not in ip:
+        return (ip, port)
+    address, _separator, zone = ip.partition("%")
+    return (address, port, 0, _scope_id(zone) if zone else 0)
@@ -22,6 +22,7 @@ from reportlab.lib.enums import TA_CENTER
 from ..core.scanner import ScanResult
 from ..core.network_diagnostics import DiagnosticStep, DiagnosticStatus
 from ..gui.translation import _
+from .network import ip_to_int
 
 
 class PDFExporter:
@@ -527,6 +528,13 @@ class PDFExporter:
                     self.styles["InfoText"],
                 ),
             ]
+            if host.workgroup:
+                host_info_paras.append(
+                    Paragraph(
+                        f"<b>👥 {_('Workgroup:')}</b> {host.workgroup}",
+                        self.styles["InfoText"],
+                    )
+                )
 
             services_paras = []
             if host.services:
@@ -731,14 +739,8 @@ class PDFExporter:
     def _ip_to_int(self, ip: str) -> int:
         """Convert IP address to integer for sorting."""
         try:
-            parts = ip.split(".")
-            return (
-                (int(parts[0]) << 24)
-                + (int(parts[1]) << 16)
-                + (int(parts[2]) << 8)
-                + int(parts[3])
-            )
-        except (ValueError, IndexError):
+            return ip_to_int(ip)
+        except ValueError:
             return 0  # Fallback for invalid IPs
 
     def export_diagnostics_to_pdf(